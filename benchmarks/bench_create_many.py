@@ -0,0 +1,72 @@
+# coding: utf-8
+"""
+    Benchmark of StixObservable.create_many with the synchronous client and with AsyncOpenCTIApiClient,
+    against the fake platform served over HTTP
+
+    python benchmarks/bench_create_many.py [--sizes 2000,6000] [--latency 0.0]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_platform import FakePlatform, FakePlatformServer
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_client_async import AsyncOpenCTIApiClient, aiohttp
+
+
+def generate_observables(size):
+    return [{'type': 'IPv4-Addr', 'observable_value': '10.%d.%d.%d' % (i // 62500, i // 250 % 250, i % 250)}
+            for i in range(size)]
+
+
+def bench_sync(observables, latency):
+    with FakePlatformServer(FakePlatform(latency)) as server:
+        client = OpenCTIApiClient(server.url, 'token', 'error')
+        start = time.perf_counter()
+        ids = client.stix_observable.create_many(observables)
+        duration = time.perf_counter() - start
+        client.close()
+    return len(ids), duration
+
+
+def bench_async(observables, latency):
+    async def create():
+        async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as client:
+            start = time.perf_counter()
+            ids = await client.stix_observable.create_many(observables)
+            return len(ids), time.perf_counter() - start
+
+    with FakePlatformServer(FakePlatform(latency)) as server:
+        return asyncio.get_event_loop().run_until_complete(create())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the creation of observables in bulk')
+    parser.add_argument('--sizes', default='2000,6000', help='comma-separated numbers of observables')
+    parser.add_argument('--latency', type=float, default=0.0, help='latency of the fake platform (seconds)')
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    clients = [('sync', bench_sync)]
+    if aiohttp is not None:
+        clients.append(('async', bench_async))
+    else:
+        print('aiohttp is not installed, only the synchronous client is measured')
+
+    for size in [int(size) for size in args.sizes.split(',')]:
+        observables = generate_observables(size)
+        for name, bench in clients:
+            created, duration = bench(observables, args.latency)
+            print('%6d observables  %-5s  %d created in %.2fs (%.0f/s)' % (
+                size, name, created, duration, created / duration))
+
+
+if __name__ == '__main__':
+    main()
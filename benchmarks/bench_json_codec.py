@@ -0,0 +1,64 @@
+# coding: utf-8
+"""
+    Micro-benchmark of the JSON codecs on a representative bundle and list response
+
+    python benchmarks/bench_json_codec.py [--size 10000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bundles import generate_bundle, generate_list_response
+from pycti.utils.opencti_json import JsonCodec, OrjsonCodec, orjson
+
+
+def bench(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the JSON codecs')
+    parser.add_argument('--size', type=int, default=10000, help='number of objects of the bundle')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs, the best one is kept')
+    args = parser.parse_args()
+
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print('orjson is not installed, only the standard library is measured')
+
+    documents = {
+        'bundle': json.dumps(generate_bundle(args.size)),
+        'response': json.dumps(generate_list_response('stixRelations', args.size))
+    }
+    results = {}
+    for name, text in documents.items():
+        content = text.encode('utf-8')
+        value = json.loads(text)
+        for codec in codecs:
+            # The decoded values and encoded documents must not depend on the codec
+            assert codec.loads(content) == value
+            assert codec.dumps(value) == text
+            results[name + '.loads.' + codec.name] = bench(lambda: codec.loads(content), args.repeat)
+            # Codecs encoding with the standard library share its figure
+            if codec.name == 'json' or type(codec).dumps is not JsonCodec.dumps:
+                results[name + '.dumps.' + codec.name] = bench(lambda: codec.dumps(value), args.repeat)
+        print('%s: %.1f MB' % (name, len(content) / 1e6))
+        for operation in ['loads', 'dumps']:
+            reference = results[name + '.' + operation + '.json']
+            for codec in codecs:
+                duration = results.get(name + '.' + operation + '.' + codec.name)
+                if duration is None:
+                    continue
+                print('  %-6s %-8s %8.1f ms  x%.2f' % (operation, codec.name, duration * 1000, reference / duration))
+
+
+if __name__ == '__main__':
+    main()
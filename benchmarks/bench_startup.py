@@ -0,0 +1,82 @@
+# coding: utf-8
+"""
+    Startup benchmark: time of `import pycti` and time to the first query, in fresh interpreters
+
+    python benchmarks/bench_startup.py [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer only exists from Python 3.7
+    daemon_threads = True
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SCRIPT = '''
+import time
+start = time.perf_counter()
+import pycti
+imported = time.perf_counter()
+client = pycti.OpenCTIApiClient(URL, 'token', 'error', perform_health_check=HEALTH_CHECK)
+built = time.perf_counter()
+client.threat_actor.list(first=1)
+queried = time.perf_counter()
+print(imported - start, built - start, queried - start)
+'''
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        data = json.dumps({'data': {'threatActors': {'edges': [], 'pageInfo': {'globalCount': 0}}}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run(url, health_check, repeat):
+    script = SCRIPT.replace('URL', repr(url)).replace('HEALTH_CHECK', str(health_check))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+        timings.append([float(value) for value in output.split()])
+    return [statistics.median(values) for values in zip(*timings)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the startup of pycti')
+    parser.add_argument('--repeat', type=int, default=10, help='number of interpreters started per scenario')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:' + str(server.server_port)
+
+    print('median over %d interpreters (ms)    import  client  first query' % args.repeat)
+    for health_check in [True, False]:
+        imported, built, queried = run(url, health_check, args.repeat)
+        print('  perform_health_check=%-5s          %7.1f %7.1f %12.1f' % (
+            health_check, imported * 1000, built * 1000, queried * 1000))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+# coding: utf-8
+
+import random
+import uuid
+
+MARKING = {
+    'type': 'marking-definition',
+    'id': 'marking-definition--34098fce-860f-48ae-8e50-ebd3cc5e41da',
+    'created': '2017-01-20T00:00:00.000Z',
+    'definition_type': 'tlp',
+    'definition': {'tlp': 'green'}
+}
+
+IDENTITY = {
+    'type': 'identity',
+    'id': 'identity--7b82b010-b1c0-4dae-981f-7756374a17df',
+    'created': '2019-05-03T09:40:05.296Z',
+    'modified': '2019-05-03T09:40:05.296Z',
+    'name': 'ACME Threat Intelligence',
+    'identity_class': 'organization'
+}
+
+
+def stix_id(type):
+    return type + '--' + str(uuid.UUID(int=random.getrandbits(128)))
+
+
+def generate_bundle(size, seed=42, report_size=50):
+    """
+        Generate a STIX2 bundle shaped like a connector feed
+        (reports of indicators, malwares and threat actors linked by relationships)
+        :param size: number of objects of the bundle
+        :param seed: seed of the generator, the same size and seed always give the same bundle
+        :param report_size: number of objects of each report
+        :return the bundle dict
+    """
+    random.seed(seed)
+    objects = [MARKING, IDENTITY]
+    entities = []
+    while len(objects) + len(entities) < size:
+        type = random.choice(['indicator', 'indicator', 'indicator', 'malware', 'threat-actor', 'relationship'])
+        common = {
+            'id': stix_id(type),
+            'type': type,
+            'created': '2019-06-%02dT10:%02d:00.000Z' % (random.randint(1, 28), random.randint(0, 59)),
+            'modified': '2019-07-%02dT10:%02d:00.000Z' % (random.randint(1, 28), random.randint(0, 59)),
+            'created_by_ref': IDENTITY['id'],
+            'object_marking_refs': [MARKING['id']]
+        }
+        if type == 'indicator':
+            common.update({
+                'name': '%d.%d.%d.%d' % tuple(random.randint(1, 254) for _ in range(4)),
+                'description': 'Command and control server observed in the campaign. ' * random.randint(1, 4),
+                'pattern': "[ipv4-addr:value = '%d.%d.%d.%d']" % tuple(random.randint(1, 254) for _ in range(4)),
+                'valid_from': '2019-06-01T00:00:00.000Z',
+                'labels': ['malicious-activity'],
+                'x_opencti_score': random.randint(0, 100)
+            })
+        elif type == 'relationship':
+            # Indicators indicate malwares and threat actors, threat actors use malwares
+            sources = [entity for entity in entities if entity['type'] in ['indicator', 'threat-actor']]
+            if len(sources) == 0:
+                continue
+            source = random.choice(sources)
+            targets = [entity for entity in entities if entity['type'] == 'malware' or (
+                source['type'] == 'indicator' and entity['type'] == 'threat-actor')]
+            if len(targets) == 0:
+                continue
+            target = random.choice(targets)
+            common.update({
+                'relationship_type': 'indicates' if source['type'] == 'indicator' else 'uses',
+                'source_ref': source['id'],
+                'target_ref': target['id'],
+                'description': 'Observed by the sensors of the partners.',
+                'x_opencti_weight': random.randint(1, 4)
+            })
+        else:
+            common.update({
+                'name': 'Entity %d.%d' % (seed, len(entities)),
+                'description': 'Known to target the financial sector in Europe — “élite” operators. ' * 3,
+                'labels': ['trojan'] if type == 'malware' else ['crime-syndicate'],
+                'aliases': ['Alias %d' % i for i in range(random.randint(0, 3))]
+            })
+        entities.append(common)
+    reports = []
+    for i in range(0, len(entities), report_size):
+        reports.append({
+            'id': stix_id('report'),
+            'type': 'report',
+            'name': 'Report %d.%d' % (seed, i),
+            'published': '2019-07-01T00:00:00.000Z',
+            'created_by_ref': IDENTITY['id'],
+            'object_marking_refs': [MARKING['id']],
+            'object_refs': [entity['id'] for entity in entities[i:i + report_size]]
+        })
+    return {
+        'type': 'bundle',
+        'id': stix_id('bundle'),
+        'spec_version': '2.0',
+        'objects': objects + entities + reports
+    }
+
+
+def generate_list_response(name, size, seed=42, refs=0):
+    """
+        Generate the GraphQL response of a list query
+        :param name: the name of the list (for instance 'stixRelations')
+        :param size: number of nodes
+        :param refs: number of objectRefs and reports of each node (as in a page of reports)
+        :return the response dict
+    """
+    random.seed(seed)
+    edges = []
+    for i in range(size):
+        node_refs = [{'node': {'id': 'object%d' % j, 'stix_id_key': 'indicator--%d' % j, 'entity_type': 'indicator',
+                               'name': 'Indicator %d' % j},
+                      'relation': {'id': 'o%d.%d' % (i, j)}} for j in range(refs)]
+        edges.append({
+            'node': {
+                'id': str(uuid.UUID(int=random.getrandbits(128))),
+                'stix_id_key': stix_id('indicator'),
+                'entity_type': 'indicator',
+                'name': 'Indicator %d' % i,
+                'description': 'Command and control server observed in the campaign.',
+                'created': '2019-06-01T00:00:00.000Z',
+                'modified': '2019-06-02T00:00:00.000Z',
+                'createdByRef': {'node': {'id': 'identity', 'name': 'ACME'}, 'relation': {'id': 'r' + str(i)}},
+                'markingDefinitions': {'edges': [{'node': {'id': 'marking', 'definition': 'TLP:GREEN'},
+                                                  'relation': {'id': 'm' + str(i)}}]},
+                'tags': {'edges': []},
+                'killChainPhases': {'edges': []},
+                'externalReferences': {'edges': []}
+            },
+            'relation': {'id': 'relation' + str(i)}
+        })
+        if refs > 0:
+            edges[-1]['node'].update({'objectRefs': {'edges': node_refs}, 'reports': {'edges': node_refs[:refs // 10]}})
+    return {'data': {name: {'edges': edges, 'pageInfo': {'startCursor': '', 'endCursor': '', 'hasNextPage': False,
+                                                         'hasPreviousPage': False, 'globalCount': size}}}}
@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+    Compare two results of the benchmark suite (benchmarks/suite.py --output)
+
+    The metrics named *_per_second are better when higher, the others (seconds, calls) when
+    lower. The exit status is 1 when a metric regressed by more than the threshold.
+
+    python benchmarks/compare.py before.json after.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+# Metrics describing the workload, not its performance
+COUNTS = ['objects', 'entities', 'bundles', 'nodes']
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_second')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two results of the benchmark suite')
+    parser.add_argument('before', help='results of the reference version')
+    parser.add_argument('after', help='results of the measured version')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change reported as a regression')
+    args = parser.parse_args()
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+
+    print('%s (%s) -> %s (%s)' % (before.get('revision'), before.get('date'), after.get('revision'), after.get('date')))
+    regressions = 0
+    for name in sorted(set(before['results']) & set(after['results'])):
+        for metric, value in sorted(after['results'][name].items()):
+            reference = before['results'][name].get(metric)
+            if metric in COUNTS or reference is None or reference == 0 or value == 0:
+                continue
+            change = value / reference - 1
+            regressed = (change < -args.threshold) if higher_is_better(metric) else (change > args.threshold)
+            if regressed:
+                regressions += 1
+            print('%-22s %-20s %12.4g %12.4g %+8.1f%%%s' % (
+                name, metric, reference, value, change * 100, '  REGRESSION' if regressed else ''))
+    for name in sorted(set(before['results']) ^ set(after['results'])):
+        print('%-22s only in %s' % (name, args.before if name in before['results'] else args.after))
+    sys.exit(1 if regressions > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+# coding: utf-8
+"""
+    In-memory fake of the OpenCTI GraphQL API, good enough to import and export bundles
+
+    The entities created through the `*Add` mutations are stored and can be read back by id or
+    stix_id_key, the `*Edit` mutations return the edited entity, the lists are filtered on
+    simple `{key, values}` filters. The objects added to the reports and the ends of the
+    relations are returned with them. Nothing else of the platform is emulated.
+"""
+
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from pycti.utils.constants import ObservableTypes
+
+OBSERVABLE_TYPES = [type.value.lower() for type in ObservableTypes]
+ROOT_FIELD = re.compile(r'^\s*(?:(?:query|mutation)\b[^{]*)?\{\s*(\w+)')
+EDIT_FIELD = re.compile(r'\w+\s*(?:\([^)]*\))?\s*\{\s*(\w+)')
+# Aliased field patches of a multi-field update, and the variables of their inputs
+PATCH_FIELDS = re.compile(r'(\w+)\s*:\s*\w+Edit\s*\(id:\s*\$id\)\s*\{\s*fieldPatch\s*\(input:\s*\$(\w+)\)')
+
+# Root fields of the reads and their entity types (None for any type)
+READS = {
+    'stixEntity': None,
+    'stixDomainEntity': None,
+    'stixObservable': None,
+    'stixRelation': 'stix_relation',
+    'stixObservableRelation': 'stix_observable_relation',
+    'markingDefinition': 'marking-definition',
+    'externalReference': 'external-reference',
+    'killChainPhase': 'kill-chain-phase',
+    'identity': None,
+    'threatActor': 'threat-actor',
+    'intrusionSet': 'intrusion-set',
+    'campaign': 'campaign',
+    'incident': 'incident',
+    'malware': 'malware',
+    'tool': 'tool',
+    'vulnerability': 'vulnerability',
+    'attackPattern': 'attack-pattern',
+    'courseOfAction': 'course-of-action',
+    'report': 'report',
+}
+
+# Scalar fields read by pycti, null when the entity has no value for them
+FIELDS = [
+    'name', 'description', 'alias', 'stix_label', 'created', 'modified', 'created_at', 'updated_at', 'first_seen',
+    'last_seen', 'published', 'objective', 'goal', 'sophistication', 'resource_level', 'primary_motivation',
+    'secondary_motivation', 'personal_motivation', 'tool_version', 'platform', 'required_permission', 'level',
+    'identity_class', 'organization_class', 'report_class', 'object_status', 'source_confidence_level',
+    'graph_data', 'observable_value', 'weight', 'role_played', 'relationship_type', 'definition_type',
+    'definition', 'score', 'expiration', 'inferred'
+]
+
+# Fields of the filters answered with an index instead of a scan
+INDEXED_FIELDS = ['name', 'alias', 'stix_id_key', 'fromId', 'toId', 'observable_value']
+
+
+def entity_type(root):
+    # stixDomainEntityAdd -> stix-domain-entity, threatActorAdd -> threat-actor
+    return re.sub(r'([A-Z])', lambda match: '-' + match.group(1).lower(), root[:-len('Add')])
+
+
+class FakePlatform:
+    """
+        Fake OpenCTI platform answering the GraphQL operations of pycti
+        :param latency: time spent on each operation (seconds)
+        :param duplicate_errors: refuse to create an entity named as an existing one of its type, with a
+                                 DUPLICATE error (as a client built with duplicate_errors=True expects)
+    """
+
+    def __init__(self, latency=0.0, duplicate_errors=False):
+        self.latency = latency
+        self.duplicate_errors = duplicate_errors
+        self.lock = threading.Lock()
+        self.entities = {}
+        # Ids of the entities by type and by (field, value) of the usual filters
+        self.types = {}
+        self.index = {}
+        self.stix_ids = {}
+        self.relations = []
+        self.persisted = {}
+        self.operations = 0
+
+    def answer(self, payload):
+        """
+            Answer a JSON payload (an operation, possibly persisted, or a batch of operations)
+            :return the JSON response
+        """
+        if isinstance(payload, list):
+            return [self.answer(operation) for operation in payload]
+        query = payload.get('query')
+        persisted = payload.get('extensions', {}).get('persistedQuery')
+        if persisted is not None:
+            if query is None:
+                query = self.persisted.get(persisted['sha256Hash'])
+                if query is None:
+                    return {'errors': [{'message': 'PersistedQueryNotFound',
+                                        'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'}}]}
+            elif hashlib.sha256(query.encode('utf-8')).hexdigest() == persisted['sha256Hash']:
+                self.persisted[persisted['sha256Hash']] = query
+        return self.execute(query, payload.get('variables') or {})
+
+    def execute(self, query, variables):
+        """
+            Execute an operation
+            :param query: the GraphQL document
+            :param variables: the variables of the operation
+            :return the JSON response
+        """
+        if self.latency > 0:
+            time.sleep(self.latency)
+        match = ROOT_FIELD.match(query)
+        if match is None:
+            return {'errors': [{'message': 'Unsupported operation'}]}
+        root = match.group(1)
+        with self.lock:
+            self.operations += 1
+            if root == 'about':
+                return {'data': {'about': {'version': 'fake'}}}
+            if root.endswith('Add'):
+                entity = self.add(root, variables)
+                if entity is None:
+                    return {'errors': [{'message': 'Element already exists', 'extensions': {'code': 'DUPLICATE'}}],
+                            'data': {root: None}}
+                return {'data': {root: entity}}
+            patches = PATCH_FIELDS.findall(query)
+            if len(patches) > 0:
+                entity = self.find(variables.get('id'))
+                for _, input in patches:
+                    if entity is not None:
+                        self.patch(entity, variables[input])
+                return {'data': {alias: {'fieldPatch': None if entity is None else {'id': entity['id']}}
+                                 for alias, _ in patches}}
+            if root.endswith('Edit'):
+                entity = self.find(variables.get('id'))
+                field = EDIT_FIELD.match(query, match.start(1)).group(1)
+                if field == 'delete':
+                    if entity is not None:
+                        del self.entities[entity['id']]
+                        del self.types[entity['entity_type']][entity['id']]
+                    return {'data': {root: {'delete': variables.get('id')}}}
+                if field == 'fieldPatch' and entity is not None:
+                    self.patch(entity, variables['input'])
+                if field == 'relationAdd' and entity is not None and \
+                        variables['input'].get('fromRole') == 'knowledge_aggregation':
+                    object_refs = entity.setdefault('object_refs', [])
+                    if variables['input']['toId'] not in object_refs:
+                        object_refs.append(variables['input']['toId'])
+                return {'data': {root: {field: self.copy(entity)}}}
+            if 'pageInfo' in query:
+                return {'data': {root: self.list(root, variables)}}
+            if root in READS:
+                entity = self.find(variables.get('id'))
+                if entity is not None and READS[root] is not None and entity['entity_type'] != READS[root]:
+                    entity = None
+                return {'data': {root: self.copy(entity)}}
+            return {'data': {root: None}}
+
+    def patch(self, entity, input):
+        value = input['value']
+        entity[input['key']] = value[0] if isinstance(value, list) and input['key'] != 'alias' else value
+        self.index_entity(entity)
+
+    def add(self, root, variables):
+        input = dict(variables.get('input') or {})
+        stix_id_key = input.get('stix_id_key')
+        entity = self.find(stix_id_key) if stix_id_key is not None else None
+        if entity is not None:
+            return self.copy(entity)
+        entity = {key: value for key, value in input.items() if not isinstance(value, (dict, list)) or key == 'alias'}
+        entity['id'] = input.get('internal_id_key') or str(uuid.uuid4())
+        entity['stix_id_key'] = stix_id_key or entity_type(root) + '--' + str(uuid.uuid4())
+        if root == 'stixRelationAdd':
+            entity['entity_type'] = 'stix_relation'
+            self.relations.append((input.get('fromId'), input.get('toId'), input.get('relationship_type')))
+        elif root == 'identityAdd':
+            entity['entity_type'] = input.get('type', 'identity').lower()
+        elif root == 'stixObservableAdd':
+            entity['entity_type'] = input.get('type', 'observable').lower()
+        else:
+            entity['entity_type'] = entity.get('type', entity_type(root)).lower()
+        if self.duplicate_errors and self.named(entity['entity_type'], entity.get('name')):
+            return None
+        self.entities[entity['id']] = entity
+        self.types.setdefault(entity['entity_type'], {})[entity['id']] = entity
+        self.index_entity(entity)
+        self.stix_ids[entity['stix_id_key']] = entity['id']
+        return self.copy(entity)
+
+    def named(self, type, name):
+        # Whether an entity of the type has the name
+        for id in self.index.get(('name', name), []):
+            entity = self.entities.get(id)
+            if entity is not None and entity['entity_type'] == type and entity.get('name') == name:
+                return True
+        return False
+
+    def find(self, id):
+        if id is None:
+            return None
+        return self.entities.get(id) or self.entities.get(self.stix_ids.get(id))
+
+    def list(self, root, variables):
+        type = READS.get(re.sub('ies$', 'y', root)[:-1] if root.endswith('ies') else root[:-1])
+        types = [type] if type is not None else [type.lower() for type in variables.get('types') or []]
+        filters = list(variables.get('filters') or [])
+        for key, field in [('fromId', 'fromId'), ('toId', 'toId'), ('relationType', 'relationship_type')]:
+            if variables.get(key) is not None:
+                filters.append({'key': field, 'values': [variables[key]]})
+        candidates = None
+        for filter in filters:
+            if filter['key'] in INDEXED_FIELDS:
+                ids = dict.fromkeys(id for value in filter['values'] for id in self.index.get((filter['key'], value), []))
+                candidates = [self.entities[id] for id in ids if id in self.entities]
+                break
+        if candidates is None:
+            if len(types) > 0:
+                candidates = [entity for type in types for entity in self.types.get(type, {}).values()]
+            else:
+                candidates = self.entities.values()
+        entities = [entity for entity in candidates
+                    if (len(types) == 0 or entity['entity_type'] in types) and
+                    all(self.matches(entity, filter) for filter in filters)]
+        # The cursors are the offsets of the nodes
+        start = int(variables.get('after') or 0)
+        end = start + (variables.get('first') or 500)
+        edges = [{'node': self.copy(entity)} for entity in entities[start:end]]
+        return {'edges': edges, 'pageInfo': {'startCursor': str(start), 'endCursor': str(end),
+                                             'hasNextPage': end < len(entities), 'hasPreviousPage': start > 0,
+                                             'globalCount': len(entities)}}
+
+    def index_entity(self, entity):
+        for field in INDEXED_FIELDS:
+            values = entity.get(field)
+            for value in values if isinstance(values, list) else [values]:
+                if value is not None:
+                    ids = self.index.setdefault((field, value), [])
+                    if entity['id'] not in ids:
+                        ids.append(entity['id'])
+
+    @staticmethod
+    def matches(entity, filter):
+        value = entity.get(filter['key'])
+        return value in filter['values'] or (isinstance(value, list) and any(v in value for v in filter['values']))
+
+    def copy(self, entity):
+        if entity is None:
+            return None
+        refs = entity.get('object_refs', [])
+        entity = dict(entity)
+        entity.pop('object_refs', None)
+        for field in FIELDS:
+            entity.setdefault(field, None)
+        # The other refs are not kept by the fake, their lists are always empty
+        entity['createdByRef'] = None
+        for key in ['markingDefinitions', 'tags', 'killChainPhases', 'externalReferences', 'reports',
+                    'stixRelations']:
+            entity[key] = {'edges': []}
+        for key in ['objectRefs', 'observableRefs', 'relationRefs']:
+            entity[key] = {'edges': []}
+        for ref in refs:
+            node = self.node(ref)
+            if node is not None:
+                key = 'relationRefs' if node['entity_type'] == 'stix_relation' else \
+                    'observableRefs' if node['entity_type'] in OBSERVABLE_TYPES else 'objectRefs'
+                entity[key]['edges'].append({'node': node, 'relation': {'id': ref}})
+        if entity['entity_type'] == 'stix_relation':
+            entity['from'] = self.node(entity.get('fromId'))
+            entity['to'] = self.node(entity.get('toId'))
+        return entity
+
+    def node(self, id):
+        entity = self.find(id)
+        if entity is None:
+            return None
+        return {'id': entity['id'], 'stix_id_key': entity['stix_id_key'], 'entity_type': entity['entity_type'],
+                'name': entity.get('name')}
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer only exists from Python 3.7
+    daemon_threads = True
+
+
+class FakePlatformServer:
+    """
+        HTTP server of a FakePlatform, on a free local port
+        :param platform: the FakePlatform
+    """
+
+    def __init__(self, platform):
+        self.platform = platform
+        platform_ = platform
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # The headers and the body are written separately, do not wait for the ACK of the headers
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                data = json.dumps(platform_.answer(json.loads(body))).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = 'http://127.0.0.1:' + str(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,79 @@
+# coding: utf-8
+"""
+    Stress test of the thread safety: concurrent `import_bundle` calls sharing one client
+
+    Each thread imports its own bundle on a fake platform, the result must be the same as
+    importing the bundles one after the other (every relationship linking the right entities).
+
+    python benchmarks/stress_import.py [--threads 8] [--size 300] [--latency 0.002]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bundles import generate_bundle
+from fake_platform import FakePlatform, FakePlatformServer
+from pycti import OpenCTIApiClient
+
+
+def check(platform, bundles):
+    """
+        Check that the relationships of the bundles link the entities created for their refs
+        :return the number of relationships missing or linking other entities
+    """
+    relations = set()
+    for from_id, to_id, relationship_type in platform.relations:
+        relations.add((from_id, to_id, relationship_type))
+        relations.add((to_id, from_id, relationship_type))
+    errors = 0
+    for bundle in bundles:
+        for item in bundle['objects']:
+            if item['type'] != 'relationship':
+                continue
+            source = platform.stix_ids.get(item['source_ref'])
+            target = platform.stix_ids.get(item['target_ref'])
+            if (source, target, item['relationship_type']) not in relations:
+                errors += 1
+    return errors
+
+
+def run(bundles, threads, latency):
+    platform = FakePlatform(latency)
+    with FakePlatformServer(platform) as server:
+        client = OpenCTIApiClient(server.url, 'token', 'error', pool_maxsize=threads)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(client.stix2.import_bundle, bundles))
+        duration = time.perf_counter() - start
+        client.close()
+    imported = sum(len(result) for result in results)
+    return imported, check(platform, bundles), platform.operations, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import bundles concurrently with a single client')
+    parser.add_argument('--threads', type=int, default=8, help='number of concurrent imports')
+    parser.add_argument('--size', type=int, default=100, help='number of objects of each bundle')
+    parser.add_argument('--latency', type=float, default=0.002, help='latency of the fake platform (seconds)')
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    bundles = [generate_bundle(args.size, seed=seed) for seed in range(args.threads)]
+    failed = False
+    for threads in [1, args.threads]:
+        imported, errors, operations, duration = run(bundles, threads, args.latency)
+        print('%2d thread(s): %d objects imported, %d operations in %.2fs (%.0f ops/s), %d wrong relationships' % (
+            threads, imported, operations, duration, operations / duration, errors))
+        failed = failed or errors > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
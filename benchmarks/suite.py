@@ -0,0 +1,222 @@
+# coding: utf-8
+"""
+    Benchmark suite of the import, the export, the split of the connectors and the processing
+    of the responses, run offline against the in-process fake platform
+
+    The results are printed and can be written as JSON to be compared between versions with
+    benchmarks/compare.py:
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json
+    python benchmarks/compare.py before.json after.json
+
+    python benchmarks/suite.py [--sizes 1000,10000,100000] [--only import,export,split,fields]
+                               [--repeat 5] [--latency 0] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bundles import generate_bundle, generate_list_response
+from fake_platform import FakePlatform
+from pycti import FakeTransport, OpenCTIApiClient, OpenCTIConnectorHelper
+from pycti.utils.opencti_json import default_codec
+
+BENCHMARKS = ['import', 'export', 'split', 'fields']
+# Number of reports exported one by one in full mode
+EXPORTED_REPORTS = 20
+# Nodes of the pages processed by process_multiple_fields, and refs of each node
+PAGE_SIZE = 500
+PAGE_REFS = 50
+
+
+def revision():
+    # Commit of the measured tree, when it is a git checkout
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def best(function, repeat):
+    """
+        Run a function several times
+        :return the best duration and the result of the first run
+    """
+    start = time.perf_counter()
+    result = function()
+    durations = [time.perf_counter() - start]
+    # Runs longer than a second are not repeated, their noise is low compared to their duration
+    while len(durations) < repeat and durations[0] < 1:
+        durations.append(timeit.timeit(function, number=1))
+    return min(durations), result
+
+
+def new_client(fake_platform):
+    return OpenCTIApiClient('http://opencti.fake', 'token', 'error', transport=FakeTransport(fake_platform.answer))
+
+
+def bench_import(fake_platform, client, size):
+    """
+        Import a bundle into an empty fake platform
+    """
+    bundle = generate_bundle(size)
+    start = time.perf_counter()
+    client.stix2.import_bundle(bundle)
+    duration = time.perf_counter() - start
+    objects = len(bundle['objects'])
+    return {
+        'objects': objects,
+        'seconds': duration,
+        'objects_per_second': objects / duration,
+        'calls_per_object': fake_platform.operations / objects
+    }
+
+
+def bench_export(fake_platform, client):
+    """
+        Export reports in full mode, one by one, then a bundle of all the entities
+    """
+    reports = list(fake_platform.types.get('report', {}))[:EXPORTED_REPORTS]
+    operations = fake_platform.operations
+    start = time.perf_counter()
+    objects = 0
+    for report_id in reports:
+        objects += len(client.stix2.export_entity('report', report_id, 'full')['objects'])
+    entity_duration = time.perf_counter() - start
+    entity_operations = fake_platform.operations - operations
+    start = time.perf_counter()
+    bundle = client.stix2.export_bundle(['Identity', 'Threat-Actor', 'Malware', 'Report'])
+    bundle_duration = time.perf_counter() - start
+    return {
+        'entity': {
+            'entities': len(reports),
+            'objects': objects,
+            'seconds': entity_duration,
+            'entities_per_second': len(reports) / entity_duration,
+            'calls_per_entity': entity_operations / len(reports)
+        },
+        'bundle': {
+            'objects': len(bundle['objects']),
+            'seconds': bundle_duration,
+            'objects_per_second': len(bundle['objects']) / bundle_duration
+        }
+    }
+
+
+def bench_split(size, repeat):
+    """
+        Split a report-heavy bundle as OpenCTIConnectorHelper does before sending it
+    """
+    # Only the splitting of the helper is measured, it does not need a platform nor a broker
+    helper = OpenCTIConnectorHelper.__new__(OpenCTIConnectorHelper)
+    helper.json_codec = default_codec()
+    helper.context = threading.local()
+    bundle = generate_bundle(size, report_size=10)
+    content = json.dumps(bundle)
+    duration, bundles = best(lambda: helper.split_stix2_bundle(content), repeat)
+    objects = len(bundle['objects'])
+    return {
+        'objects': objects,
+        'bundles': len(bundles),
+        'seconds': duration,
+        'objects_per_second': objects / duration
+    }
+
+
+def bench_fields(size, repeat):
+    """
+        Process pages of reports (nodes with refs) as the lists do
+    """
+    client = new_client(FakePlatform())
+    pages = max(1, size // PAGE_SIZE)
+    content = json.dumps(generate_list_response('reports', PAGE_SIZE, refs=PAGE_REFS))
+    durations = []
+    while len(durations) < repeat and (len(durations) == 0 or durations[0] < 1):
+        # The processing works in place, each run gets its own pages
+        data = [json.loads(content)['data']['reports'] for _ in range(pages)]
+        # As timeit does, the garbage collection does not run during the measure
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for page in data:
+                client.process_multiple(page)
+            durations.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    nodes = pages * PAGE_SIZE
+    return {
+        'nodes': nodes,
+        'seconds': min(durations),
+        'nodes_per_second': nodes / min(durations)
+    }
+
+
+def run(benchmarks, sizes, repeat, latency):
+    results = {}
+    for size in sizes:
+        if 'import' in benchmarks or 'export' in benchmarks:
+            fake_platform = FakePlatform(latency)
+            client = new_client(fake_platform)
+            results['import.' + str(size)] = bench_import(fake_platform, client, size)
+            if 'export' in benchmarks:
+                exported = bench_export(fake_platform, client)
+                results['export_entity.' + str(size)] = exported['entity']
+                results['export_bundle.' + str(size)] = exported['bundle']
+            if 'import' not in benchmarks:
+                del results['import.' + str(size)]
+        if 'split' in benchmarks:
+            results['split.' + str(size)] = bench_split(size, repeat)
+        if 'fields' in benchmarks:
+            results['fields.' + str(size)] = bench_fields(size, repeat)
+        for name, metrics in results.items():
+            if name.endswith('.' + str(size)):
+                print('%-22s %s' % (name, '  '.join(
+                    '%s=%s' % (key, ('%.4g' % value) if isinstance(value, float) else value)
+                    for key, value in metrics.items())))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite against the fake platform')
+    parser.add_argument('--sizes', default='1000,10000', help='comma separated numbers of objects (1000,10000,100000)')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma separated benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of the split and fields benchmarks shorter than 1s, the best is kept')
+    parser.add_argument('--latency', type=float, default=0.0, help='latency of the fake platform (seconds)')
+    parser.add_argument('--output', help='file where the results are written as JSON')
+    args = parser.parse_args()
+    benchmarks = args.only.split(',')
+    for benchmark in benchmarks:
+        if benchmark not in BENCHMARKS:
+            parser.error('unknown benchmark ' + benchmark + ', expected one of ' + ', '.join(BENCHMARKS))
+    logging.disable(logging.ERROR)
+
+    results = run(benchmarks, [int(size) for size in args.sizes.split(',')], args.repeat, args.latency)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'revision': revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'latency': args.latency,
+                'results': results
+            }, file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
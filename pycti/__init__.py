@@ -1,31 +1,89 @@
-from pycti.api.opencti_api_client import OpenCTIApiClient
-from pycti.api.opencti_api_connector import OpenCTIApiConnector
-from pycti.api.opencti_api_job import OpenCTIApiJob
-
-from pycti.connector.opencti_connector import ConnectorType
-from pycti.connector.opencti_connector import OpenCTIConnector
-from pycti.connector.opencti_connector_helper import OpenCTIConnectorHelper
-
-from pycti.entities.opencti_marking_definition import MarkingDefinition
-from pycti.entities.opencti_external_reference import ExternalReference
-from pycti.entities.opencti_kill_chain_phase import KillChainPhase
-from pycti.entities.opencti_stix_entity import StixEntity
-from pycti.entities.opencti_stix_domain_entity import StixDomainEntity
-from pycti.entities.opencti_stix_observable import StixObservable
-from pycti.entities.opencti_stix_relation import StixRelation
-from pycti.entities.opencti_stix_observable_relation import StixObservableRelation
-from pycti.entities.opencti_identity import Identity
-from pycti.entities.opencti_threat_actor import ThreatActor
-from pycti.entities.opencti_intrusion_set import IntrusionSet
-from pycti.entities.opencti_campaign import Campaign
-from pycti.entities.opencti_incident import Incident
-from pycti.entities.opencti_malware import Malware
-from pycti.entities.opencti_tool import Tool
-from pycti.entities.opencti_vulnerability import Vulnerability
-from pycti.entities.opencti_attack_pattern import AttackPattern
-from pycti.entities.opencti_course_of_action import CourseOfAction
-from pycti.entities.opencti_report import Report
-
-from pycti.utils.opencti_stix2 import OpenCTIStix2
-from pycti.utils.constants import ObservableTypes
-from pycti.utils.constants import CustomProperties
\ No newline at end of file
+import importlib
+import sys
+import types
+
+# Public names and their modules, imported on first access so `import pycti` stays cheap
+_EXPORTS = {
+    'OpenCTIApiClient': 'pycti.api.opencti_api_client',
+    'AsyncOpenCTIApiClient': 'pycti.api.opencti_api_client_async',
+    'OpenCTIApiConnector': 'pycti.api.opencti_api_connector',
+    'OpenCTIApiJob': 'pycti.api.opencti_api_job',
+    'OpenCTIApiError': 'pycti.api.opencti_api_exceptions',
+    'OpenCTIApiConnectionError': 'pycti.api.opencti_api_exceptions',
+    'OpenCTIApiHttpError': 'pycti.api.opencti_api_exceptions',
+    'OpenCTIApiGraphQLError': 'pycti.api.opencti_api_exceptions',
+    'OpenCTIApiCircuitOpenError': 'pycti.api.opencti_api_exceptions',
+    'OpenCTIApiDuplicateError': 'pycti.api.opencti_api_exceptions',
+    'RetryPolicy': 'pycti.api.opencti_api_resilience',
+    'CircuitBreaker': 'pycti.api.opencti_api_resilience',
+    'RateLimiter': 'pycti.api.opencti_api_resilience',
+    'OpenCTIApiMetrics': 'pycti.api.opencti_api_metrics',
+    'QueryHook': 'pycti.api.opencti_api_metrics',
+    'OpenCTIApiCache': 'pycti.api.opencti_api_cache',
+    'Transport': 'pycti.api.opencti_api_transport',
+    'RequestsTransport': 'pycti.api.opencti_api_transport',
+    'RecordingTransport': 'pycti.api.opencti_api_transport',
+    'ReplayTransport': 'pycti.api.opencti_api_transport',
+    'FakeTransport': 'pycti.api.opencti_api_transport',
+
+    'ConnectorType': 'pycti.connector.opencti_connector',
+    'OpenCTIConnector': 'pycti.connector.opencti_connector',
+    'OpenCTIConnectorHelper': 'pycti.connector.opencti_connector_helper',
+
+    'MarkingDefinition': 'pycti.entities.opencti_marking_definition',
+    'ExternalReference': 'pycti.entities.opencti_external_reference',
+    'KillChainPhase': 'pycti.entities.opencti_kill_chain_phase',
+    'StixEntity': 'pycti.entities.opencti_stix_entity',
+    'StixDomainEntity': 'pycti.entities.opencti_stix_domain_entity',
+    'StixObservable': 'pycti.entities.opencti_stix_observable',
+    'StixRelation': 'pycti.entities.opencti_stix_relation',
+    'StixObservableRelation': 'pycti.entities.opencti_stix_observable_relation',
+    'Identity': 'pycti.entities.opencti_identity',
+    'ThreatActor': 'pycti.entities.opencti_threat_actor',
+    'IntrusionSet': 'pycti.entities.opencti_intrusion_set',
+    'Campaign': 'pycti.entities.opencti_campaign',
+    'Incident': 'pycti.entities.opencti_incident',
+    'Malware': 'pycti.entities.opencti_malware',
+    'Tool': 'pycti.entities.opencti_tool',
+    'Vulnerability': 'pycti.entities.opencti_vulnerability',
+    'AttackPattern': 'pycti.entities.opencti_attack_pattern',
+    'CourseOfAction': 'pycti.entities.opencti_course_of_action',
+    'Report': 'pycti.entities.opencti_report',
+
+    'OpenCTIStix2': 'pycti.utils.opencti_stix2',
+    'OpenCTIDiff': 'pycti.utils.opencti_diff',
+    'ObservableTypes': 'pycti.utils.constants',
+    'CustomProperties': 'pycti.utils.constants',
+}
+
+__all__ = list(_EXPORTS)
+
+
+class _LazyExport:
+    """
+        Attribute of the package importing its module on first access, then stored in the package
+        (explicit attributes instead of the module __getattr__ of PEP 562, which requires Python 3.7)
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(importlib.import_module(self.module), self.name)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class _LazyPackage(types.ModuleType):
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+for _name, _module in _EXPORTS.items():
+    setattr(_LazyPackage, _name, _LazyExport(_module, _name))
+del _name, _module
+
+sys.modules[__name__].__class__ = _LazyPackage
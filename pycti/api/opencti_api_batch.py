@@ -0,0 +1,118 @@
+# coding: utf-8
+
+import threading
+from concurrent.futures import Future
+
+from pycti.api.opencti_api_exceptions import OpenCTIApiError
+
+
+class OpenCTIApiBatch:
+    """
+        Operations sent together in a single array-batched POST
+        :param api: OpenCTIApiClient instance
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self.operations = []
+        self.flushed = threading.Event()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            for _, _, future in self.operations:
+                future.cancel()
+
+    def query(self, query, variables={}) -> Future:
+        """
+            Queue an operation, its result is available once the batch is flushed
+            :param query: the GraphQL document
+            :param variables: the variables of the operation
+            :return Future of the result
+        """
+        future = Future()
+        if self.flushed.is_set():
+            raise ValueError('The batch has already been sent')
+        self.operations.append((query, variables, future))
+        return future
+
+    def flush(self):
+        with self.lock:
+            if self.flushed.is_set():
+                return
+            operations = self.operations
+            try:
+                if len(operations) == 1:
+                    operations[0][2].set_result(self.api._query(operations[0][0], operations[0][1]))
+                elif len(operations) > 1:
+                    results = self.api.query_batch([(query, variables) for query, variables, _ in operations])
+                    # A server not supporting the batches answers with a single object (an error)
+                    if not isinstance(results, list) or len(results) != len(operations):
+                        raise OpenCTIApiError('Unexpected answer to a batch of ' + str(len(operations)) +
+                                              ' operations: ' + str(results)[:1000])
+                    for (_, _, future), result in zip(operations, results):
+                        try:
+                            future.set_result(self.api._process_result(result))
+                        except Exception as e:
+                            future.set_exception(e)
+            except Exception as e:
+                for _, _, future in operations:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                # No future is left pending, whatever was raised (their results would be waited forever)
+                for _, _, future in operations:
+                    if not future.done():
+                        future.set_exception(OpenCTIApiError('The batch was not sent'))
+                self.flushed.set()
+                # The mutations of a batch invalidate the cache of the client as well
+                if self.api.cache is not None:
+                    for query, variables, _ in operations:
+                        if not self.api.is_read(query):
+                            self.api.cache.invalidate_values(variables)
+
+
+class OpenCTIApiBatchWindow:
+    """
+        Transparent batching of the operations issued concurrently on a client
+
+        The first operation of a window waits up to `window` seconds for other operations,
+        the window is sent earlier as soon as it holds `max_size` operations.
+        :param api: OpenCTIApiClient instance
+        :param window: time window in seconds
+        :param max_size: maximum number of operations in a batch
+    """
+
+    def __init__(self, api, window=0.01, max_size=20):
+        self.api = api
+        self.window = window
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.pending = None
+
+    def query(self, query, variables={}):
+        with self.lock:
+            leader = self.pending is None
+            if leader:
+                self.pending = OpenCTIApiBatch(self.api)
+            batch = self.pending
+            future = batch.query(query, variables)
+            full = len(batch) >= self.max_size
+            if full:
+                self.pending = None
+        if not full and leader:
+            batch.flushed.wait(self.window)
+            with self.lock:
+                if self.pending is batch:
+                    self.pending = None
+        if full or leader:
+            batch.flush()
+        return future.result()
@@ -0,0 +1,166 @@
+# coding: utf-8
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from pycti.api.opencti_api_metrics import QueryHook
+
+
+class CacheEntry:
+    def __init__(self, value, expires, keys):
+        self.value = value
+        self.expires = expires
+        self.keys = keys
+
+
+class OpenCTIApiCache(QueryHook):
+    """
+        Read-through cache of the entities read by id or by filters, with LRU eviction and a TTL
+
+        An entity is cached under its id and its stix_id_key (and the id or the filters it was read
+        with). The mutations sent by the client invalidate the entities whose ids appear in their
+        variables. Each invalidation starts a new generation, the entities read during an older one
+        are not cached (they may have been read before the mutation was applied).
+        :param max_size: maximum number of cached entities
+        :param ttl: time to live of the cached entities (seconds)
+    """
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # LRU order of the entries, then the entries by (document, id) and by id
+        self.entries = OrderedDict()
+        self.keys = {}
+        self.index = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, name, id):
+        """
+            Get a cached entity
+            :param name: the name of the document reading the entity (the fields differ between documents)
+            :param id: the id or stix_id_key of the entity
+            :return a copy of the entity, None if it is not cached
+        """
+        with self.lock:
+            entry = self.keys.get((name, id))
+            if entry is not None and entry.expires < time.monotonic():
+                self._remove(entry)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(entry)
+            value = entry.value
+        return copy.deepcopy(value)
+
+    def put(self, name, id, value, generation):
+        """
+            Cache an entity
+            :param name: the name of the document reading the entity
+            :param id: the id (or the key of the filters) the entity has been read with
+            :param value: the entity
+            :param generation: the generation of the cache when the read was sent
+        """
+        ids = set([id, value.get('id'), value.get('stix_id_key')])
+        ids.discard(None)
+        entry = CacheEntry(copy.deepcopy(value), time.monotonic() + self.ttl, [(name, key) for key in ids])
+        with self.lock:
+            if generation != self.generation:
+                self.stale += 1
+                return
+            for key in entry.keys:
+                previous = self.keys.get(key)
+                if previous is not None:
+                    self._remove(previous)
+            for key in entry.keys:
+                self.keys[key] = entry
+                self.index.setdefault(key[1], set()).add(entry)
+            self.entries[entry] = None
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, id):
+        """
+            Remove the cached entity having this id or stix_id_key, whatever the document which read it
+            :param id: the id or stix_id_key
+        """
+        with self.lock:
+            self.generation += 1
+            self._invalidate(id)
+
+    def invalidate_values(self, value):
+        """
+            Remove the cached entities whose ids appear in a value (variables of a mutation)
+        """
+        with self.lock:
+            self.generation += 1
+            self._invalidate_values(value)
+
+    def _invalidate_values(self, value):
+        if isinstance(value, str):
+            if value in self.index:
+                self._invalidate(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                self._invalidate_values(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self._invalidate_values(item)
+
+    def _invalidate(self, id):
+        for entry in list(self.index.get(id, ())):
+            self._remove(entry)
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+            self.keys.clear()
+            self.index.clear()
+
+    def _remove(self, entry):
+        if entry not in self.entries:
+            return
+        del self.entries[entry]
+        for key in entry.keys:
+            if self.keys.get(key) is entry:
+                del self.keys[key]
+            entries = self.index.get(key[1])
+            if entries is not None:
+                entries.discard(entry)
+                if len(entries) == 0:
+                    del self.index[key[1]]
+
+    def after_query(self, event):
+        # Failed mutations may have been applied as well
+        if event.type == 'mutation':
+            self.invalidate_values(event.variables)
+
+    def stats(self):
+        """
+            Get the statistics of the cache
+            :return dict of the hits, misses, evictions, invalidations, stale reads (not cached) and size
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'stale': self.stale,
+                'size': len(self.entries)
+            }
@@ -1,45 +1,81 @@
 # coding: utf-8
 
-import io
 from typing import List
 from deprecated import deprecated
 
 import requests
+from requests.adapters import HTTPAdapter
 import urllib3
 import datetime
-import dateutil.parser
+import importlib
 import json
 import logging
-
-from pycti.api.opencti_api_connector import OpenCTIApiConnector
-from pycti.api.opencti_api_job import OpenCTIApiJob
+import re
+import threading
+import time
+
+from pycti.api.opencti_api_batch import OpenCTIApiBatch, OpenCTIApiBatchWindow
+from pycti.api.opencti_api_cache import OpenCTIApiCache
+from pycti.api.opencti_api_exceptions import OpenCTIApiConnectionError, OpenCTIApiDuplicateError, \
+    OpenCTIApiHttpError, graphql_error
+from pycti.api.opencti_api_metrics import OpenCTIApiMetrics, QueryEvent
+from pycti.api.opencti_api_multipart import MultipartBody
+from pycti.api.opencti_api_pagination import OpenCTIApiPages
+from pycti.api.opencti_api_query_registry import QueryRegistry
+from pycti.api.opencti_api_resilience import CircuitBreaker, RetryPolicy
+from pycti.api.opencti_api_single_flight import OpenCTIApiSingleFlight
+from pycti.api.opencti_api_stream import OpenCTIApiStream
+from pycti.api.opencti_api_transport import RequestsTransport
 from pycti.utils.constants import ObservableTypes
-from pycti.utils.opencti_stix2 import OpenCTIStix2
-
-from pycti.entities.opencti_marking_definition import MarkingDefinition
-from pycti.entities.opencti_external_reference import ExternalReference
-from pycti.entities.opencti_kill_chain_phase import KillChainPhase
-from pycti.entities.opencti_stix_entity import StixEntity
-from pycti.entities.opencti_stix_domain_entity import StixDomainEntity
-from pycti.entities.opencti_stix_observable import StixObservable
-from pycti.entities.opencti_stix_relation import StixRelation
-from pycti.entities.opencti_stix_observable_relation import StixObservableRelation
-from pycti.entities.opencti_identity import Identity
-from pycti.entities.opencti_threat_actor import ThreatActor
-from pycti.entities.opencti_intrusion_set import IntrusionSet
-from pycti.entities.opencti_campaign import Campaign
-from pycti.entities.opencti_incident import Incident
-from pycti.entities.opencti_malware import Malware
-from pycti.entities.opencti_tool import Tool
-from pycti.entities.opencti_vulnerability import Vulnerability
-from pycti.entities.opencti_attack_pattern import AttackPattern
-from pycti.entities.opencti_course_of_action import CourseOfAction
-from pycti.entities.opencti_report import Report
+from pycti.utils.opencti_json import default_codec
+from pycti.utils.opencti_logging import configure_logging
+
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+READ_OPERATION = re.compile(r'\s*(query\b|{)')
+
+# Fields of the nodes holding lists of edges, the ids of their nodes are listed in `<field>Ids`
+MULTIPLE_FIELDS = [
+    'markingDefinitions', 'tags', 'reports', 'killChainPhases', 'externalReferences', 'objectRefs', 'observableRefs',
+    'relationRefs', 'stixRelations'
+]
+
+# Strategies of the create() methods of the entities, see create_first
+CREATE_STRATEGIES = ['lookup_first', 'create_first', 'assume_new']
+
+
+class LazyApi:
+    """
+        Attribute of the client building its sub-API on first access, the module is only imported then
+        :param module: the name of the module of the class
+        :param name: the name of the class
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.attribute = None
+
+    def __set_name__(self, owner, attribute):
+        self.attribute = attribute
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        api = getattr(importlib.import_module(self.module), self.name)(instance)
+        # Stored on the instance, the next accesses do not go through the descriptor
+        return instance.__dict__.setdefault(self.attribute, api)
+
 
 class File:
+    """
+        File uploaded with a query
+        :param name: the name of the file
+        :param data: the content as a str, a bytes-like object (bytes, memoryview, mmap...),
+                     a seekable binary file object (read from its current position) or a path (os.PathLike)
+    """
+
     def __init__(self, name, data):
         self.name = name
         self.data = data
@@ -50,9 +86,62 @@ class OpenCTIApiClient:
         Python API for OpenCTI
         :param url: OpenCTI URL
         :param token: The API key
+        :param pool_connections: number of per-host connection pools kept by the HTTP session
+        :param pool_maxsize: maximum number of keep-alive connections kept per host
+        :param pool_block: block when no pooled connection is available instead of opening a new one
+        :param timeout: timeout of the HTTP requests (seconds, or a (connect, read) tuple)
+        :param batch_window: if set, operations issued concurrently within this window (seconds) are batched
+        :param batch_max_size: maximum number of operations sent in a batch
+        :param persisted_queries: send the hash of the documents instead of their text once the server knows them,
+                                  only for a server supporting the automatic persisted queries (Apollo)
+        :param retry_policy: RetryPolicy of the queries (None for the default policy, False to disable the retries)
+        :param circuit_breaker: CircuitBreaker of the queries (None for the default breaker, False to disable it)
+        :param read_limiter: RateLimiter of the reads (rate and requests in flight), None for no limit
+        :param write_limiter: RateLimiter of the writes, None for no limit (may be the same as the reads)
+        :param json_codec: JsonCodec of the requests and responses (None for the fastest available)
+        :param perform_health_check: check that the platform is available before returning
+        :param hooks: list of QueryHook called before and after each query
+        :param metrics: collect the metrics of the queries in `metrics` (OpenCTIApiMetrics)
+        :param cache: cache the entities read by id or by filters, True for the default OpenCTIApiCache or an
+                      OpenCTIApiCache
+        :param single_flight: send only once the identical read operations issued concurrently (a read may then
+                              join a read sent before a concurrent mutation of another thread returned)
+        :param transport: Transport of the queries (None to send them over HTTP, see RecordingTransport,
+                          ReplayTransport and FakeTransport to record, replay or fake the platform)
+        :param duplicate_errors: the platform refuses to create an existing element with a GraphQL error coded as
+                                 in DUPLICATE_CODES, required by the 'create_first' strategy of the create() methods
     """
 
-    def __init__(self, url, token, log_level='info', ssl_verify=False):
+    # Define the dependencies and the entities, built on first access
+    job = LazyApi('pycti.api.opencti_api_job', 'OpenCTIApiJob')
+    connector = LazyApi('pycti.api.opencti_api_connector', 'OpenCTIApiConnector')
+    stix2 = LazyApi('pycti.utils.opencti_stix2', 'OpenCTIStix2')
+    diff = LazyApi('pycti.utils.opencti_diff', 'OpenCTIDiff')
+    marking_definition = LazyApi('pycti.entities.opencti_marking_definition', 'MarkingDefinition')
+    external_reference = LazyApi('pycti.entities.opencti_external_reference', 'ExternalReference')
+    kill_chain_phase = LazyApi('pycti.entities.opencti_kill_chain_phase', 'KillChainPhase')
+    stix_entity = LazyApi('pycti.entities.opencti_stix_entity', 'StixEntity')
+    stix_domain_entity = LazyApi('pycti.entities.opencti_stix_domain_entity', 'StixDomainEntity')
+    stix_observable = LazyApi('pycti.entities.opencti_stix_observable', 'StixObservable')
+    stix_relation = LazyApi('pycti.entities.opencti_stix_relation', 'StixRelation')
+    stix_observable_relation = LazyApi('pycti.entities.opencti_stix_observable_relation', 'StixObservableRelation')
+    identity = LazyApi('pycti.entities.opencti_identity', 'Identity')
+    threat_actor = LazyApi('pycti.entities.opencti_threat_actor', 'ThreatActor')
+    intrusion_set = LazyApi('pycti.entities.opencti_intrusion_set', 'IntrusionSet')
+    campaign = LazyApi('pycti.entities.opencti_campaign', 'Campaign')
+    incident = LazyApi('pycti.entities.opencti_incident', 'Incident')
+    malware = LazyApi('pycti.entities.opencti_malware', 'Malware')
+    tool = LazyApi('pycti.entities.opencti_tool', 'Tool')
+    vulnerability = LazyApi('pycti.entities.opencti_vulnerability', 'Vulnerability')
+    attack_pattern = LazyApi('pycti.entities.opencti_attack_pattern', 'AttackPattern')
+    course_of_action = LazyApi('pycti.entities.opencti_course_of_action', 'CourseOfAction')
+    report = LazyApi('pycti.entities.opencti_report', 'Report')
+
+    def __init__(self, url, token, log_level='info', ssl_verify=False, pool_connections=10, pool_maxsize=10,
+                 pool_block=False, timeout=None, batch_window=None, batch_max_size=20, persisted_queries=False,
+                 retry_policy=None, circuit_breaker=None, read_limiter=None, write_limiter=None, json_codec=None,
+                 perform_health_check=True, hooks=None, metrics=False, cache=False, single_flight=False,
+                 transport=None, duplicate_errors=False):
         # Check configuration
         self.ssl_verify = ssl_verify
         if url is None or len(token) == 0:
@@ -65,43 +154,330 @@ class OpenCTIApiClient:
         numeric_level = getattr(logging, self.log_level.upper(), None)
         if not isinstance(numeric_level, int):
             raise ValueError('Invalid log level: ' + self.log_level)
-        logging.basicConfig(level=numeric_level)
+        configure_logging(numeric_level)
 
         # Define API
         self.api_url = url + '/graphql'
         self.request_headers = {'Authorization': 'Bearer ' + token}
+        self.timeout = timeout
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+
+        # Define the HTTP session, connections are pooled and kept alive between queries
+        self.session = requests.Session()
+        self.session.headers.update(self.request_headers)
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.transport = transport if transport is not None else RequestsTransport(self.session)
+
+        # Define the resilience of the queries
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        elif retry_policy is False:
+            retry_policy = RetryPolicy(max_retries=0)
+        self.retry_policy = retry_policy
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is None else circuit_breaker or None
+        self.read_limiter = read_limiter
+        self.write_limiter = write_limiter
+
+        # Define the instrumentation of the queries
+        self.hooks = list(hooks) if hooks is not None else []
+        self.metrics = OpenCTIApiMetrics() if metrics else None
+        if self.metrics is not None:
+            self.hooks.append(self.metrics)
+        self.instrumentation = threading.local()
+
+        # Define the cache of the entities, invalidated by the mutations
+        if cache is True:
+            cache = OpenCTIApiCache()
+        self.cache = cache if cache is not False else None
+        if self.cache is not None:
+            self.hooks.append(self.cache)
+
+        # Define the registry of the GraphQL documents
+        self.query_registry = QueryRegistry()
+        self.persisted_queries = persisted_queries
+
+        # Define the creation strategies relying on the duplicate errors of the platform
+        self.duplicate_errors = duplicate_errors
+
+        # Define the batching of concurrent operations
+        if batch_window is not None:
+            self.batch_window = OpenCTIApiBatchWindow(self, batch_window, batch_max_size)
+        else:
+            self.batch_window = None
 
-        # Define the dependencies
-        self.job = OpenCTIApiJob(self)
-        self.connector = OpenCTIApiConnector(self)
-        self.stix2 = OpenCTIStix2(self)
-
-        # Define the entities
-        self.marking_definition = MarkingDefinition(self)
-        self.external_reference = ExternalReference(self)
-        self.kill_chain_phase = KillChainPhase(self)
-        self.stix_entity = StixEntity(self)
-        self.stix_domain_entity = StixDomainEntity(self)
-        self.stix_observable = StixObservable(self)
-        self.stix_relation = StixRelation(self)
-        self.stix_observable_relation = StixObservableRelation(self)
-        self.identity = Identity(self)
-        self.threat_actor = ThreatActor(self)
-        self.intrusion_set = IntrusionSet(self)
-        self.campaign = Campaign(self)
-        self.incident = Incident(self)
-        self.malware = Malware(self)
-        self.tool = Tool(self)
-        self.vulnerability = Vulnerability(self)
-        self.attack_pattern = AttackPattern(self)
-        self.course_of_action = CourseOfAction(self)
-        self.report = Report(self)
+        # Define the coalescing of the identical reads in flight
+        self.single_flight = OpenCTIApiSingleFlight(self._send) if single_flight else None
 
         # Check if openCTI is available
-        if not self.health_check():
+        if perform_health_check and not self.health_check():
+            self.close()
             raise ValueError('OpenCTI API seems down')
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.transport.close()
+        self.session.close()
+
+    def batch(self):
+        """
+            Start a batch of operations sent in a single request when the batch is flushed
+
+            with api.batch() as batch:
+                first = batch.query(query, variables)
+                second = batch.query(query, variables)
+            result = first.result()
+
+            :return OpenCTIApiBatch
+        """
+        return OpenCTIApiBatch(self)
+
+    def add_hook(self, hook):
+        """
+            Call a hook before and after each query
+            :param hook: QueryHook
+        """
+        self.hooks.append(hook)
+
     def query(self, query, variables={}):
+        if len(self.hooks) == 0:
+            return self._dispatch(query, variables)
+        event = QueryEvent(query, variables)
+        for hook in self.hooks:
+            hook.before_query(event)
+        # The HTTP exchanges of this thread are recorded in the event
+        parent = getattr(self.instrumentation, 'event', None)
+        self.instrumentation.event = event
+        try:
+            result = self._dispatch(query, variables)
+        except Exception as e:
+            event.finish(e)
+            raise
+        else:
+            event.finish()
+        finally:
+            self.instrumentation.event = parent
+            for hook in self.hooks:
+                hook.after_query(event)
+        return result
+
+    def _dispatch(self, query, variables):
+        if self.single_flight is None:
+            return self._send(query, variables)
+        if self.is_read(query):
+            if self._has_files(variables):
+                return self._send(query, variables)
+            return self.single_flight.query(query, variables)
+        try:
+            return self._send(query, variables)
+        finally:
+            # Applied or not, the reads following the mutation are sent again
+            self.single_flight.mutated()
+
+    def _send(self, query, variables):
+        if self.batch_window is not None and not self._has_files(variables):
+            return self.batch_window.query(query, variables)
+        return self._query(query, variables)
+
+    def query_batch(self, operations):
+        """
+            Send several operations in a single array-batched request
+            :param operations: list of (query, variables) tuples
+            :return list of the raw results (with their data and errors), in the order of the operations
+        """
+        r = self._post(
+            all(self.is_read(query) for query, _ in operations),
+            json=[{'query': query, 'variables': variables} for query, variables in operations]
+        )
+        if r.status_code != requests.codes.ok:
+            self._process_response(r.status_code, r.content)
+        return self.json_codec.loads(r.content)
+
+    def query_stream(self, query, variables, paths):
+        """
+            Send an operation and decode its response incrementally, the hooks are called as for query()
+            (after_query once the response has been read or the iteration abandoned)
+            :param query: the GraphQL document
+            :param variables: the variables of the operation
+            :param paths: list of paths (tuples of keys) of the arrays to stream, e.g. ('data', 'reports', 'edges')
+            :return OpenCTIApiStream yielding (path, item) tuples, the request is sent when the iteration starts
+        """
+        # The QueryEvent of the call, finished once
+        call = {}
+
+        def complete(document):
+            try:
+                self._process_result(document)
+            except Exception as e:
+                self._finish_event(call.pop('event', None), e)
+                raise
+            self._finish_event(call.pop('event', None))
+
+        return OpenCTIApiStream(self._stream_chunks(query, variables, call), paths, complete)
+
+    def _stream_chunks(self, query, variables, call):
+        event = None
+        if len(self.hooks) > 0:
+            event = call['event'] = QueryEvent(query, variables)
+            for hook in self.hooks:
+                hook.before_query(event)
+        try:
+            parent = getattr(self.instrumentation, 'event', None)
+            self.instrumentation.event = event
+            try:
+                # The whole text of the document is sent, a persisted query miss could not be replayed once streamed
+                r = self._post(self.is_read(query), json={'query': query, 'variables': variables}, stream=True)
+            finally:
+                self.instrumentation.event = parent
+            try:
+                if r.status_code != requests.codes.ok:
+                    self._process_response(r.status_code, r.content)
+                for chunk in r.iter_content(chunk_size=65536):
+                    if event is not None:
+                        event.bytes_in += len(chunk)
+                    yield chunk
+            finally:
+                r.close()
+        except GeneratorExit:
+            # The iteration was abandoned
+            self._finish_event(call.pop('event', None))
+            raise
+        except Exception as e:
+            self._finish_event(call.pop('event', None), e)
+            raise
+
+    def _finish_event(self, event, error=None):
+        if event is None:
+            return
+        event.finish(error)
+        for hook in self.hooks:
+            hook.after_query(event)
+
+    def _query(self, query, variables={}):
+        multipart = self._prepare_multipart(query, variables)
+        # If yes, send a multipart query
+        if multipart is not None:
+            body = MultipartBody(*multipart)
+            try:
+                r = self._post(self.is_read(query), data=body, headers={'Content-Type': body.content_type})
+            finally:
+                body.close()
+        # If no
+        else:
+            r = self._post_json(query, variables)
+        return self._process_response(r.status_code, r.content)
+
+    def _post_json(self, query, variables):
+        if not self.persisted_queries:
+            payload = {'query': query, 'variables': variables}
+        else:
+            payload = self.query_registry.payload(query, variables)
+        r = self._post(self.is_read(query), json=payload)
+        if self.persisted_queries:
+            miss = self._persisted_query_miss(payload, r.content)
+            if miss is not None:
+                self._forget_persisted_query(payload, miss)
+                return self._post_json(query, variables)
+            if r.status_code == requests.codes.ok:
+                self.query_registry.register(payload['extensions']['persistedQuery']['sha256Hash'])
+        return r
+
+    def _post(self, is_read, **kwargs):
+        attempt = 0
+        while True:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call()
+            # Rewind the body consumed by a previous attempt
+            if hasattr(kwargs.get('data'), 'seek'):
+                kwargs['data'].seek(0)
+            event = getattr(self.instrumentation, 'event', None)
+            limiter = self.read_limiter if is_read else self.write_limiter
+            try:
+                if limiter is not None:
+                    waited = limiter.acquire()
+                    if event is not None:
+                        event.record_wait(waited)
+                try:
+                    r = self.transport.send(self.api_url, verify=self.ssl_verify, timeout=self.timeout, **kwargs)
+                finally:
+                    if limiter is not None:
+                        limiter.release()
+            except requests.exceptions.RequestException as e:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if not self.retry_policy.retry_error(self._connected(e), is_read, attempt):
+                    raise OpenCTIApiConnectionError(str(e)) from e
+                delay = self.retry_policy.delay(attempt)
+            else:
+                if self.circuit_breaker is not None:
+                    if r.status_code >= 500:
+                        self.circuit_breaker.record_failure()
+                    else:
+                        self.circuit_breaker.record_success()
+                if event is not None:
+                    body = r.request.body
+                    event.record_exchange(0 if body is None else len(body),
+                                          0 if kwargs.get('stream') else len(r.content), r.status_code)
+                if not self.retry_policy.retry_status(r.status_code, is_read, attempt):
+                    return r
+                delay = self.retry_policy.delay(attempt, r.headers.get('Retry-After'))
+            self.log('warning', 'Query failed, retrying in ' + str(round(delay, 2)) + 's (attempt ' + str(attempt + 1) + ')')
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _connected(error):
+        # Tell whether the request may have reached the platform before the error
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return False
+        reason = getattr(error.args[0], 'reason', None) if len(error.args) > 0 else None
+        return not isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+    @staticmethod
+    def is_read(query):
+        return READ_OPERATION.match(query) is not None
+
+    @staticmethod
+    def _persisted_query_miss(payload, content):
+        # Misses are small error-only responses, do not decode the others
+        if len(content) > 1024 or b'PersistedQuery' not in content:
+            return None
+        try:
+            errors = json.loads(content).get('errors') or []
+        except ValueError:
+            return None
+        for error in errors:
+            if error.get('message') == 'PersistedQueryNotSupported':
+                return error['message']
+            if error.get('message') == 'PersistedQueryNotFound' and 'query' not in payload:
+                return error['message']
+        return None
+
+    def _forget_persisted_query(self, payload, miss):
+        if miss == 'PersistedQueryNotSupported':
+            self.log('warning', 'Persisted queries are not supported by the server, sending full documents.')
+            self.persisted_queries = False
+        else:
+            self.query_registry.unregister(payload['extensions']['persistedQuery']['sha256Hash'])
+
+    @staticmethod
+    def _has_files(variables):
+        for value in variables.values():
+            if type(value) is File or (isinstance(value, list) and all(isinstance(x, File) for x in value)):
+                return True
+        return False
+
+    def _prepare_multipart(self, query, variables):
         query_var = {}
         files_vars = []
         # Implementation of spec https://github.com/jaydenseric/graphql-multipart-request-spec
@@ -117,65 +493,65 @@ class OpenCTIApiClient:
                 query_var[key] = None if is_file else [None] * len(val)
             else:
                 query_var[key] = val
-        # If yes, transform variable (file to null) and create multipart query
-        if len(files_vars) > 0:
-            multipart_data = {'operations': json.dumps({'query': query, 'variables': query_var})}
-            # Build the multipart map
-            map_index = 0
-            file_vars = {}
-            for file_var_item in files_vars:
-                is_multiple_files = file_var_item['multiple']
-                var_name = "variables." + file_var_item['key']
-                if is_multiple_files:
-                    # [(var_name + "." + i)] if is_multiple_files else
-                    for _ in file_var_item['file']:
-                        file_vars[str(map_index)] = [(var_name + "." + str(map_index))]
-                        map_index += 1
-                else:
-                    file_vars[str(map_index)] = [var_name]
+        if len(files_vars) == 0:
+            return None
+        # Transform variable (file to null) and create multipart query
+        multipart_data = {'operations': self.json_codec.dumps({'query': query, 'variables': query_var})}
+        # Build the multipart map
+        map_index = 0
+        file_vars = {}
+        for file_var_item in files_vars:
+            is_multiple_files = file_var_item['multiple']
+            var_name = "variables." + file_var_item['key']
+            if is_multiple_files:
+                # [(var_name + "." + i)] if is_multiple_files else
+                for _ in file_var_item['file']:
+                    file_vars[str(map_index)] = [(var_name + "." + str(map_index))]
                     map_index += 1
-            multipart_data['map'] = json.dumps(file_vars)
-            # Add the files
-            file_index = 0
-            multipart_files = []
-            for file_var_item in files_vars:
-                files = file_var_item['file']
-                is_multiple_files = file_var_item['multiple']
-                if is_multiple_files:
-                    for file in files:
-                        multipart_files.append((str(file_index), (file.name, io.BytesIO(file.data.encode()))))
-                        file_index += 1
-                else:
-                    multipart_files.append((str(file_index), (files.name, io.BytesIO(files.data.encode()))))
+            else:
+                file_vars[str(map_index)] = [var_name]
+                map_index += 1
+        multipart_data['map'] = self.json_codec.dumps(file_vars)
+        # Add the files
+        file_index = 0
+        multipart_files = []
+        for file_var_item in files_vars:
+            files = file_var_item['file']
+            is_multiple_files = file_var_item['multiple']
+            if is_multiple_files:
+                for file in files:
+                    multipart_files.append((str(file_index), (file.name, file)))
                     file_index += 1
-            # Send the multipart request
-            r = requests.post(
-                self.api_url,
-                data=multipart_data,
-                files=multipart_files,
-                headers=self.request_headers,
-                verify=self.ssl_verify
-            )
-        # If no
-        else:
-            r = requests.post(
-                self.api_url,
-                json={'query': query, 'variables': variables},
-                headers=self.request_headers,
-                verify=self.ssl_verify
-            )
-        # Build response
-        if r.status_code == requests.codes.ok:
-            result = r.json()
-            if 'errors' in result:
-                logging.error(result['errors'][0]['message'])
             else:
-                return result
-        else:
-            logging.info(r.text)
+                multipart_files.append((str(file_index), (files.name, files)))
+                file_index += 1
+        return multipart_data, multipart_files
+
+    def _process_response(self, status_code, content):
+        # Build response
+        if status_code == requests.codes.ok:
+            return self._process_result(self.json_codec.loads(content))
+        # GraphQL errors may come with a client error status
+        try:
+            result = self.json_codec.loads(content)
+        except ValueError:
+            result = None
+        if isinstance(result, dict) and 'errors' in result:
+            self._process_result(result)
+        raise OpenCTIApiHttpError(status_code, content.decode('utf-8', 'replace'))
+
+    def _process_result(self, result):
+        if 'errors' in result:
+            raise graphql_error(result['errors'], result.get('data'))
+        return result
 
     def fetch_opencti_file(self, fetch_uri):
-        r = requests.get(fetch_uri, headers=self.request_headers)
+        try:
+            r = self.session.get(fetch_uri, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise OpenCTIApiConnectionError(str(e)) from e
+        if r.status_code != requests.codes.ok:
+            raise OpenCTIApiHttpError(r.status_code, r.text)
         return r.text
 
     def log(self, level, message):
@@ -211,22 +587,144 @@ class OpenCTIApiClient:
         else:
             return False
 
+    def cache_generation(self):
+        """
+            Get the generation of the cache, taken before reading an entity and given to cache_put
+            :return the generation, None if the cache is disabled
+        """
+        if self.cache is None:
+            return None
+        return self.cache.generation
+
+    def cache_get(self, name, id):
+        """
+            Get an entity from the cache
+            :param name: the name of the document reading the entity
+            :param id: the id or stix_id_key of the entity (or the key of the filters it is read with)
+            :return the entity, None if the cache is disabled or does not have it
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(name, id)
+
+    def cache_put(self, name, id, value, generation):
+        """
+            Cache an entity, unless the cache has been invalidated since its read was sent
+            :param name: the name of the document reading the entity
+            :param id: the id of the entity (or the key of the filters) it was read with
+            :param value: the entity, None is not cached
+            :param generation: the generation of the cache taken before the read was sent
+            :return the entity
+        """
+        if self.cache is not None and value is not None:
+            self.cache.put(name, id, value, generation)
+        return value
+
+    def patch_fields(self, edit, id, fields):
+        """
+            Patch several fields of an element in a single request, one aliased fieldPatch per field
+            (the root fields of a mutation are executed in order), selecting only the id
+            :param edit: the edit mutation of the type of the element (for instance 'stixDomainEntityEdit')
+            :param id: the id of the element
+            :param fields: dict of the values by key, the None values are skipped
+            :return dict of the id of the element, None when there is nothing to patch
+        """
+        fields = [(key, value) for key, value in fields.items() if value is not None]
+        if len(fields) == 0:
+            return None
+        name = edit[0].upper() + edit[1:]
+        query = self.query_registry.document(name + '.patch_fields.' + str(len(fields)), lambda: (
+            'mutation ' + name + 'Fields($id: ID!' +
+            ''.join(', $input' + str(i) + ': EditInput!' for i in range(len(fields))) + ') {\n' +
+            ''.join('    patch' + str(i) + ': ' + edit + '(id: $id) { fieldPatch(input: $input' + str(i) + ') { id } }\n'
+                    for i in range(len(fields))) +
+            '}'
+        ))
+        variables = {'id': id}
+        for i, (key, value) in enumerate(fields):
+            # The values are lists of strings, the lists (aliases) are sent as such
+            variables['input' + str(i)] = {
+                'key': key,
+                'value': [str(item) for item in value] if isinstance(value, list) else str(value)
+            }
+        result = self.query(query, variables)
+        return result['data']['patch' + str(len(fields) - 1)]['fieldPatch']
+
+    def create_first(self, strategy, create_raw, kwargs):
+        """
+            Apply the creation strategy of the create() methods of the entities, before their lookup
+            :param strategy: 'lookup_first' (look the entity up, create it if it does not exist), 'create_first'
+                             (create the entity, look it up only if the platform reports a duplicate, run as
+                             'lookup_first' unless the client has been built with duplicate_errors=True) or
+                             'assume_new' (create the entity without any lookup, to load an empty platform)
+            :param create_raw: the create_raw method of the entity
+            :param kwargs: the arguments of create()
+            :return the created entity, None when the entity must be looked up
+        """
+        if strategy not in CREATE_STRATEGIES:
+            raise ValueError('Unknown strategy ' + str(strategy) + ', expecting one of ' + ', '.join(CREATE_STRATEGIES))
+        if strategy == 'lookup_first':
+            return None
+        if strategy == 'create_first' and not self.duplicate_errors:
+            # The platform would create the entity again
+            self.log('debug', 'The platform does not report duplicates, looking the entity up first.')
+            return None
+        try:
+            return create_raw(**kwargs)
+        except OpenCTIApiDuplicateError:
+            if strategy == 'assume_new':
+                raise
+            self.log('info', 'The entity already exists, looking it up.')
+            return None
+
     def process_multiple(self, data):
         result = []
         if data is None:
             return result
+        if isinstance(data, list):
+            # Already processed
+            return data
         for edge in data['edges'] if 'edges' in data and data['edges'] is not None else []:
-            row = edge['node']
-            # Handle remote relation ID
-            if 'relation' in edge:
-                row['remote_relation_id'] = edge['relation']['id']
-            result.append(self.process_multiple_fields(row))
+            result.append(self.process_edge(edge))
         return result
 
+    def process_edge(self, edge):
+        row = edge['node']
+        # Handle remote relation ID
+        if 'relation' in edge:
+            row['remote_relation_id'] = edge['relation']['id']
+        return self.process_multiple_fields(row)
+
+    def process_multiple_stream(self, query, variables, name):
+        """
+            Send a list operation and yield its processed nodes while the response is read
+            :param query: the GraphQL document
+            :param variables: the variables of the operation
+            :param name: the name of the list in the data of the response
+            :return generator of the processed nodes
+        """
+        stream = self.query_stream(query, variables, [('data', name, 'edges')])
+        return (self.process_edge(edge) for _, edge in stream)
+
+    def process_multiple_pages(self, query, variables, name, stream=False, prefetch=False):
+        """
+            Send a list operation page after page and yield the processed nodes of all the pages
+            :param query: the GraphQL document, with an `$after` variable and the pageInfo of the list
+            :param variables: the variables of the first page
+            :param name: the name of the list in the data of the response
+            :param stream: decode each page incrementally (ignored with prefetch, the next page being read whole)
+            :param prefetch: fetch the next page on a background thread while the current one is consumed
+            :return generator of the processed nodes, a single page is held in memory (two with prefetch)
+        """
+        return iter(OpenCTIApiPages(self, query, variables, name, stream, prefetch))
+
     def process_multiple_ids(self, data):
         result = []
         if data is None:
             return result
+        if isinstance(data, list):
+            # Already processed
+            return [row['id'] for row in data]
         for edge in data['edges'] if 'edges' in data and data['edges'] is not None else []:
             result.append(edge['node']['id'])
         return result
@@ -240,33 +738,11 @@ class OpenCTIApiClient:
             if 'relation' in data['createdByRef']:
                 row['remote_relation_id'] = data['createdByRef']['relation']['id']
             data['createdByRef'] = row
-        if 'markingDefinitions' in data:
-            data['markingDefinitions'] = self.process_multiple(data['markingDefinitions'])
-            data['markingDefinitionsIds'] = self.process_multiple_ids(data['markingDefinitions'])
-        if 'tags' in data:
-            data['tags'] = self.process_multiple(data['tags'])
-            data['tagsIds'] = self.process_multiple_ids(data['tags'])
-        if 'reports' in data:
-            data['reports'] = self.process_multiple(data['reports'])
-            data['reportsIds'] = self.process_multiple_ids(data['reports'])
-        if 'killChainPhases' in data:
-            data['killChainPhases'] = self.process_multiple(data['killChainPhases'])
-            data['killChainPhasesIds'] = self.process_multiple_ids(data['killChainPhases'])
-        if 'externalReferences' in data:
-            data['externalReferences'] = self.process_multiple(data['externalReferences'])
-            data['externalReferencesIds'] = self.process_multiple_ids(data['externalReferences'])
-        if 'objectRefs' in data:
-            data['objectRefs'] = self.process_multiple(data['objectRefs'])
-            data['objectRefsIds'] = self.process_multiple_ids(data['objectRefs'])
-        if 'observableRefs' in data:
-            data['observableRefs'] = self.process_multiple(data['observableRefs'])
-            data['observableRefsIds'] = self.process_multiple_ids(data['observableRefs'])
-        if 'relationRefs' in data:
-            data['relationRefs'] = self.process_multiple(data['relationRefs'])
-            data['relationRefsIds'] = self.process_multiple_ids(data['relationRefs'])
-        if 'stixRelations' in data:
-            data['stixRelations'] = self.process_multiple(data['stixRelations'])
-            data['stixRelationsIds'] = self.process_multiple_ids(data['stixRelations'])
+        for field in MULTIPLE_FIELDS:
+            if field in data:
+                # The ids are read from the edges, before they are replaced by the nodes
+                data[field + 'Ids'] = self.process_multiple_ids(data[field])
+                data[field] = self.process_multiple(data[field])
         return data
 
     @deprecated(version='2.1.0', reason="Replaced by the StixDomainEntity class in pycti")
@@ -368,6 +844,7 @@ class OpenCTIApiClient:
             last_seen=None,
             inferred=False):
         if first_seen is not None and last_seen is not None:
+            import dateutil.parser
             first_seen = dateutil.parser.parse(first_seen)
             first_seen_start = (first_seen + datetime.timedelta(days=-1)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
             first_seen_stop = (first_seen + datetime.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
@@ -400,6 +877,7 @@ class OpenCTIApiClient:
             last_seen=None
     ):
         if first_seen is not None and last_seen is not None:
+            import dateutil.parser
             first_seen = dateutil.parser.parse(first_seen)
             first_seen_start = (first_seen + datetime.timedelta(days=-1)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
             first_seen_stop = (first_seen + datetime.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
@@ -850,20 +1328,13 @@ class OpenCTIApiClient:
                                                                        name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {'name': name, 'description': description, 'goal': goal}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
-                if goal is not None:
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='goal', value=goal)
-                    object_result['goal'] = goal
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_threat_actor(
@@ -1025,26 +1496,19 @@ class OpenCTIApiClient:
                                                                        name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {
+                    'name': name,
+                    'description': description,
+                    'objective': objective,
+                    'first_seen': first_seen,
+                    'last_seen': last_seen
+                }
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
-                if objective is not None:
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='objective', value=objective)
-                object_result['objective'] = objective
-                if first_seen is not None:
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='first_seen', value=first_seen)
-                object_result['first_seen'] = first_seen
-                if last_seen is not None:
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='last_seen', value=last_seen)
-                    object_result['last_seen'] = last_seen
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_campaign(
@@ -1163,17 +1627,13 @@ class OpenCTIApiClient:
                                                                        name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {'name': name, 'description': description}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_malware(
@@ -1227,17 +1687,13 @@ class OpenCTIApiClient:
                                                                        name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {'name': name, 'description': description}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_tool(
@@ -1291,17 +1747,13 @@ class OpenCTIApiClient:
                                                                        name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {'name': name, 'description': description}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_vulnerability(
@@ -1412,17 +1864,13 @@ class OpenCTIApiClient:
                                                                        stix_id_key=stix_id_key, name=name)
         if object_result is not None:
             if update:
-                self.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {'name': name, 'description': description}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
+                        fields['alias'] = alias
+                self.diff.update(self.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_course_of_action(
@@ -0,0 +1,342 @@
+# coding: utf-8
+
+import asyncio
+import collections.abc
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from pycti.api.opencti_api_client import OpenCTIApiClient
+from pycti.api.opencti_api_exceptions import OpenCTIApiConnectionError, OpenCTIApiError, OpenCTIApiHttpError
+from pycti.api.opencti_api_transport import Transport
+
+ENTITIES = [
+    'job',
+    'connector',
+    'marking_definition',
+    'external_reference',
+    'kill_chain_phase',
+    'stix_entity',
+    'stix_domain_entity',
+    'stix_observable',
+    'stix_relation',
+    'stix_observable_relation',
+    'identity',
+    'threat_actor',
+    'intrusion_set',
+    'campaign',
+    'incident',
+    'malware',
+    'tool',
+    'vulnerability',
+    'attack_pattern',
+    'course_of_action',
+    'report'
+]
+
+# End of the iterators read by AsyncPages
+_END = object()
+
+
+class _RequestError(requests.exceptions.ConnectionError):
+    """
+        aiohttp error raised to the synchronous client as a requests error
+        :param connected: whether the request may have reached the platform
+    """
+
+    def __init__(self, message, connected):
+        super().__init__(message)
+        self.connected = connected
+
+
+class _StreamedBody:
+    """
+        Raw body of a streamed response, read from the event loop by the worker thread
+    """
+
+    def __init__(self, client, response):
+        self.client = client
+        self.response = response
+
+    def read(self, size=-1):
+        return self.client._wait(self.response.content.read(size))
+
+    def close(self):
+        self.client.loop.call_soon_threadsafe(self.response.release)
+
+
+class AsyncioTransport(Transport):
+    """
+        Transport of the synchronous client run by AsyncOpenCTIApiClient
+
+        The requests are sent by aiohttp on the event loop, the worker thread running the entity
+        method waits for their responses.
+        :param client: AsyncOpenCTIApiClient instance
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def send(self, url, **kwargs):
+        return self.client._wait(self.client._request(url, **kwargs))
+
+
+class _ThreadedApiClient(OpenCTIApiClient):
+    """
+        Synchronous client whose entity methods are run on the worker threads of AsyncOpenCTIApiClient
+    """
+
+    def __init__(self, client, url, token, *args, **kwargs):
+        self.async_client = client
+        super().__init__(url, token, *args, transport=AsyncioTransport(client), **kwargs)
+
+    @staticmethod
+    def _connected(error):
+        if isinstance(error, _RequestError):
+            return error.connected
+        return OpenCTIApiClient._connected(error)
+
+    def fetch_opencti_file(self, fetch_uri):
+        return self.async_client._wait(self.async_client.fetch_opencti_file(fetch_uri))
+
+
+class AsyncPages:
+    """
+        Asynchronous iteration over an iterator of the synchronous API (the nodes of all the pages of
+        a list with getAll=True or iter_all, a streamed list...), read on the worker threads
+
+        async for threat_actor in await client.threat_actor.iter_all():
+            ...
+
+        :param client: AsyncOpenCTIApiClient instance
+        :param iterator: the iterator returned by the entity method
+    """
+
+    def __init__(self, client, iterator):
+        self.client = client
+        self.iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.client._call(next, self.iterator, _END)
+        if item is _END:
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        if hasattr(self.iterator, 'close'):
+            await self.client._call(self.iterator.close)
+
+
+class AsyncEntity:
+    """
+        Awaitable view of an entity class of the synchronous client
+        :param client: AsyncOpenCTIApiClient instance
+        :param entity: the entity instance bound to the synchronous client
+    """
+
+    def __init__(self, client, entity):
+        self._client = client
+        self._entity = entity
+
+    def __getattr__(self, name):
+        attribute = getattr(self._entity, name)
+        if not callable(attribute):
+            return attribute
+
+        async def method(*args, **kwargs):
+            return await self._client.run(attribute, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attribute.__doc__
+        setattr(self, name, method)
+        return method
+
+
+class AsyncOpenCTIApiClient:
+    """
+        Asyncio Python API for OpenCTI
+
+        The entity methods are the ones of the synchronous client (`sync`), run on a pool of worker
+        threads: the GraphQL documents and the processing of the results are shared. Their requests
+        are sent by aiohttp on the event loop, which is never blocked by them. A client is used from
+        a single event loop.
+        :param url: OpenCTI URL
+        :param token: The API key
+        :param pool_maxsize: maximum number of simultaneous connections (0 for no limit)
+        :param pool_maxsize_per_host: maximum number of simultaneous connections per host (0 for no limit)
+        :param timeout: total timeout of the HTTP requests (seconds)
+        :param retry_policy: RetryPolicy of the queries (None for the default policy, False to disable the retries)
+        :param circuit_breaker: CircuitBreaker of the queries (None for the default breaker, False to disable it)
+        :param max_workers: number of entity methods run at once (None for pool_maxsize, or 100 without limit)
+        :param kwargs: the other options of the synchronous client (hooks, metrics, cache, batch_window...)
+    """
+
+    def __init__(self, url, token, log_level='info', ssl_verify=False, pool_maxsize=100, pool_maxsize_per_host=0,
+                 timeout=None, retry_policy=None, circuit_breaker=None, max_workers=None, **kwargs):
+        if aiohttp is None:
+            raise ImportError('AsyncOpenCTIApiClient requires aiohttp, install it with: pip install pycti[async]')
+        # The platform is checked with health_check, from the event loop
+        kwargs['perform_health_check'] = False
+        self.sync = _ThreadedApiClient(
+            self, url, token, log_level, ssl_verify, retry_policy=retry_policy, circuit_breaker=circuit_breaker,
+            **kwargs
+        )
+        self.api_url = self.sync.api_url
+        self.request_headers = self.sync.request_headers
+        self.ssl_verify = ssl_verify
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self.timeout = timeout
+        if max_workers is None:
+            max_workers = pool_maxsize if pool_maxsize > 0 else 100
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='pycti-async')
+        self.loop = None
+        self.session = None
+
+    def __getattr__(self, name):
+        # Define the entities, built on first access
+        if name not in ENTITIES:
+            raise AttributeError("'AsyncOpenCTIApiClient' object has no attribute '" + name + "'")
+        entity = AsyncEntity(self, getattr(self.sync, name))
+        setattr(self, name, entity)
+        return entity
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.executor.shutdown(wait=False)
+        self.sync.close()
+
+    def _get_session(self):
+        # The session must be created from a running event loop
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers=self.request_headers,
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_maxsize,
+                    limit_per_host=self.pool_maxsize_per_host,
+                    ssl=True if self.ssl_verify else False
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self.session
+
+    async def _call(self, function, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        if self.loop is not loop:
+            # The session of another event loop cannot be used from this one
+            self.loop = loop
+            self.session = None
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+    def _wait(self, coroutine):
+        # Called by the worker threads, the event loop would wait for itself
+        if self.loop is None or asyncio._get_running_loop() is not None:
+            coroutine.close()
+            raise OpenCTIApiError(
+                'The synchronous API cannot be used from the event loop, await the methods of AsyncOpenCTIApiClient '
+                'and iterate its results with `async for` (see iterate)'
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _request(self, url, json=None, data=None, headers=None, stream=False, **kwargs):
+        # The timeout and the verification of the certificates are the ones of the session
+        if json is not None:
+            data = self.sync.json_codec.dumps(json).encode('utf-8')
+            headers = {'Content-Type': 'application/json'}
+        elif data is not None:
+            # The multipart body is streamed from its files, with its length known in advance
+            headers = dict(headers or {}, **{'Content-Length': str(len(data))})
+            data = self._read_body(data)
+        try:
+            r = await self._get_session().post(url, data=data, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RequestError(str(e) or type(e).__name__, not isinstance(e, aiohttp.ClientConnectorError)) from e
+        response = requests.Response()
+        response.status_code = r.status
+        response.url = url
+        response.headers = requests.structures.CaseInsensitiveDict(r.headers)
+        response.request = requests.PreparedRequest()
+        response.request.body = data if isinstance(data, bytes) else None
+        if stream:
+            response.raw = _StreamedBody(self, r)
+            return response
+        try:
+            response._content = await r.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RequestError(str(e) or type(e).__name__, True) from e
+        finally:
+            r.release()
+        response._content_consumed = True
+        return response
+
+    async def _read_body(self, body):
+        loop = asyncio.get_event_loop()
+        while True:
+            # Not on the workers, they may all be waiting for their requests
+            chunk = await loop.run_in_executor(None, body.read, body.chunk_size)
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+    async def query(self, query, variables={}):
+        return await self.run(self.sync.query, query, variables)
+
+    async def run(self, method, *args, **kwargs):
+        """
+            Run a method of the synchronous API on a worker thread, its requests being sent by the event loop
+            :param method: bound method of the `sync` client or of one of its entities
+            :return the result of the method, an AsyncPages for the iterators (lists with getAll=True...)
+        """
+        result = await self._call(method, *args, **kwargs)
+        if isinstance(result, collections.abc.Iterator):
+            return AsyncPages(self, result)
+        return result
+
+    def iterate(self, iterable):
+        """
+            Iterate asynchronously an iterable of the synchronous API sending requests (the refs of
+            Report.read with stream=True...)
+            :param iterable: the iterable
+            :return AsyncPages
+        """
+        return AsyncPages(self, iter(iterable))
+
+    async def fetch_opencti_file(self, fetch_uri):
+        try:
+            async with self._get_session().get(fetch_uri) as r:
+                if r.status != 200:
+                    raise OpenCTIApiHttpError(r.status, await r.text())
+                return await r.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise OpenCTIApiConnectionError(str(e)) from e
+
+    def log(self, level, message):
+        self.sync.log(level, message)
+
+    async def health_check(self):
+        try:
+            test = await self.threat_actor.list(first=1)
+            if test is not None:
+                return True
+        except Exception as e:
+            logging.error(str(e))
+            return False
+        return False
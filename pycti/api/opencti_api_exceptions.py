@@ -0,0 +1,71 @@
+# coding: utf-8
+
+
+class OpenCTIApiError(Exception):
+    """
+        Base class of the errors raised by the OpenCTI API client
+    """
+
+
+class OpenCTIApiConnectionError(OpenCTIApiError):
+    """
+        The platform could not be reached (connection error, timeout)
+    """
+
+
+class OpenCTIApiHttpError(OpenCTIApiError):
+    """
+        The platform answered with an unexpected HTTP status
+        :param status_code: the HTTP status
+        :param body: the body of the response
+    """
+
+    def __init__(self, status_code, body):
+        super().__init__('HTTP ' + str(status_code) + ': ' + body)
+        self.status_code = status_code
+        self.body = body
+
+
+class OpenCTIApiGraphQLError(OpenCTIApiError):
+    """
+        The platform answered with GraphQL errors
+        :param errors: the list of errors of the response
+        :param data: the (partial) data of the response
+    """
+
+    def __init__(self, errors, data=None):
+        super().__init__(errors[0].get('message', 'Unknown GraphQL error') if len(errors) > 0 else 'Unknown GraphQL error')
+        self.errors = errors
+        self.data = data
+
+
+class OpenCTIApiCircuitOpenError(OpenCTIApiError):
+    """
+        The circuit breaker is open, the query has not been sent
+    """
+
+
+class OpenCTIApiDuplicateError(OpenCTIApiGraphQLError):
+    """
+        The platform refused to create an element because it already exists
+    """
+
+
+# Codes (extensions.code) of the GraphQL errors reporting an already existing element, the platform
+# must report them for OpenCTIApiClient(duplicate_errors=True)
+DUPLICATE_CODES = ['ALREADY_EXISTS', 'DUPLICATE']
+
+
+def graphql_error(errors, data=None):
+    """
+        Build the exception of the GraphQL errors of a response
+        :param errors: the list of errors of the response
+        :param data: the (partial) data of the response
+        :return OpenCTIApiDuplicateError when an error is coded as an already existing element, else
+                OpenCTIApiGraphQLError
+    """
+    for error in errors:
+        code = (error.get('extensions') or {}).get('code') or error.get('name') or ''
+        if code.upper() in DUPLICATE_CODES:
+            return OpenCTIApiDuplicateError(errors, data)
+    return OpenCTIApiGraphQLError(errors, data)
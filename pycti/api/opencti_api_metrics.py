@@ -0,0 +1,190 @@
+# coding: utf-8
+
+import json
+import re
+import threading
+import time
+
+OPERATION_NAME = re.compile(r'\s*(query|mutation|subscription)\s+(\w+)')
+
+
+class QueryEvent:
+    """
+        Instrumentation record of a call to OpenCTIApiClient.query
+        :param query: the GraphQL document
+        :param variables: the variables of the operation
+    """
+
+    def __init__(self, query, variables):
+        match = OPERATION_NAME.match(query)
+        self.type = match.group(1) if match is not None else 'query'
+        self.operation = match.group(2) if match is not None else 'anonymous'
+        self.query = query
+        self.variables = variables
+        # Files are counted in the bytes sent, not in the size of the variables
+        self.variables_size = len(json.dumps(variables, default=lambda value: None))
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.attempts = 0
+        self.status = None
+        # Time spent waiting for the rate limiters
+        self.wait = 0.0
+        self.error = None
+        self.latency = None
+        self.start = time.perf_counter()
+
+    def record_exchange(self, bytes_out, bytes_in, status):
+        self.attempts += 1
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        self.status = status
+
+    def record_wait(self, wait):
+        self.wait += wait
+
+    def finish(self, error=None):
+        self.error = error
+        self.latency = time.perf_counter() - self.start
+
+
+class QueryHook:
+    """
+        Base class of the hooks of OpenCTIApiClient.query, override the methods you need
+    """
+
+    def before_query(self, event):
+        """
+            Called before the operation is sent
+            :param event: QueryEvent of the call
+        """
+        pass
+
+    def after_query(self, event):
+        """
+            Called once the call is over, successful or not (`event.error` is then set)
+            :param event: QueryEvent of the call, with its latency, bytes and HTTP status
+        """
+        pass
+
+
+class OperationMetrics:
+    def __init__(self, buckets):
+        self.count = 0
+        self.errors = 0
+        self.attempts = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.wait_sum = 0.0
+        self.bucket_counts = [0] * len(buckets)
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.variables_size = 0
+
+
+class OpenCTIApiMetrics(QueryHook):
+    """
+        Collector aggregating the calls per operation (counts, latency histograms, bytes)
+        :param buckets: upper bounds (seconds) of the latency histogram buckets
+    """
+
+    def __init__(self, buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def after_query(self, event):
+        with self.lock:
+            metrics = self.operations.get(event.operation)
+            if metrics is None:
+                metrics = self.operations[event.operation] = OperationMetrics(self.buckets)
+            metrics.count += 1
+            metrics.attempts += event.attempts
+            if event.error is not None:
+                metrics.errors += 1
+            metrics.latency_sum += event.latency
+            metrics.latency_max = max(metrics.latency_max, event.latency)
+            metrics.wait_sum += event.wait
+            for index, bucket in enumerate(self.buckets):
+                if event.latency <= bucket:
+                    metrics.bucket_counts[index] += 1
+                    break
+            metrics.bytes_out += event.bytes_out
+            metrics.bytes_in += event.bytes_in
+            metrics.variables_size += event.variables_size
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}
+
+    def snapshot(self):
+        """
+            Get the metrics of the operations
+            :return dict of the metrics per operation name, the histogram buckets being cumulative
+        """
+        result = {}
+        with self.lock:
+            for operation, metrics in sorted(self.operations.items()):
+                cumulative = 0
+                histogram = {}
+                for bucket, count in zip(self.buckets, metrics.bucket_counts):
+                    cumulative += count
+                    histogram[str(bucket)] = cumulative
+                histogram['+Inf'] = metrics.count
+                result[operation] = {
+                    'count': metrics.count,
+                    'errors': metrics.errors,
+                    'attempts': metrics.attempts,
+                    'latency_sum': metrics.latency_sum,
+                    'latency_max': metrics.latency_max,
+                    'latency_histogram': histogram,
+                    'wait_sum': metrics.wait_sum,
+                    'bytes_out': metrics.bytes_out,
+                    'bytes_in': metrics.bytes_in,
+                    'variables_size': metrics.variables_size
+                }
+        return result
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix='pycti_query'):
+        """
+            Get the metrics in the Prometheus text exposition format
+            :param prefix: prefix of the metric names
+            :return str
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, type, help, samples):
+            lines.append('# HELP ' + prefix + name + ' ' + help)
+            lines.append('# TYPE ' + prefix + name + ' ' + type)
+            lines.extend(samples)
+
+        def label(operation):
+            return 'operation="' + operation.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+        samples = []
+        for operation, metrics in snapshot.items():
+            for bucket, count in metrics['latency_histogram'].items():
+                samples.append(prefix + '_duration_seconds_bucket{' + label(operation) + ',le="' + bucket + '"} ' +
+                               str(count))
+            samples.append(prefix + '_duration_seconds_sum{' + label(operation) + '} ' + repr(metrics['latency_sum']))
+            samples.append(prefix + '_duration_seconds_count{' + label(operation) + '} ' + str(metrics['count']))
+        family('_duration_seconds', 'histogram', 'Latency of the calls to the API.', samples)
+        family('_wait_seconds_total', 'counter', 'Time spent by the calls waiting for the rate limiters.', [
+            prefix + '_wait_seconds_total{' + label(operation) + '} ' + repr(metrics['wait_sum'])
+            for operation, metrics in snapshot.items()
+        ])
+        for name, key, help in [
+            ('_errors_total', 'errors', 'Calls to the API which raised an error.'),
+            ('_attempts_total', 'attempts', 'HTTP exchanges of the calls, retries included.'),
+            ('_sent_bytes_total', 'bytes_out', 'Bytes of the request bodies.'),
+            ('_received_bytes_total', 'bytes_in', 'Bytes of the response bodies.'),
+            ('_variables_bytes_total', 'variables_size', 'Size of the JSON variables of the calls.')
+        ]:
+            family(name, 'counter', help, [
+                prefix + name + '{' + label(operation) + '} ' + str(metrics[key])
+                for operation, metrics in snapshot.items()
+            ])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,190 @@
+# coding: utf-8
+
+import binascii
+import io
+import os
+
+CRLF = b'\r\n'
+
+
+class BufferReader(io.RawIOBase):
+    """
+        Binary file object reading a bytes-like object (bytes, memoryview, mmap...) without copying it
+        :param buffer: the bytes-like object
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.buffer = memoryview(buffer).cast('B')
+        self.position = 0
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, destination):
+        size = min(len(destination), len(self.buffer) - self.position)
+        destination[:size] = self.buffer[self.position:self.position + size]
+        self.position += size
+        return size
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.buffer) - self.position
+        chunk = self.buffer[self.position:self.position + size].tobytes()
+        self.position += len(chunk)
+        return chunk
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        # Release the buffer, an mmap can not be closed while it is exported
+        self.buffer.release()
+        super().close()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+        self.position = max(0, min(offset, len(self.buffer)))
+        return self.position
+
+
+def open_file(file):
+    """
+        Open the content of a File for reading
+        :param file: the File
+        :return (binary file object, start offset, size, whether the file object must be closed after use)
+    """
+    data = file.data
+    if isinstance(data, str):
+        reader = BufferReader(data.encode('utf-8'))
+        return reader, 0, len(reader), True
+    if isinstance(data, os.PathLike):
+        reader = open(data, 'rb')
+        return reader, 0, os.fstat(reader.fileno()).st_size, True
+    try:
+        reader = BufferReader(data)
+        return reader, 0, len(reader), True
+    except TypeError:
+        pass
+    if not hasattr(data, 'read') or not hasattr(data, 'seek'):
+        raise TypeError('File data must be a str, a bytes-like object, a seekable binary file object or a path')
+    # Upload the file object from its current position
+    start = data.tell()
+    size = data.seek(0, io.SEEK_END) - start
+    data.seek(start)
+    return data, start, size, False
+
+
+def quote_parameter(value):
+    # Same escaping as the HTML5 forms (and urllib3)
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+class MultipartBody:
+    """
+        multipart/form-data body streamed from its files
+
+        The body is read by chunks and never built in memory, its length is known in advance so the
+        request is sent with a Content-Length. It can be rewound to send it again.
+        :param fields: dict of the form fields
+        :param files: list of (field name, (file name, File)) tuples
+        :param chunk_size: size of the chunks read from the files
+    """
+
+    def __init__(self, fields, files, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self.fields = fields
+        self.boundary = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.content_type = 'multipart/form-data; boundary=' + self.boundary
+        boundary = b'--' + self.boundary.encode('ascii')
+        # Parts are bytes or (file object, start, size, owned) tuples
+        self.parts = []
+        try:
+            for name, value in fields.items():
+                self.parts.append(
+                    boundary + CRLF +
+                    b'Content-Disposition: form-data; name="' + quote_parameter(name).encode('utf-8') + b'"' + CRLF +
+                    CRLF + value.encode('utf-8') + CRLF
+                )
+            for name, (file_name, file) in files:
+                self.parts.append(
+                    boundary + CRLF +
+                    b'Content-Disposition: form-data; name="' + quote_parameter(name).encode('utf-8') +
+                    b'"; filename="' + quote_parameter(file_name).encode('utf-8') + b'"' + CRLF + CRLF
+                )
+                self.parts.append(open_file(file))
+                self.parts.append(CRLF)
+            self.parts.append(boundary + b'--' + CRLF)
+        except BaseException:
+            self.close()
+            raise
+        self.length = sum(len(part) if isinstance(part, bytes) else part[2] for part in self.parts)
+        self.seek(0)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        chunk = self.read(self.chunk_size)
+        while len(chunk) > 0:
+            yield chunk
+            chunk = self.read(self.chunk_size)
+
+    def seek(self, offset):
+        if offset != 0:
+            raise ValueError('A multipart body can only be rewound')
+        self.index = 0
+        self.remaining = None
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        chunks = []
+        while size > 0 and self.index < len(self.parts):
+            part = self.parts[self.index]
+            if isinstance(part, bytes):
+                if self.remaining is None:
+                    self.remaining = memoryview(part)
+                chunk = self.remaining[:size].tobytes()
+                self.remaining = self.remaining[len(chunk):]
+                done = len(self.remaining) == 0
+            else:
+                reader, start, part_size, _ = part
+                if self.remaining is None:
+                    reader.seek(start)
+                    self.remaining = part_size
+                chunk = reader.read(min(size, self.remaining)) if self.remaining > 0 else b''
+                if len(chunk) == 0 and self.remaining > 0:
+                    raise IOError('The file has been truncated during the upload')
+                self.remaining -= len(chunk)
+                done = self.remaining == 0
+            chunks.append(chunk)
+            size -= len(chunk)
+            if done:
+                self.index += 1
+                self.remaining = None
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def close(self):
+        for part in self.parts:
+            if not isinstance(part, bytes):
+                close_file(*part)
+
+
+def close_file(reader, start, size, owned):
+    """
+        Close a file opened with open_file, the file objects of the caller are rewound instead
+    """
+    if owned:
+        reader.close()
+    else:
+        reader.seek(start)
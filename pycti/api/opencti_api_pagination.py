@@ -0,0 +1,155 @@
+# coding: utf-8
+
+import queue
+import threading
+
+
+class OpenCTIApiPages:
+    """
+        Iteration over all the pages of a list operation, following the cursors of its pageInfo
+        :param api: OpenCTIApiClient instance
+        :param query: the GraphQL document of the list, with an `$after` variable
+        :param variables: the variables of the first page
+        :param name: the name of the list in the data of the response
+        :param stream: decode each page incrementally (ignored with prefetch, the next page being read whole)
+        :param prefetch: fetch the next page on a background thread while the current one is consumed
+    """
+
+    def __init__(self, api, query, variables, name, stream=False, prefetch=False):
+        self.api = api
+        self.query = query
+        self.variables = variables
+        self.name = name
+        self.stream = stream
+        self.prefetch = prefetch
+
+    def __iter__(self):
+        if self.prefetch:
+            pages = Prefetcher(self._pages())
+        elif self.stream:
+            return self._streamed_nodes()
+        else:
+            pages = self._pages()
+        return self._nodes(pages)
+
+    def _nodes(self, pages):
+        try:
+            for data in pages:
+                for edge in data['edges'] if data.get('edges') is not None else []:
+                    yield self.api.process_edge(edge)
+        finally:
+            pages.close()
+
+    def _pages(self):
+        variables = dict(self.variables)
+        while True:
+            result = self.api.query(self.query, variables)
+            data = result['data'][self.name]
+            if data is None:
+                return
+            cursor = self._next_cursor(data, len(data.get('edges') or []))
+            yield data
+            if cursor is None:
+                return
+            variables['after'] = cursor
+
+    def _streamed_nodes(self):
+        variables = dict(self.variables)
+        while True:
+            stream = self.api.query_stream(self.query, variables, [('data', self.name, 'edges')])
+            count = 0
+            for _, edge in stream:
+                count += 1
+                yield self.api.process_edge(edge)
+            # The streamed edges are not kept in the document
+            cursor = self._next_cursor(stream.document['data'][self.name] or {}, count)
+            if cursor is None:
+                return
+            variables['after'] = cursor
+
+    @staticmethod
+    def _next_cursor(data, count):
+        page_info = data.get('pageInfo') or {}
+        # An empty page ends the iteration even if the platform claims there is more
+        if not page_info.get('hasNextPage') or count == 0:
+            return None
+        return page_info.get('endCursor')
+
+
+class OpenCTIApiRefs:
+    """
+        Lazy list of the refs of an element, each iteration streams them from the platform
+        so they are never held all together
+        :param api: OpenCTIApiClient instance
+        :param query: the GraphQL document selecting the refs of the element
+        :param variables: the variables of the operation
+        :param path: the path of the edges of the refs in the response, e.g. ('data', 'report', 'objectRefs', 'edges')
+        :param ids: yield the ids of the refs instead of the processed nodes
+    """
+
+    def __init__(self, api, query, variables, path, ids=False):
+        self.api = api
+        self.query = query
+        self.variables = variables
+        self.path = tuple(path)
+        self.ids = ids
+
+    def __iter__(self):
+        for _, edge in self.api.query_stream(self.query, self.variables, [self.path]):
+            yield edge['node']['id'] if self.ids else self.api.process_edge(edge)
+
+
+class Prefetcher:
+    """
+        Iterator reading another one on a background thread, one item ahead of its consumer
+        :param iterator: the iterator to read
+        :param size: number of items read ahead
+    """
+
+    def __init__(self, iterator, size=1):
+        self.iterator = iterator
+        self.items = queue.Queue(size)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='pycti-prefetch', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for item in self.iterator:
+                if not self._put((True, item)):
+                    return
+        except Exception as e:
+            self._put((False, e))
+            return
+        finally:
+            self.iterator.close()
+        self._put((False, None))
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.stopped.is_set():
+            raise StopIteration
+        success, item = self.items.get()
+        if success:
+            return item
+        self.stopped.set()
+        if item is not None:
+            raise item
+        raise StopIteration
+
+    def close(self):
+        """
+            Stop reading ahead, the background thread ends after its current item
+        """
+        self.stopped.set()
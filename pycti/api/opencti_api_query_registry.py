@@ -0,0 +1,69 @@
+# coding: utf-8
+
+import hashlib
+import threading
+
+
+class QueryRegistry:
+    """
+        In-memory registry of the GraphQL documents used by a client
+
+        Documents are built once per key and hashed once, so hot calls neither concatenate
+        nor hash their document again. The registry also remembers which hashes the server
+        has registered as automatic persisted queries.
+    """
+
+    def __init__(self, max_hashes=10000):
+        self.max_hashes = max_hashes
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.hashes = {}
+        self.registered = set()
+
+    def document(self, key, builder):
+        """
+            Get the document registered under a key
+            :param key: unique key of the document (for instance 'ThreatActor.list')
+            :param builder: callable building the document if it is not registered yet
+            :return the document
+        """
+        document = self.documents.get(key)
+        if document is None:
+            document = builder()
+            with self.lock:
+                document = self.documents.setdefault(key, document)
+        return document
+
+    def hash(self, document):
+        document_hash = self.hashes.get(document)
+        if document_hash is None:
+            document_hash = hashlib.sha256(document.encode('utf-8')).hexdigest()
+            # Documents built on the fly are not bounded, do not let them grow the memory indefinitely
+            if len(self.hashes) >= self.max_hashes:
+                self.hashes.clear()
+            self.hashes[document] = document_hash
+        return document_hash
+
+    def is_registered(self, document_hash):
+        return document_hash in self.registered
+
+    def register(self, document_hash):
+        self.registered.add(document_hash)
+
+    def unregister(self, document_hash):
+        self.registered.discard(document_hash)
+
+    def payload(self, query, variables):
+        """
+            Build the JSON payload of an operation in the persisted query format
+            (the document itself is only sent until the server has registered its hash)
+            :return the payload
+        """
+        document_hash = self.hash(query)
+        payload = {
+            'variables': variables,
+            'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': document_hash}}
+        }
+        if not self.is_registered(document_hash):
+            payload['query'] = query
+        return payload
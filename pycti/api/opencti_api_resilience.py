@@ -0,0 +1,170 @@
+# coding: utf-8
+
+import random
+import threading
+import time
+
+from pycti.api.opencti_api_exceptions import OpenCTIApiCircuitOpenError
+
+
+class RetryPolicy:
+    """
+        Retry policy of the queries, with exponential backoff and jitter
+
+        Reads are retried on connection errors and on every retryable status, writes only when
+        the platform did not process them (connection not established, `write_statuses`).
+        :param max_retries: maximum number of retries of a query (0 to disable)
+        :param backoff_factor: delay before the first retry (seconds), doubled on each retry
+        :param backoff_max: maximum delay between two attempts (seconds)
+        :param jitter: randomize the delays (full jitter) to avoid synchronized retries
+        :param read_statuses: HTTP statuses on which reads are retried
+        :param write_statuses: HTTP statuses on which writes are retried
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, backoff_max=30, jitter=True,
+                 read_statuses=(429, 500, 502, 503, 504), write_statuses=(429, 502, 503)):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.read_statuses = read_statuses
+        self.write_statuses = write_statuses
+
+    def retry_status(self, status_code, is_read, attempt):
+        if attempt >= self.max_retries:
+            return False
+        return status_code in (self.read_statuses if is_read else self.write_statuses)
+
+    def retry_error(self, connected, is_read, attempt):
+        if attempt >= self.max_retries:
+            return False
+        # A write may have been processed if the connection was established
+        return is_read or not connected
+
+    def delay(self, attempt, retry_after=None):
+        """
+            Delay before the next attempt
+            :param attempt: number of the retry (0 for the first one)
+            :param retry_after: value of the Retry-After header, if any
+            :return the delay in seconds
+        """
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+
+class CircuitBreaker:
+    """
+        Circuit breaker failing fast while the platform is down
+
+        The circuit opens after `failure_threshold` consecutive failures, then lets a single
+        trial query through once `recovery_timeout` has elapsed; its success closes the circuit.
+        :param failure_threshold: number of consecutive failures opening the circuit
+        :param recovery_timeout: time (seconds) before a trial query is allowed
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=10, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+
+    def before_call(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return
+            raise OpenCTIApiCircuitOpenError('OpenCTI API seems down, circuit breaker is ' + self.state)
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+        Limit of the rate and of the concurrency of the requests sent to the platform
+
+        The rate is enforced by a token bucket, each request reserving its token (and waiting
+        for it if the bucket is empty), the concurrency by a semaphore held during the request.
+        :param rate: maximum number of requests per second, None for no limit
+        :param burst: number of requests sent at once before the rate applies (size of the bucket)
+        :param max_in_flight: maximum number of requests in flight, None for no limit
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate or 0)
+        self.max_in_flight = max_in_flight
+        self.lock = threading.Lock()
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight is not None else None
+        self.requests = 0
+        self.delayed = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self):
+        """
+            Wait for the right to send a request, `release` must be called once it is done
+            :return the time waited (seconds)
+        """
+        start = time.monotonic()
+        if self.rate is not None:
+            with self.lock:
+                self.tokens = min(self.burst, self.tokens + (start - self.updated) * self.rate)
+                self.updated = start
+                self.tokens -= 1
+                delay = -self.tokens / self.rate
+            if delay > 0:
+                time.sleep(delay)
+        if self.slots is not None:
+            self.slots.acquire()
+        waited = time.monotonic() - start
+        with self.lock:
+            self.requests += 1
+            if waited > 0.001:
+                self.delayed += 1
+            self.wait_sum += waited
+            self.wait_max = max(self.wait_max, waited)
+        return waited
+
+    def release(self):
+        if self.slots is not None:
+            self.slots.release()
+
+    def stats(self):
+        """
+            Get the statistics of the limiter
+            :return dict of the number of requests, of the delayed ones and of the time waited
+        """
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'delayed': self.delayed,
+                'wait_sum': self.wait_sum,
+                'wait_max': self.wait_max
+            }
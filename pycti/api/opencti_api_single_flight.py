@@ -0,0 +1,64 @@
+# coding: utf-8
+
+import copy
+import json
+import threading
+from concurrent.futures import Future
+
+
+class Flight:
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class OpenCTIApiSingleFlight:
+    """
+        Coalescing of the identical read operations in flight
+
+        The first caller of an operation (same document and variables) sends it, the callers
+        arriving before its response wait for it and each one gets its own copy of the result.
+        Once a mutation has returned, the reads start new flights: a read following a write never
+        gets the result of a read sent before it.
+        :param send: callable sending an operation, receiving the document and the variables
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.coalesced = 0
+        self.generation = 0
+
+    def mutated(self):
+        """
+            Record a returned mutation, the reads in flight are not joined anymore
+        """
+        with self.lock:
+            self.generation += 1
+
+    def query(self, query, variables):
+        key = (query, json.dumps(variables, sort_keys=True, default=str), self.generation)
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+        if not leader:
+            return copy.deepcopy(flight.future.result())
+        try:
+            result = self.send(query, variables)
+        except BaseException as e:
+            with self.lock:
+                del self.flights[key]
+            flight.future.set_exception(e)
+            raise
+        with self.lock:
+            del self.flights[key]
+            shared = flight.waiters > 0
+        flight.future.set_result(result)
+        # The result is processed in place by the callers, the waiters copy the original one
+        return copy.deepcopy(result) if shared else result
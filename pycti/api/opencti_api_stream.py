@@ -0,0 +1,113 @@
+# coding: utf-8
+
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+
+
+class OpenCTIApiStream:
+    """
+        Incremental decoding of a JSON response
+
+        The items of the arrays found at `paths` are decoded and yielded one at a time as
+        `(path, item)` tuples while the response is read, everything else is decoded into
+        `document` (where the streamed arrays are left empty).
+        :param chunks: iterable of the bytes of the response
+        :param paths: list of paths (tuples of keys) of the arrays to stream
+        :param on_complete: callable receiving the document once the response has been read
+    """
+
+    def __init__(self, chunks, paths, on_complete=None):
+        self.chunks = iter(chunks)
+        self.paths = set(tuple(path) for path in paths)
+        self.prefixes = set(path[:i] for path in self.paths for i in range(len(path)))
+        self.on_complete = on_complete
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.finished = False
+        self.document = None
+
+    def __iter__(self):
+        self.document = yield from self._walk(())
+        self._peek(True)
+        if self.position < len(self.buffer):
+            raise ValueError('Extra data after the JSON document at position ' + str(self.position))
+        if self.on_complete is not None:
+            self.on_complete(self.document)
+
+    def _fill(self):
+        if self.finished:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.finished = True
+            text = self.decoder.decode(b'', final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        # Drop the part of the buffer which has already been decoded
+        self.buffer = self.buffer[self.position:] + text
+        self.position = 0
+        return True
+
+    def _peek(self, allow_end=False):
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                if allow_end:
+                    return None
+                raise ValueError('Unexpected end of the JSON document')
+
+    def _expect(self, characters):
+        character = self._peek()
+        if character not in characters:
+            raise ValueError('Expecting one of ' + characters + ' at position ' + str(self.position))
+        self.position += 1
+        return character
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.finished or isinstance(value, (str, dict, list)):
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.finished:
+                    raise
+            # Read at least as much as the pending value again, to keep the decoding linear
+            needed = 2 * (len(self.buffer) - self.position)
+            while len(self.buffer) - self.position < needed and self._fill():
+                pass
+
+    def _walk(self, path):
+        character = self._peek()
+        if character == '{' and path in self.prefixes:
+            self.position += 1
+            result = {}
+            if self._peek() == '}':
+                self.position += 1
+                return result
+            while True:
+                key = self._value()
+                self._expect(':')
+                result[key] = yield from self._walk(path + (key,))
+                if self._expect(',}') == '}':
+                    return result
+        elif character == '[' and path in self.paths:
+            self.position += 1
+            if self._peek() == ']':
+                self.position += 1
+                return []
+            while True:
+                yield path, self._value()
+                if self._expect(',]') == ']':
+                    return []
+        return self._value()
@@ -0,0 +1,201 @@
+# coding: utf-8
+
+import abc
+import hashlib
+import json
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+def strip_keys(value, keys):
+    if isinstance(value, dict):
+        return {key: strip_keys(item, keys) for key, item in value.items() if key not in keys}
+    if isinstance(value, list):
+        return [strip_keys(item, keys) for item in value]
+    return value
+
+
+def operation_key(payload, ignored_variables=()):
+    """
+        Key of a JSON payload identifying its operations whatever the persisted query mode
+        (the hash of the document and the variables)
+        :param payload: the payload of an operation or the list of the payloads of a batch
+        :param ignored_variables: names of the variables (at any depth) left out of the key
+        :return str
+    """
+    if isinstance(payload, list):
+        return '[' + ','.join(operation_key(operation, ignored_variables) for operation in payload) + ']'
+    persisted = (payload.get('extensions') or {}).get('persistedQuery')
+    if persisted is not None:
+        document_hash = persisted['sha256Hash']
+    else:
+        document_hash = hashlib.sha256(payload['query'].encode('utf-8')).hexdigest()
+    variables = payload.get('variables')
+    if len(ignored_variables) > 0:
+        variables = strip_keys(variables, ignored_variables)
+    return document_hash + ':' + json.dumps(variables, sort_keys=True, default=str)
+
+
+def request_payload(kwargs):
+    """
+        JSON payload of a request sent by the client (the operations of a multipart request)
+        :param kwargs: the keyword arguments of Transport.send
+        :return the payload
+    """
+    if 'json' in kwargs:
+        return kwargs['json']
+    return json.loads(kwargs['data'].fields['operations'])
+
+
+def build_response(url, status_code, content, **kwargs):
+    """
+        Build the response of a request which did not go through the network
+        :param url: the URL of the request
+        :param status_code: the HTTP status
+        :param content: the body (bytes)
+        :param kwargs: the keyword arguments of the request
+        :return requests.Response
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/json', 'Content-Length': str(len(content))})
+    response._content = content
+    response._content_consumed = True
+    request = requests.PreparedRequest()
+    request.method = 'POST'
+    request.url = url
+    request.headers = CaseInsensitiveDict(kwargs.get('headers') or {})
+    request.body = kwargs['data'] if 'data' in kwargs else json.dumps(kwargs.get('json')).encode('utf-8')
+    response.request = request
+    return response
+
+
+class Transport(abc.ABC):
+    """
+        Transport of the requests of OpenCTIApiClient.query, implement `send` to send them elsewhere
+    """
+
+    @abc.abstractmethod
+    def send(self, url, **kwargs):
+        """
+            Send a POST request
+            :param url: the URL of the GraphQL API
+            :param kwargs: keyword arguments of requests.Session.post (json or data, headers, stream, timeout...)
+            :return requests.Response
+        """
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+        Transport sending the requests over HTTP with a requests session (the default)
+        :param session: requests.Session
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def send(self, url, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class RecordingTransport(Transport):
+    """
+        Transport recording the requests sent by another transport and their responses
+        :param transport: the transport sending the requests
+        :param path: file where the exchanges are appended (JSON lines), replayed by ReplayTransport
+    """
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def send(self, url, **kwargs):
+        response = self.transport.send(url, **kwargs)
+        record = {
+            'request': request_payload(kwargs),
+            'status': response.status_code,
+            # Reading the content keeps it available to the streaming of the client
+            'response': response.content.decode('utf-8')
+        }
+        with self.lock:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+        return response
+
+    def close(self):
+        self.transport.close()
+        with self.lock:
+            self.file.close()
+
+
+class ReplayTransport(Transport):
+    """
+        Transport answering the requests with the responses recorded by RecordingTransport
+
+        The responses of an operation are replayed in the recorded order, the last one is
+        repeated once they have all been replayed. An operation which has not been recorded
+        gets a 404 response.
+        :param path: file of the recorded exchanges
+        :param latency: time spent on each request (seconds)
+        :param ignored_variables: names of the variables whose values differ between the runs
+                                  (dates set at import time...), left out of the matching
+    """
+
+    def __init__(self, path, latency=0.0, ignored_variables=()):
+        self.latency = latency
+        self.ignored_variables = frozenset(ignored_variables)
+        self.lock = threading.Lock()
+        self.responses = {}
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if len(line.strip()) == 0:
+                    continue
+                record = json.loads(line)
+                key = operation_key(record['request'], self.ignored_variables)
+                self.responses.setdefault(key, []).append(
+                    (record['status'], record['response'].encode('utf-8')))
+
+    def send(self, url, **kwargs):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        key = operation_key(request_payload(kwargs), self.ignored_variables)
+        with self.lock:
+            responses = self.responses.get(key)
+            if responses is None:
+                return build_response(url, 404, b'No recorded response for the operation ' + key.encode('utf-8'),
+                                      **kwargs)
+            status_code, content = responses[0] if len(responses) == 1 else responses.pop(0)
+        return build_response(url, status_code, content, **kwargs)
+
+
+class FakeTransport(Transport):
+    """
+        Transport answering the requests in-process, to test or benchmark without a platform
+        :param handler: callable receiving the JSON payload of a request and returning the JSON response
+                        (or a (HTTP status, JSON response) tuple)
+        :param latency: time spent on each request (seconds)
+    """
+
+    def __init__(self, handler, latency=0.0):
+        self.handler = handler
+        self.latency = latency
+
+    def send(self, url, **kwargs):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        answer = self.handler(request_payload(kwargs))
+        status_code, answer = answer if isinstance(answer, tuple) else (200, answer)
+        return build_response(url, status_code, json.dumps(answer).encode('utf-8'), **kwargs)
@@ -12,6 +12,7 @@ from typing import Callable, Dict, List
 from pika.exceptions import UnroutableError, NackError
 from pycti.api.opencti_api_client import OpenCTIApiClient
 from pycti.connector.opencti_connector import OpenCTIConnector
+from pycti.utils.opencti_logging import configure_logging
 
 
 class ListenQueue(threading.Thread):
@@ -26,7 +27,7 @@ class ListenQueue(threading.Thread):
 
     # noinspection PyUnusedLocal
     def _process_message(self, channel, method, properties, body):
-        json_data = json.loads(body)
+        json_data = self.helper.json_codec.loads(body)
         thread = threading.Thread(target=self._data_handler, args=[json_data])
         thread.start()
         while thread.is_alive():  # Loop while the thread is processing
@@ -119,11 +120,14 @@ class OpenCTIConnectorHelper:
         numeric_level = getattr(logging, self.log_level.upper(), None)
         if not isinstance(numeric_level, int):
             raise ValueError('Invalid log level: ' + self.log_level)
-        logging.basicConfig(level=numeric_level)
+        configure_logging(numeric_level)
 
         # Initialize configuration
         self.api = OpenCTIApiClient(self.opencti_url, self.opencti_token, self.log_level)
-        self.current_work_id = None
+        self.json_codec = self.api.json_codec
+        # The state of a message (work) or of a bundle split is local to the thread processing it
+        self.context = threading.local()
+        self.last_work_id = None
 
         # Register the connector in OpenCTI
         self.connector = OpenCTIConnector(self.connect_id, self.connect_name, self.connect_type, self.connect_scope)
@@ -136,9 +140,46 @@ class OpenCTIConnectorHelper:
         self.ping = PingAlive(self.connector.id, self.api, self.get_state, self.set_state)
         self.ping.start()
 
-        # Initialize caching
-        self.cache_index = {}
-        self.cache_added = []
+    @property
+    def current_work_id(self):
+        """
+            Work of the message processed by the current thread, the threads started by the message
+            callback get the work of the last message
+        """
+        return getattr(self.context, 'work_id', self.last_work_id)
+
+    @current_work_id.setter
+    def current_work_id(self, work_id):
+        self.context.work_id = work_id
+        self.last_work_id = work_id
+
+    @property
+    def cache_index(self):
+        """
+            Objects of the bundle split by the current thread, by id
+        """
+        cache_index = getattr(self.context, 'cache_index', None)
+        if cache_index is None:
+            cache_index = self.context.cache_index = {}
+        return cache_index
+
+    @cache_index.setter
+    def cache_index(self, cache_index):
+        self.context.cache_index = cache_index
+
+    @property
+    def cache_added(self):
+        """
+            Ids of the objects already added to a bundle by the split of the current thread
+        """
+        cache_added = getattr(self.context, 'cache_added', None)
+        if cache_added is None:
+            cache_added = self.context.cache_added = []
+        return cache_added
+
+    @cache_added.setter
+    def cache_added(self, cache_added):
+        self.context.cache_added = cache_added
 
     def set_state(self, state) -> None:
         self.connector_state = json.dumps(state)
@@ -211,7 +252,7 @@ class OpenCTIConnectorHelper:
         # Send the message
         try:
             routing_key = 'push_routing_' + self.connector_id
-            channel.basic_publish(self.config['push_exchange'], routing_key, json.dumps(message))
+            channel.basic_publish(self.config['push_exchange'], routing_key, self.json_codec.dumps(message))
             logging.info('Bundle has been sent')
         except (UnroutableError, NackError) as e:
             logging.error('Unable to send bundle, retry...', e)
@@ -221,7 +262,7 @@ class OpenCTIConnectorHelper:
         self.cache_index = {}
         self.cache_added = []
         try:
-            bundle_data = json.loads(bundle)
+            bundle_data = self.json_codec.loads(bundle)
         except:
             raise Exception('File data is not a valid JSON')
 
@@ -2,6 +2,7 @@
 
 import json
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection
 
 
 class AttackPattern:
@@ -96,6 +97,10 @@ class AttackPattern:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Attack-Pattern objects
     """
 
@@ -106,13 +111,18 @@ class AttackPattern:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Attack-Patterns with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('AttackPattern.list' + properties.key, lambda: """
             query AttackPatterns($filters: [AttackPatternsFiltering], $search: String, $first: Int, $after: ID, $orderBy: AttackPatternsOrdering, $orderMode: OrderingMode) {
                 attackPatterns(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -124,34 +134,76 @@ class AttackPattern:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'attackPatterns', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['attackPatterns'])
 
+    """
+        Iterate over all the Attack-Pattern objects, following the pagination
+
+        :param: same as list
+        :return generator of Attack-Pattern objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Attack-Pattern objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Attack-Pattern objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Attack-Patterns with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('AttackPattern.count', lambda: """
+            query AttackPatternsCount($filters: [AttackPatternsFiltering], $search: String) {
+                attackPatterns(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['attackPatterns']['pageInfo']['globalCount']
+
     """
         Read a Attack-Pattern object
         
         :param id: the id of the Attack-Pattern
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Attack-Pattern object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Attack-Pattern {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('AttackPattern.read' + properties.key, lambda: """
                 query AttackPattern($id: String!) {
                     attackPattern(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['attackPattern'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
@@ -212,6 +264,8 @@ class AttackPattern:
         Create a Attack-Pattern object only if it not exists, update it on request
 
         :param name: the name of the Attack-Pattern
+        :param update: update the existing object with the given values
+        :param strategy: 'lookup_first' (default), 'create_first' or 'assume_new', see OpenCTIApiClient.create_first
         :return Attack-Pattern object
     """
 
@@ -227,30 +281,28 @@ class AttackPattern:
         created = kwargs.get('created', None)
         modified = kwargs.get('modified', None)
         update = kwargs.get('update', False)
+        strategy = kwargs.get('strategy', 'lookup_first')
+
+        object_result = self.opencti.create_first(strategy, self.create_raw, kwargs)
+        if object_result is not None:
+            return object_result
 
         object_result = self.opencti.stix_domain_entity.get_by_stix_id_or_name(types=['Attack-Pattern'], stix_id_key=stix_id_key, name=name)
         if object_result is not None:
             if update:
-                self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='description', value=description)
-                object_result['description'] = description
+                fields = {
+                    'name': name,
+                    'description': description,
+                    'platform': platform,
+                    'required_permission': required_permission,
+                    'external_id': external_id
+                }
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
-                if platform is not None:
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='platform', value=platform)
-                    object_result['platform'] = platform
-                if required_permission is not None:
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='required_permission', value=required_permission)
-                    object_result['required_permission'] = required_permission
-                if external_id is not None:
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='external_id', value=external_id)
-                    object_result['external_id'] = external_id
+                        fields['alias'] = alias
+                self.opencti.diff.update(self.opencti.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_raw(
@@ -2,6 +2,7 @@
 
 import json
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection
 
 
 class CourseOfAction:
@@ -77,6 +78,10 @@ class CourseOfAction:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Course-Of-Action objects
     """
 
@@ -87,13 +92,18 @@ class CourseOfAction:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Course-Of-Actions with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('CourseOfAction.list' + properties.key, lambda: """
             query CourseOfActions($filters: [CourseOfActionsFiltering], $search: String, $first: Int, $after: ID, $orderBy: CoursesOfActionOrdering, $orderMode: OrderingMode) {
                 courseOfActions(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -105,34 +115,76 @@ class CourseOfAction:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'courseOfActions', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['courseOfActions'])
 
+    """
+        Iterate over all the Course-Of-Action objects, following the pagination
+
+        :param: same as list
+        :return generator of Course-Of-Action objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Course-Of-Action objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Course-Of-Action objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Course-Of-Actions with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('CourseOfAction.count', lambda: """
+            query CourseOfActionsCount($filters: [CourseOfActionsFiltering], $search: String) {
+                courseOfActions(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['courseOfActions']['pageInfo']['globalCount']
+
     """
         Read a Course-Of-Action object
         
         :param id: the id of the Course-Of-Action
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Course-Of-Action object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Course-Of-Action {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('CourseOfAction.read' + properties.key, lambda: """
                 query CourseOfAction($id: String!) {
                     courseOfAction(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['courseOfAction'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
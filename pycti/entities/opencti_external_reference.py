@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import json
+from pycti.utils.opencti_projection import Projection
 
 
 class ExternalReference:
@@ -27,6 +28,10 @@ class ExternalReference:
         :param filters: the filters to apply
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of External-Reference objects
     """
 
@@ -36,13 +41,18 @@ class ExternalReference:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing External-Reference with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('ExternalReference.list' + properties.key, lambda: """
             query ExternalReferences($filters: [ExternalReferencesFiltering], $first: Int, $after: ID, $orderBy: ExternalReferencesOrdering, $orderMode: OrderingMode) {
                 externalReferences(filters: $filters, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -54,34 +64,74 @@ class ExternalReference:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'externalReferences', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['externalReferences'])
 
+    """
+        Iterate over all the External-Reference objects, following the pagination
+
+        :param: same as list
+        :return generator of External-Reference objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count External-Reference objects
+
+        :param filters: the filters to apply
+        :return number of External-Reference objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        self.opencti.log('info', 'Counting External-Reference with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('ExternalReference.count', lambda: """
+            query ExternalReferencesCount($filters: [ExternalReferencesFiltering]) {
+                externalReferences(filters: $filters, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters})
+        return result['data']['externalReferences']['pageInfo']['globalCount']
+
     """
         Read a External-Reference object
 
         :param id: the id of the External-Reference
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return External-Reference object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading External-Reference {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('ExternalReference.read' + properties.key, lambda: """
                 query ExternalReference($id: String!) {
                     externalReference(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['externalReference'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
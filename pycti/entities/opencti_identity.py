@@ -2,6 +2,7 @@
 
 import json
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection
 
 
 class Identity:
@@ -76,6 +77,10 @@ class Identity:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Identity objects
     """
 
@@ -86,13 +91,18 @@ class Identity:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Identities with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('Identity.list' + properties.key, lambda: """
             query Identities($filters: [IdentitiesFiltering], $search: String, $first: Int, $after: ID, $orderBy: IdentitiesOrdering, $orderMode: OrderingMode) {
                 identities(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -104,35 +114,77 @@ class Identity:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'search': search, 'first': first, 'after': after,
-                                            'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'search': search, 'first': first, 'after': after,
+                     'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'identities', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['identities'])
 
+    """
+        Iterate over all the Identity objects, following the pagination
+
+        :param: same as list
+        :return generator of Identity objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Identity objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Identity objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Identities with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('Identity.count', lambda: """
+            query IdentitiesCount($filters: [IdentitiesFiltering], $search: String) {
+                identities(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['identities']['pageInfo']['globalCount']
+
     """
         Read a Identity object
         
         :param id: the id of the Identity
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Identity object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Identity {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('Identity.read' + properties.key, lambda: """
                 query Identity($id: String!) {
                     identity(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['identity'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
@@ -160,13 +212,13 @@ class Identity:
 
         if name is not None and description is not None:
             self.opencti.log('info', 'Creating Identity {' + name + '}.')
-            query = """
+            query = self.opencti.query_registry.document('Identity.create_raw', lambda: """
                 mutation IdentityAdd($input: IdentityAddInput) {
                     identityAdd(input: $input) {
                          """ + self.properties + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'input': {
                     'name': name,
@@ -187,6 +239,8 @@ class Identity:
         Create a  Identity object only if it not exists, update it on request
 
         :param name: the name of the Identity
+        :param update: update the existing object with the given values
+        :param strategy: 'lookup_first' (default), 'create_first' or 'assume_new', see OpenCTIApiClient.create_first
         :return Identity object
     """
 
@@ -200,6 +254,11 @@ class Identity:
         created = kwargs.get('created', None)
         modified = kwargs.get('modified', None)
         update = kwargs.get('update', False)
+        strategy = kwargs.get('strategy', 'lookup_first')
+
+        object_result = self.opencti.create_first(strategy, self.create_raw, kwargs)
+        if object_result is not None:
+            return object_result
 
         object_result = self.opencti.stix_domain_entity.get_by_stix_id_or_name(
             types=[type],
@@ -208,21 +267,13 @@ class Identity:
         )
         if object_result is not None:
             if update:
-                self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.opencti.stix_domain_entity.update_field(
-                    id=object_result['id'],
-                    key='description',
-                    value=description
-                )
-                object_result['description'] = description
+                fields = {'name': name, 'description': description}
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
+                        fields['alias'] = alias
+                self.opencti.diff.update(self.opencti.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_raw(
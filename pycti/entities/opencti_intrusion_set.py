@@ -3,6 +3,7 @@
 import json
 
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection
 
 
 class IntrusionSet:
@@ -85,6 +86,10 @@ class IntrusionSet:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Intrusion-Set objects
     """
 
@@ -95,13 +100,18 @@ class IntrusionSet:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Intrusion-Sets with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('IntrusionSet.list' + properties.key, lambda: """
             query IntrusionSets($filters: [IntrusionSetsFiltering], $search: String, $first: Int, $after: ID, $orderBy: IntrusionSetsOrdering, $orderMode: OrderingMode) {
                 intrusionSets(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -113,41 +123,83 @@ class IntrusionSet:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {
+        """)
+        variables = {
             'filters': filters,
             'search': search,
             'first': first,
             'after': after,
             'orderBy': order_by,
             'orderMode': order_mode
-        })
+        }
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'intrusionSets', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['intrusionSets'])
 
+    """
+        Iterate over all the Intrusion-Set objects, following the pagination
+
+        :param: same as list
+        :return generator of Intrusion-Set objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Intrusion-Set objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Intrusion-Set objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Intrusion-Sets with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('IntrusionSet.count', lambda: """
+            query IntrusionSetsCount($filters: [IntrusionSetsFiltering], $search: String) {
+                intrusionSets(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['intrusionSets']['pageInfo']['globalCount']
+
     """
         Read a Intrusion-Set object
         
         :param id: the id of the Intrusion-Set
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Intrusion-Set object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Intrusion-Set {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('IntrusionSet.read' + properties.key, lambda: """
                 query IntrusionSet($id: String!) {
                     intrusionSet(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['intrusionSet'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
@@ -181,13 +233,13 @@ class IntrusionSet:
 
         if name is not None and description is not None:
             self.opencti.log('info', 'Creating Intrusion-Set {' + name + '}.')
-            query = """
+            query = self.opencti.query_registry.document('IntrusionSet.create_raw', lambda: """
                 mutation IntrusionSetAdd($input: IntrusionSetAddInput) {
                     intrusionSetAdd(input: $input) {
                         """ + self.properties + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'input': {
                     'name': name,
@@ -214,6 +266,8 @@ class IntrusionSet:
         Create a Intrusion-Set object only if it not exists, update it on request
 
         :param name: the name of the Intrusion Set
+        :param update: update the existing object with the given values
+        :param strategy: 'lookup_first' (default), 'create_first' or 'assume_new', see OpenCTIApiClient.create_first
         :return Intrusion-Set object
     """
 
@@ -233,6 +287,11 @@ class IntrusionSet:
         created = kwargs.get('created', None)
         modified = kwargs.get('modified', None)
         update = kwargs.get('update', False)
+        strategy = kwargs.get('strategy', 'lookup_first')
+
+        object_result = self.opencti.create_first(strategy, self.create_raw, kwargs)
+        if object_result is not None:
+            return object_result
 
         object_result = self.opencti.stix_domain_entity.get_by_stix_id_or_name(
             types=['Intrusion-Set'],
@@ -241,42 +300,19 @@ class IntrusionSet:
         )
         if object_result is not None:
             if update:
-                self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.opencti.stix_domain_entity.update_field(
-                    id=object_result['id'],
-                    key='description',
-                    value=description
-                )
-                object_result['description'] = description
+                fields = {
+                    'name': name,
+                    'description': description,
+                    'first_seen': first_seen,
+                    'last_seen': last_seen,
+                    'goal': goal
+                }
                 if alias is not None:
                     if 'alias' in object_result:
-                        new_aliases = object_result['alias'] + list(set(alias) - set(object_result['alias']))
+                        fields['alias'] = object_result['alias'] + list(set(alias) - set(object_result['alias']))
                     else:
-                        new_aliases = alias
-                    self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='alias', value=new_aliases)
-                    object_result['alias'] = new_aliases
-                if first_seen is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='first_seen',
-                        value=first_seen
-                    )
-                    object_result['first_seen'] = first_seen
-                if last_seen is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='last_seen',
-                        value=last_seen
-                    )
-                    object_result['last_seen'] = last_seen
-                if goal is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='goal',
-                        value=goal
-                    )
-                    object_result['goal'] = goal
+                        fields['alias'] = alias
+                self.opencti.diff.update(self.opencti.stix_domain_entity, object_result, fields)
             return object_result
         else:
             return self.create_raw(
@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import json
+from pycti.utils.opencti_projection import Projection
 
 
 class MarkingDefinition:
@@ -26,6 +27,10 @@ class MarkingDefinition:
         :param filters: the filters to apply
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Marking-Definition objects
     """
 
@@ -35,13 +40,18 @@ class MarkingDefinition:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Marking-Definitions with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('MarkingDefinition.list' + properties.key, lambda: """
             query MarkingDefinitions($filters: [MarkingDefinitionsFiltering], $first: Int, $after: ID, $orderBy: MarkingDefinitionsOrdering, $orderMode: OrderingMode) {
                 markingDefinitions(filters: $filters, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -53,36 +63,90 @@ class MarkingDefinition:
                     }                    
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'first': first, 'after': after, 'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'markingDefinitions', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['markingDefinitions'])
 
+    """
+        Iterate over all the Marking-Definition objects, following the pagination
+
+        :param: same as list
+        :return generator of Marking-Definition objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Marking-Definition objects
+
+        :param filters: the filters to apply
+        :return number of Marking-Definition objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        self.opencti.log('info', 'Counting Marking-Definitions with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('MarkingDefinition.count', lambda: """
+            query MarkingDefinitionsCount($filters: [MarkingDefinitionsFiltering]) {
+                markingDefinitions(filters: $filters, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters})
+        return result['data']['markingDefinitions']['pageInfo']['globalCount']
+
     """
         Read a Marking-Definition object
 
         :param id: the id of the Marking-Definition
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Marking-Definition object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Marking-Definition {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            document = 'MarkingDefinition.read' + properties.key
+            generation = self.opencti.cache_generation()
+            cached = self.opencti.cache_get(document, id)
+            if cached is not None:
+                return cached
+            query = self.opencti.query_registry.document(document, lambda: """
                 query MarkingDefinition($id: String!) {
                     markingDefinition(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {'id': id})
-            return self.opencti.process_multiple_fields(result['data']['markingDefinition'])
+            return self.opencti.cache_put(
+                document, id, self.opencti.process_multiple_fields(result['data']['markingDefinition']), generation
+            )
         elif filters is not None:
-            result = self.list(filters=filters)
+            # The first Marking-Definition matching the filters, cached by filters
+            document = 'MarkingDefinition.read.filters' + Projection(self.properties, projection, custom_attributes).key
+            key = json.dumps(filters, sort_keys=True)
+            generation = self.opencti.cache_generation()
+            cached = self.opencti.cache_get(document, key)
+            if cached is not None:
+                return cached
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
-                return result[0]
+                return self.opencti.cache_put(document, key, result[0], generation)
             else:
                 return None
         else:
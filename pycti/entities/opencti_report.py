@@ -3,7 +3,12 @@
 import json
 
 from dateutil.parser import parse
+from pycti.api.opencti_api_pagination import OpenCTIApiRefs
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection, parse_selection
+
+# Lists of refs of the reports, read lazily with stream=True
+REFS = ['objectRefs', 'observableRefs', 'relationRefs']
 
 
 class Report:
@@ -136,6 +141,10 @@ class Report:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Report objects
     """
 
@@ -146,13 +155,18 @@ class Report:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Reports with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('Report.list' + properties.key, lambda: """
             query Reports($filters: [ReportsFiltering], $search: String, $first: Int, $after: ID, $orderBy: ReportsOrdering, $orderMode: OrderingMode) {
                 reports(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -164,40 +178,116 @@ class Report:
                     }                    
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'search': search, 'first': first, 'after': after,
-                                            'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'search': search, 'first': first, 'after': after,
+                     'orderBy': order_by, 'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'reports', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['reports'])
 
+    """
+        Iterate over all the Report objects, following the pagination
+
+        :param: same as list
+        :return generator of Report objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Report objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Report objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Reports with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('Report.count', lambda: """
+            query ReportsCount($filters: [ReportsFiltering], $search: String) {
+                reports(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['reports']['pageInfo']['globalCount']
+
     """
         Read a Report object
 
         :param id: the id of the Report
         :param filters: the filters to apply if no id provided
+        :param stream: read the refs lazily, objectRefs, observableRefs and relationRefs (and their Ids) are
+                       iterables streaming the refs from the platform, one at a time, on each iteration
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Report object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        stream = kwargs.get('stream', False)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Report {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            if stream:
+                return self._read_stream(id, properties)
+            query = self.opencti.query_registry.document('Report.read' + properties.key, lambda: """
                 query Report($id: String!) {
                     report(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['report'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
                 return None
 
+    def _read_stream(self, id, properties):
+        fields = parse_selection(properties.selection)
+        # The report without its refs, each list of refs has its own operation
+        query = self.opencti.query_registry.document('Report.read.stream' + properties.key, lambda: """
+            query Report($id: String!) {
+                report(id: $id) {
+                    """ + ('\n'.join(text for field, text in fields if field not in REFS) or 'id') + """
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'id': id})
+        report = self.opencti.process_multiple_fields(result['data']['report'])
+        if report is None:
+            return None
+        for field, text in fields:
+            if field not in REFS:
+                continue
+            refs_query = self.opencti.query_registry.document('Report.read.' + field + properties.key, lambda: """
+                query Report($id: String!) {
+                    report(id: $id) {
+                        """ + text + """
+                    }
+                }
+            """)
+            path = ('data', 'report', field, 'edges')
+            report[field] = OpenCTIApiRefs(self.opencti, refs_query, {'id': id}, path)
+            report[field + 'Ids'] = OpenCTIApiRefs(self.opencti, refs_query, {'id': id}, path, ids=True)
+        return report
+
     """
         Read a Report object by stix_id or name
 
@@ -244,13 +334,13 @@ class Report:
 
         if name is not None and description is not None and published is not None:
             self.opencti.log('info', 'Creating Report {' + name + '}.')
-            query = """
+            query = self.opencti.query_registry.document('Report.create_raw', lambda: """
                 mutation ReportAdd($input: ReportAddInput) {
                     reportAdd(input: $input) {
                         """ + self.properties + """
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'input': {
                     'name': name,
@@ -274,6 +364,8 @@ class Report:
          Create a Report object only if it not exists, update it on request
 
          :param name: the name of the Report
+         :param update: update the existing object with the given values
+         :param strategy: 'lookup_first' (default), 'create_first' or 'assume_new', see OpenCTIApiClient.create_first
          :return Report object
      """
 
@@ -291,6 +383,16 @@ class Report:
         created = kwargs.get('created', None)
         modified = kwargs.get('modified', None)
         update = kwargs.get('update', False)
+        strategy = kwargs.get('strategy', 'lookup_first')
+
+        report = self.opencti.create_first(strategy, self.create_raw, kwargs)
+        if report is not None:
+            if external_reference_id is not None:
+                self.opencti.stix_entity.add_external_reference(
+                    id=report['id'],
+                    external_reference_id=external_reference_id
+                )
+            return report
 
         object_result = self.get_by_stix_id_or_name(stix_id_key=stix_id_key, name=name, published=published)
         if object_result is None and external_reference_id is not None:
@@ -300,42 +402,15 @@ class Report:
             )
         if object_result is not None:
             if update:
-                self.opencti.stix_domain_entity.update_field(id=object_result['id'], key='name', value=name)
-                object_result['name'] = name
-                self.opencti.stix_domain_entity.update_field(
-                    id=object_result['id'],
-                    key='description',
-                    value=description
-                )
-                object_result['description'] = description
-                if report_class is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='report_class',
-                        value=report_class
-                    )
-                    object_result['report_class'] = report_class
-                if object_status is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='object_status',
-                        value=object_status
-                    )
-                    object_result['object_status'] = object_status
-                if source_confidence_level is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='source_confidence_level',
-                        value=source_confidence_level
-                    )
-                    object_result['source_confidence_level'] = source_confidence_level
-                if graph_data is not None:
-                    self.opencti.stix_domain_entity.update_field(
-                        id=object_result['id'],
-                        key='graph_data',
-                        value=graph_data
-                    )
-                    object_result['graph_data'] = graph_data
+                fields = {
+                    'name': name,
+                    'description': description,
+                    'report_class': report_class,
+                    'object_status': object_status,
+                    'source_confidence_level': source_confidence_level,
+                    'graph_data': graph_data
+                }
+                self.opencti.diff.update(self.opencti.stix_domain_entity, object_result, fields)
                 if external_reference_id is not None:
                     self.opencti.stix_entity.add_external_reference(
                         id=object_result['id'],
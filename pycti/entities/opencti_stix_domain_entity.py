@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import json
+from pycti.utils.opencti_projection import Projection
 
 
 class StixDomainEntity:
@@ -74,6 +75,10 @@ class StixDomainEntity:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of Stix-Domain-Entity objects
     """
 
@@ -85,13 +90,18 @@ class StixDomainEntity:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing Stix-Domain-Entities with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('StixDomainEntity.list' + properties.key, lambda: """
             query StixDomainEntities($types: [String], $filters: [StixDomainEntitiesFiltering], $search: String, $first: Int, $after: ID, $orderBy: StixDomainEntitiesOrdering, $orderMode: OrderingMode) {
                 stixDomainEntities(types: $types, filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -103,17 +113,58 @@ class StixDomainEntity:
                     }
                 }
             }
-        """
-        result = self.opencti.query(query, {'types': types, 'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by,
-                                            'orderMode': order_mode})
+        """)
+        variables = {'types': types, 'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by,
+                     'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'stixDomainEntities', prefetch=prefetch)
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['stixDomainEntities'])
 
+    """
+        Iterate over all the Stix-Domain-Entity objects, following the pagination
+
+        :param: same as list
+        :return generator of Stix-Domain-Entity objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count Stix-Domain-Entity objects
+
+        :param types: the array of types
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of Stix-Domain-Entity objects
+    """
+
+    def count(self, **kwargs):
+        types = kwargs.get('types', None)
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting Stix-Domain-Entities with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('StixDomainEntity.count', lambda: """
+            query StixDomainEntitiesCount($types: [String], $filters: [StixDomainEntitiesFiltering], $search: String) {
+                stixDomainEntities(types: $types, filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'types': types, 'filters': filters, 'search': search})
+        return result['data']['stixDomainEntities']['pageInfo']['globalCount']
+
     """
         Read a Stix-Domain-Entity object
         
         :param id: the id of the Stix-Domain-Entity
         :param types: the array of types
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Stix-Domain-Entity object
     """
 
@@ -121,21 +172,38 @@ class StixDomainEntity:
         id = kwargs.get('id', None)
         types = kwargs.get('types', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Stix-Domain-Entity {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            document = 'StixDomainEntity.read' + properties.key
+            generation = self.opencti.cache_generation()
+            cached = self.opencti.cache_get(document, id)
+            if cached is not None:
+                return cached
+            query = self.opencti.query_registry.document(document, lambda: """
                 query StixDomainEntity($id: String!) {
                     stixDomainEntity(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
-            return self.opencti.process_multiple_fields(result['data']['stixDomainEntity'])
+            return self.opencti.cache_put(
+                document, id, self.opencti.process_multiple_fields(result['data']['stixDomainEntity']), generation
+            )
         elif filters is not None:
-            result = self.list(types=types, filters=filters)
+            # The first entity matching the filters, cached by filters
+            document = 'StixDomainEntity.read.filters' + Projection(self.properties, projection, custom_attributes).key
+            key = json.dumps([types, filters], sort_keys=True)
+            generation = self.opencti.cache_generation()
+            cached = self.opencti.cache_get(document, key)
+            if cached is not None:
+                return cached
+            result = self.list(types=types, filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
-                return result[0]
+                return self.opencti.cache_put(document, key, result[0], generation)
             else:
                 return None
         else:
@@ -164,6 +232,52 @@ class StixDomainEntity:
                 object_result = self.read(types=types, filters=[{'key': 'alias', 'values': [name]}])
         return object_result
 
+    """
+        Get Stix-Domain-Entity objects by stix_id or name, as get_by_stix_id_or_name does for each item
+
+        The items are resolved by chunks of values: first by stix_id_key, then the remaining ones
+        by name, then by alias (the values are matched exactly, as the filters of the platform do).
+        :param items: list of (stix_id_key, name) tuples, either can be None
+        :param types: the Stix-Domain-Entity types of the names and aliases
+        :param chunk_size: number of values read per query
+        :return dict of the Stix-Domain-Entity objects (None when not found) by item
+    """
+
+    def resolve_many(self, items, **kwargs):
+        types = kwargs.get('types', None)
+        chunk_size = kwargs.get('chunk_size', 500)
+        items = list(dict.fromkeys(items))
+        self.opencti.log('info', 'Resolving ' + str(len(items)) + ' Stix-Domain-Entities.')
+        result = dict.fromkeys(items)
+
+        stix_ids = [stix_id_key for stix_id_key, _ in items if stix_id_key is not None]
+        entities = self._resolve_values('stix_id_key', list(dict.fromkeys(stix_ids)), None, chunk_size)
+        for item in items:
+            if item[0] is not None:
+                result[item] = entities.get(item[0])
+
+        for key in ['name', 'alias']:
+            names = [name for (_, name), entity in result.items() if entity is None and name is not None]
+            if len(names) == 0:
+                break
+            entities = self._resolve_values(key, list(dict.fromkeys(names)), types, chunk_size)
+            for item, entity in result.items():
+                if entity is None and item[1] is not None:
+                    result[item] = entities.get(item[1])
+        return result
+
+    def _resolve_values(self, key, values, types, chunk_size):
+        # Entities having one of the values in the field `key`, by value
+        entities = {}
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            for entity in self.list(types=types, filters=[{'key': key, 'values': chunk}], first=chunk_size,
+                                    getAll=True):
+                fields = (entity['alias'] or []) if key == 'alias' else [entity[key]]
+                for value in fields:
+                    entities.setdefault(value, entity)
+        return entities
+
     """
         Update a Stix-Domain-Entity object field
 
@@ -179,7 +293,7 @@ class StixDomainEntity:
         value = kwargs.get('value', None)
         if id is not None and key is not None and value is not None:
             self.opencti.log('info', 'Updating Stix-Domain-Entity {' + id + '} field {' + key + '}.')
-            query = """
+            query = self.opencti.query_registry.document('StixDomainEntity.update_field', lambda: """
                 mutation StixDomainEntityEdit($id: ID!, $input: EditInput!) {
                     stixDomainEntityEdit(id: $id) {
                         fieldPatch(input: $input) {
@@ -187,7 +301,7 @@ class StixDomainEntity:
                         }
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'id': id,
                 'input': {
@@ -199,3 +313,21 @@ class StixDomainEntity:
         else:
             self.opencti.log('error', 'Missing parameters: id and key and value')
             return None
+
+    """
+        Update several Stix-Domain-Entity object fields in a single request
+
+        :param id: the Stix-Domain-Entity id
+        :param fields: dict of the values of the fields by key (the None values are skipped)
+        :return dict of the id of the updated Stix-Domain-Entity object
+    """
+
+    def update_fields(self, **kwargs):
+        id = kwargs.get('id', None)
+        fields = kwargs.get('fields', None)
+        if id is not None and fields is not None:
+            self.opencti.log('info', 'Updating Stix-Domain-Entity {' + id + '} fields {' + ', '.join(fields) + '}.')
+            return self.opencti.patch_fields('stixDomainEntityEdit', id, fields)
+        else:
+            self.opencti.log('error', 'Missing parameters: id and fields')
+            return None
@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import json
+from pycti.utils.opencti_projection import Projection
 
 
 class StixEntity:
@@ -131,22 +132,34 @@ class StixEntity:
         Read a Stix-Entity object
 
         :param id: the id of the Stix-Entity
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return Stix-Entity object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading Stix-Entity {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            document = 'StixEntity.read' + properties.key
+            generation = self.opencti.cache_generation()
+            cached = self.opencti.cache_get(document, id)
+            if cached is not None:
+                return cached
+            query = self.opencti.query_registry.document(document, lambda: """
                 query StixEntity($id: String!) {
                     stixEntity(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
-            return self.opencti.process_multiple_fields(result['data']['stixEntity'])
+            return self.opencti.cache_put(
+                document, id, self.opencti.process_multiple_fields(result['data']['stixEntity']), generation
+            )
         else:
             self.opencti.log('error', 'Missing parameters: id or filters')
             return None
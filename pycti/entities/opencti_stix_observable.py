@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import json
+from pycti.utils.opencti_projection import Projection
 
 
 class StixObservable:
@@ -76,6 +77,11 @@ class StixObservable:
         :param search: the search keyword
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row
+        :param stream: decode the response incrementally and return a generator of the StixObservable objects
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of StixObservable objects
     """
 
@@ -86,13 +92,19 @@ class StixObservable:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        stream = kwargs.get('stream', False)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info', 'Listing StixObservables with filters ' + json.dumps(filters) + '.')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('StixObservable.list' + properties.key, lambda: """
             query StixObservables($filters: [StixObservablesFiltering], $search: String, $first: Int, $after: ID, $orderBy: StixObservablesOrdering, $orderMode: OrderingMode) {
                 stixObservables(filters: $filters, search: $search, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -104,35 +116,79 @@ class StixObservable:
                     }                    
                 }
             }
-        """
-        result = self.opencti.query(query, {'filters': filters, 'search': search, 'first': first, 'after': after,
-                                            'orderBy': order_by, 'orderMode': order_mode})
+        """)
+        variables = {'filters': filters, 'search': search, 'first': first, 'after': after, 'orderBy': order_by,
+                     'orderMode': order_mode}
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'stixObservables', stream, prefetch)
+        if stream:
+            return self.opencti.process_multiple_stream(query, variables, 'stixObservables')
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['stixObservables'])
 
+    """
+        Iterate over all the StixObservable objects, following the pagination
+
+        :param: same as list
+        :return generator of StixObservable objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count StixObservable objects
+
+        :param filters: the filters to apply
+        :param search: the search keyword
+        :return number of StixObservable objects
+    """
+
+    def count(self, **kwargs):
+        filters = kwargs.get('filters', None)
+        search = kwargs.get('search', None)
+        self.opencti.log('info', 'Counting StixObservables with filters ' + json.dumps(filters) + '.')
+        query = self.opencti.query_registry.document('StixObservable.count', lambda: """
+            query StixObservablesCount($filters: [StixObservablesFiltering], $search: String) {
+                stixObservables(filters: $filters, search: $search, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {'filters': filters, 'search': search})
+        return result['data']['stixObservables']['pageInfo']['globalCount']
+
     """
         Read a StixObservable object
 
         :param id: the id of the StixObservable
         :param filters: the filters to apply if no id provided
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return StixObservable object
     """
 
     def read(self, **kwargs):
         id = kwargs.get('id', None)
         filters = kwargs.get('filters', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading StixObservable {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('StixObservable.read' + properties.key, lambda: """
                 query StixObservable($id: String!) {
                     stixObservable(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['stixObservable'])
         elif filters is not None:
-            result = self.list(filters=filters)
+            result = self.list(filters=filters, projection=projection, customAttributes=custom_attributes)
             if len(result) > 0:
                 return result[0]
             else:
@@ -187,6 +243,8 @@ class StixObservable:
         Create a Stix-Observable object only if it not exists, update it on request
 
         :param name: the name of the Stix-Observable
+        :param update: update the existing object with the given values
+        :param strategy: 'lookup_first' (default), 'create_first' or 'assume_new', see OpenCTIApiClient.create_first
         :return Stix-Observable object
     """
 
@@ -199,13 +257,16 @@ class StixObservable:
         created = kwargs.get('created', None)
         modified = kwargs.get('modified', None)
         update = kwargs.get('update', False)
+        strategy = kwargs.get('strategy', 'lookup_first')
+
+        object_result = self.opencti.create_first(strategy, self.create_raw, kwargs)
+        if object_result is not None:
+            return object_result
 
         object_result = self.read(filters=[{'key': 'observable_value', 'values': [observable_value]}])
         if object_result is not None:
             if update:
-                if description is not None:
-                    self.update_field(id=object_result['id'], key='description', value=description)
-                    object_result['description'] = description
+                self.opencti.diff.update(self, object_result, {'description': description})
             return object_result
         else:
             return self.create_raw(
@@ -217,6 +278,98 @@ class StixObservable:
                 created=created,
                 modified=modified)
 
+    """
+        Create the Stix-Observable objects which do not exist, update the existing ones on request
+
+        The existing observables are read by chunks of values, the missing ones are created by
+        batches of mutations sent in a single request. AsyncOpenCTIApiClient runs it as is on one of
+        its worker threads, with the same batches (see benchmarks/bench_create_many.py).
+        :param observables: list of dicts of the create arguments (type, observable_value, description...)
+        :param update: update the description of the existing observables
+        :param chunk_size: number of values read per query
+        :param batch_size: number of mutations sent per request
+        :return dict of the ids of the observables by observable_value
+    """
+
+    def create_many(self, observables, **kwargs):
+        update = kwargs.get('update', False)
+        chunk_size = kwargs.get('chunk_size', 500)
+        batch_size = kwargs.get('batch_size', 100)
+        # The first occurrence of a value is kept
+        items = {}
+        for observable in observables:
+            if observable.get('type') is None or observable.get('observable_value') is None:
+                self.opencti.log('error', 'Missing parameters: type and observable_value')
+                continue
+            items.setdefault(observable['observable_value'], observable)
+        values = list(items)
+        self.opencti.log('info', 'Creating ' + str(len(values)) + ' Stix-Observables.')
+
+        # Resolve the existing observables
+        ids = {}
+        existing = []
+        for i in range(0, len(values), chunk_size):
+            chunk = values[i:i + chunk_size]
+            for node in self.list(filters=[{'key': 'observable_value', 'values': chunk}], first=chunk_size,
+                                  getAll=True, customAttributes=['id', 'entity_type', 'observable_value']):
+                if node['observable_value'] in items and node['observable_value'] not in ids:
+                    ids[node['observable_value']] = node['id']
+                    existing.append(node['observable_value'])
+
+        # Create the missing ones and update the existing ones
+        add = self.opencti.query_registry.document('StixObservable.create_many', lambda: """
+            mutation StixObservableAdd($input: StixObservableAddInput) {
+                stixObservableAdd(input: $input) {
+                    id
+                    observable_value
+                }
+            }
+        """)
+        edit = self.opencti.query_registry.document('StixObservable.create_many.update', lambda: """
+            mutation StixObservableEdit($id: ID!, $input: EditInput!) {
+                stixObservableEdit(id: $id) {
+                    fieldPatch(input: $input) {
+                        id
+                    }
+                }
+            }
+        """)
+        operations = []
+        for value in values:
+            if value not in ids:
+                observable = items[value]
+                operations.append((value, add, {
+                    'input': {
+                        'type': observable['type'],
+                        'observable_value': value,
+                        'description': observable.get('description'),
+                        'internal_id_key': observable.get('id'),
+                        'stix_id_key': observable.get('stix_id_key'),
+                        'created': observable.get('created'),
+                        'modified': observable.get('modified')
+                    }
+                }))
+        if update:
+            for value in existing:
+                if items[value].get('description') is not None:
+                    operations.append((value, edit, {
+                        'id': ids[value],
+                        'input': {'key': 'description', 'value': str(items[value]['description'])}
+                    }))
+        for i in range(0, len(operations), batch_size):
+            with self.opencti.batch() as batch:
+                futures = [(value, batch.query(query, variables)) for value, query, variables in
+                           operations[i:i + batch_size]]
+            for value, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.opencti.log('error', 'Unable to create or update Stix-Observable {' + value + '}: ' + str(e))
+                    continue
+                if 'stixObservableAdd' in result['data']:
+                    ids[value] = result['data']['stixObservableAdd']['id']
+        return ids
+
     """
         Update a Stix-Observable object field
 
@@ -232,7 +385,7 @@ class StixObservable:
         value = kwargs.get('value', None)
         if id is not None and key is not None and value is not None:
             self.opencti.log('info', 'Updating Stix-Observable {' + id + '} field {' + key + '}.')
-            query = """
+            query = self.opencti.query_registry.document('StixObservable.update_field', lambda: """
                 mutation StixObservableEdit($id: ID!, $input: EditInput!) {
                     stixObservableEdit(id: $id) {
                         fieldPatch(input: $input) {
@@ -240,7 +393,7 @@ class StixObservable:
                         }
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'id': id,
                 'input': {
@@ -252,3 +405,21 @@ class StixObservable:
         else:
             self.opencti.log('error', 'Missing parameters: id and key and value')
             return None
+
+    """
+        Update several Stix-Observable object fields in a single request
+
+        :param id: the Stix-Observable id
+        :param fields: dict of the values of the fields by key (the None values are skipped)
+        :return dict of the id of the updated Stix-Observable object
+    """
+
+    def update_fields(self, **kwargs):
+        id = kwargs.get('id', None)
+        fields = kwargs.get('fields', None)
+        if id is not None and fields is not None:
+            self.opencti.log('info', 'Updating Stix-Observable {' + id + '} fields {' + ', '.join(fields) + '}.')
+            return self.opencti.patch_fields('stixObservableEdit', id, fields)
+        else:
+            self.opencti.log('error', 'Missing parameters: id and fields')
+            return None
@@ -4,6 +4,7 @@ import json
 import dateutil.parser
 import datetime
 from pycti.utils.constants import CustomProperties
+from pycti.utils.opencti_projection import Projection
 
 
 class StixRelation:
@@ -107,6 +108,11 @@ class StixRelation:
         :param inferred: includes inferred relations
         :param first: return the first n rows from the after ID (or the beginning if not set)
         :param after: ID of the first row for pagination        
+        :param stream: decode the response incrementally and return a generator of the stix_relation objects
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
+        :param getAll: return a generator of all the objects, following the pagination from the after ID
+        :param prefetch: with getAll, fetch the next page on a background thread
         :return List of stix_relation objects
     """
 
@@ -125,14 +131,20 @@ class StixRelation:
         after = kwargs.get('after', None)
         order_by = kwargs.get('orderBy', None)
         order_mode = kwargs.get('orderMode', None)
+        stream = kwargs.get('stream', False)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
+        get_all = kwargs.get('getAll', False)
+        prefetch = kwargs.get('prefetch', False)
         self.opencti.log('info',
                          'Listing stix_relations with {from_id: ' + str(from_id) + ', to_id: ' + str(to_id) + '}')
-        query = """
+        properties = Projection(self.properties, projection, custom_attributes)
+        query = self.opencti.query_registry.document('StixRelation.list' + properties.key, lambda: """
             query StixRelations($fromId: String, $fromTypes: [String], $toId: String, $toTypes: [String], $relationType: String, $firstSeenStart: DateTime, $firstSeenStop: DateTime, $lastSeenStart: DateTime, $lastSeenStop: DateTime, $inferred: Boolean, $first: Int, $after: ID, $orderBy: StixRelationsOrdering, $orderMode: OrderingMode) {
                 stixRelations(fromId: $fromId, fromTypes: $fromTypes, toId: $toId, toTypes: $toTypes, relationType: $relationType, firstSeenStart: $firstSeenStart, firstSeenStop: $firstSeenStop, lastSeenStart: $lastSeenStart, lastSeenStop: $lastSeenStop, inferred: $inferred, first: $first, after: $after, orderBy: $orderBy, orderMode: $orderMode) {
                     edges {
                         node {
-                            """ + self.properties + """
+                            """ + properties.selection + """
                         }
                     }
                     pageInfo {
@@ -144,8 +156,8 @@ class StixRelation:
                     }                        
                 }
             }
-         """
-        result = self.opencti.query(query, {
+         """)
+        variables = {
             'fromId': from_id,
             'fromTypes': from_types,
             'toId': to_id,
@@ -160,9 +172,74 @@ class StixRelation:
             'after': after,
             'orderBy': order_by,
             'orderMode': order_mode
-        })
+        }
+        if get_all:
+            return self.opencti.process_multiple_pages(query, variables, 'stixRelations', stream, prefetch)
+        if stream:
+            return self.opencti.process_multiple_stream(query, variables, 'stixRelations')
+        result = self.opencti.query(query, variables)
         return self.opencti.process_multiple(result['data']['stixRelations'])
 
+    """
+        Iterate over all the stix_relation objects, following the pagination
+
+        :param: same as list
+        :return generator of stix_relation objects
+    """
+
+    def iter_all(self, **kwargs):
+        return self.list(getAll=True, **kwargs)
+
+    """
+        Count stix_relation objects
+
+        :param fromId: the id of the source entity of the relation
+        :param toId: the id of the target entity of the relation
+        :param relationType: the relation type
+        :param firstSeenStart: the first_seen date start filter
+        :param firstSeenStop: the first_seen date stop filter
+        :param lastSeenStart: the last_seen date start filter
+        :param lastSeenStop: the last_seen date stop filter
+        :param inferred: includes inferred relations
+        :return number of stix_relation objects
+    """
+
+    def count(self, **kwargs):
+        from_id = kwargs.get('fromId', None)
+        from_types = kwargs.get('fromTypes', None)
+        to_id = kwargs.get('toId', None)
+        to_types = kwargs.get('toTypes', None)
+        relation_type = kwargs.get('relationType', None)
+        first_seen_start = kwargs.get('firstSeenStart', None)
+        first_seen_stop = kwargs.get('firstSeenStop', None)
+        last_seen_start = kwargs.get('lastSeenStart', None)
+        last_seen_stop = kwargs.get('lastSeenStop', None)
+        inferred = kwargs.get('inferred', None)
+        self.opencti.log('info',
+                         'Counting stix_relations with {from_id: ' + str(from_id) + ', to_id: ' + str(to_id) + '}')
+        query = self.opencti.query_registry.document('StixRelation.count', lambda: """
+            query StixRelationsCount($fromId: String, $fromTypes: [String], $toId: String, $toTypes: [String], $relationType: String, $firstSeenStart: DateTime, $firstSeenStop: DateTime, $lastSeenStart: DateTime, $lastSeenStop: DateTime, $inferred: Boolean) {
+                stixRelations(fromId: $fromId, fromTypes: $fromTypes, toId: $toId, toTypes: $toTypes, relationType: $relationType, firstSeenStart: $firstSeenStart, firstSeenStop: $firstSeenStop, lastSeenStart: $lastSeenStart, lastSeenStop: $lastSeenStop, inferred: $inferred, first: 1) {
+                    pageInfo {
+                        globalCount
+                    }
+                }
+            }
+        """)
+        result = self.opencti.query(query, {
+            'fromId': from_id,
+            'fromTypes': from_types,
+            'toId': to_id,
+            'toTypes': to_types,
+            'relationType': relation_type,
+            'firstSeenStart': first_seen_start,
+            'firstSeenStop': first_seen_stop,
+            'lastSeenStart': last_seen_start,
+            'lastSeenStop': last_seen_stop,
+            'inferred': inferred
+        })
+        return result['data']['stixRelations']['pageInfo']['globalCount']
+
     """
         Read a stix_relation object
         
@@ -175,6 +252,8 @@ class StixRelation:
         :param lastSeenStart: the last_seen date start filter
         :param lastSeenStop: the last_seen date stop filter
         :param inferred: includes inferred relations
+        :param projection: the fields to fetch: 'minimal', 'standard' or 'full' (default)
+        :param customAttributes: the fields to fetch (list of field names or GraphQL selection), overriding the projection
         :return stix_relation object
     """
 
@@ -188,15 +267,18 @@ class StixRelation:
         last_seen_start = kwargs.get('lastSeenStart', None)
         last_seen_stop = kwargs.get('lastSeenStop', None)
         inferred = kwargs.get('inferred', None)
+        projection = kwargs.get('projection', 'full')
+        custom_attributes = kwargs.get('customAttributes', None)
         if id is not None:
             self.opencti.log('info', 'Reading stix_relation {' + id + '}.')
-            query = """
+            properties = Projection(self.properties, projection, custom_attributes)
+            query = self.opencti.query_registry.document('StixRelation.read' + properties.key, lambda: """
                 query StixRelation($id: String!) {
                     stixRelation(id: $id) {
-                        """ + self.properties + """
+                        """ + properties.selection + """
                     }
                 }
-             """
+             """)
             result = self.opencti.query(query, {'id': id})
             return self.opencti.process_multiple_fields(result['data']['stixRelation'])
         elif from_id is not None and to_id is not None:
@@ -208,7 +290,9 @@ class StixRelation:
                 firstSeenStop=first_seen_stop,
                 lastSeenStart=last_seen_start,
                 lastSeenStop=last_seen_stop,
-                inferred=inferred
+                inferred=inferred,
+                projection=projection,
+                customAttributes=custom_attributes
             )
             if len(result) > 0:
                 return result[0]
@@ -322,24 +406,18 @@ class StixRelation:
             )
         if stix_relation_result is not None:
             if update:
-                if description is not None:
-                    self.update_field(id=stix_relation_result['id'], key='description', value=description)
-                    stix_relation_result['description'] = description
-                if weight is not None:
-                    self.update_field(id=stix_relation_result['id'], key='weight', value=weight)
-                    stix_relation_result['weight'] = weight
+                fields = {'description': description, 'weight': weight}
                 if first_seen is not None:
                     new_first_seen = dateutil.parser.parse(first_seen)
                     old_first_seen = dateutil.parser.parse(stix_relation_result['first_seen'])
                     if new_first_seen < old_first_seen:
-                        self.update_field(id=stix_relation_result['id'], key='first_seen', value=first_seen)
-                        stix_relation_result['first_seen'] = first_seen
+                        fields['first_seen'] = first_seen
                 if last_seen is not None:
                     new_last_seen = dateutil.parser.parse(last_seen)
                     old_last_seen = dateutil.parser.parse(stix_relation_result['last_seen'])
                     if new_last_seen > old_last_seen:
-                        self.update_field(id=stix_relation_result['id'], key='last_seen', value=last_seen)
-                        stix_relation_result['last_seen'] = last_seen
+                        fields['last_seen'] = last_seen
+                self.opencti.diff.update(self, stix_relation_result, fields)
             return stix_relation_result
         else:
             roles = self.opencti.resolve_role(relationship_type, from_type, to_type)
@@ -388,7 +466,7 @@ class StixRelation:
         value = kwargs.get('value', None)
         if id is not None and key is not None and value is not None:
             self.opencti.log('info', 'Updating stix_relation {' + id + '} field {' + key + '}.')
-            query = """
+            query = self.opencti.query_registry.document('StixRelation.update_field', lambda: """
                 mutation StixRelationEdit($id: ID!, $input: EditInput!) {
                     stixRelationEdit(id: $id) {
                         fieldPatch(input: $input) {
@@ -396,7 +474,7 @@ class StixRelation:
                         }
                     }
                 }
-            """
+            """)
             result = self.opencti.query(query, {
                 'id': id,
                 'input': {
@@ -409,6 +487,24 @@ class StixRelation:
             self.opencti.log('error', 'Missing parameters: id and key and value')
             return None
 
+    """
+        Update several stix_relation object fields in a single request
+
+        :param id: the stix_relation id
+        :param fields: dict of the values of the fields by key (the None values are skipped)
+        :return dict of the id of the updated stix_relation object
+    """
+
+    def update_fields(self, **kwargs):
+        id = kwargs.get('id', None)
+        fields = kwargs.get('fields', None)
+        if id is not None and fields is not None:
+            self.opencti.log('info', 'Updating stix_relation {' + id + '} fields {' + ', '.join(fields) + '}.')
+            return self.opencti.patch_fields('stixRelationEdit', id, fields)
+        else:
+            self.opencti.log('error', 'Missing parameters: id and fields')
+            return None
+
     """
         Add a Kill-Chain-Phase object to stix_relation object (kill_chain_phases)
 
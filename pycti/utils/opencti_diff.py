@@ -0,0 +1,131 @@
+# coding: utf-8
+
+import datetime
+import threading
+
+import dateutil.parser
+
+# Fields compared as dates, whatever their format
+DATE_FIELDS = ['first_seen', 'last_seen', 'published', 'created', 'modified']
+
+# Fields compared as unordered lists
+LIST_FIELDS = ['alias']
+
+# Fields converted from the STIX markdown before being stored
+MARKDOWN_FIELDS = ['description']
+
+
+class UpdateCounts:
+    def __init__(self):
+        self.updated = 0
+        self.skipped = 0
+        self.fields = 0
+
+
+class OpenCTIDiff:
+    """
+        Change detection of the update=True paths of the create() methods: the incoming values are
+        normalized as the import does and compared with the stored entity, only the changed fields are patched
+        :param opencti: OpenCTI instance
+    """
+
+    def __init__(self, opencti):
+        self.opencti = opencti
+        self.lock = threading.Lock()
+        self.entities = {}
+
+    @staticmethod
+    def normalize_date(value):
+        """
+            Normalize a date to compare it, as the UTC ISO 8601 string stored by the platform
+            :param value: datetime (naive ones are in UTC), date or string
+            :return str
+        """
+        if isinstance(value, str):
+            value = dateutil.parser.parse(value)
+        if not isinstance(value, datetime.date):
+            raise TypeError('Unexpected date ' + repr(value))
+        if not isinstance(value, datetime.datetime):
+            value = datetime.datetime(value.year, value.month, value.day)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    def normalize(self, key, value):
+        """
+            Normalize a value of a field, incoming or stored, to compare it
+            :param key: the key of the field
+            :param value: the value of the field (not None)
+            :return the normalized value
+        """
+        if key in DATE_FIELDS:
+            try:
+                return self.normalize_date(value)
+            except (TypeError, ValueError, OverflowError):
+                return str(value)
+        if key in LIST_FIELDS:
+            return sorted(set(str(item) for item in (value if isinstance(value, list) else [value])))
+        if key in MARKDOWN_FIELDS and isinstance(value, str):
+            return self.opencti.stix2.convert_markdown(value)
+        # The fields are patched as strings, 1 and '1' are the same value
+        return str(value)
+
+    def changed_fields(self, object_result, fields):
+        """
+            Compare the incoming values of the fields with the stored entity
+            :param object_result: the stored entity, as read before the update
+            :param fields: dict of the incoming values by key, the None values are ignored
+            :return dict of the values to patch by key, the fields missing from the stored entity are always patched
+        """
+        changed = {}
+        for key, value in fields.items():
+            if value is None:
+                continue
+            stored = object_result.get(key)
+            if key in LIST_FIELDS and key in object_result and stored is None:
+                stored = []
+            if stored is None or self.normalize(key, value) != self.normalize(key, stored):
+                changed[key] = value
+        return changed
+
+    def update(self, entity, object_result, fields):
+        """
+            Patch the changed fields of a stored entity in a single request, and count the update
+            :param entity: the API of the entity, having update_fields (for instance opencti.stix_domain_entity)
+            :param object_result: the stored entity, updated in place with the patched values
+            :param fields: dict of the incoming values by key, the None values are ignored
+            :return the updated object_result
+        """
+        changed = self.changed_fields(object_result, fields)
+        if len(changed) > 0:
+            entity.update_fields(id=object_result['id'], fields=changed)
+            object_result.update(changed)
+        else:
+            self.opencti.log('info', 'Skipping the update of {' + object_result['id'] + '}, nothing changed.')
+        # Counted once the patch is sent
+        entity_type = object_result.get('entity_type') or 'unknown'
+        with self.lock:
+            counts = self.entities.get(entity_type)
+            if counts is None:
+                counts = self.entities[entity_type] = UpdateCounts()
+            if len(changed) > 0:
+                counts.updated += 1
+                counts.fields += len(changed)
+            else:
+                counts.skipped += 1
+        return object_result
+
+    def reset(self):
+        with self.lock:
+            self.entities = {}
+
+    def snapshot(self):
+        """
+            Counts of the updates since the creation of the client (or the last reset)
+            :return dict of {'updated', 'skipped', 'fields'} (number of patched fields) by entity type
+        """
+        with self.lock:
+            return {
+                entity_type: {'updated': counts.updated, 'skipped': counts.skipped, 'fields': counts.fields}
+                for entity_type, counts in self.entities.items()
+            }
@@ -0,0 +1,64 @@
+# coding: utf-8
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """
+        JSON codec of the standard library
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        """
+            Decode a JSON document
+            :param data: str or bytes
+            :return the decoded value
+        """
+        return json.loads(data)
+
+    def dumps(self, value):
+        """
+            Encode a value as a JSON document, byte-identical to json.dumps(value)
+            :param value: the value to encode
+            :return str
+        """
+        return json.dumps(value)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+        JSON codec decoding with orjson
+
+        Encoding stays on the standard library, orjson can not produce its output (separators,
+        ASCII escaping) and the documents sent or exported must not change.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec requires orjson, install it with: pip install pycti[fast]')
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Documents accepted by the standard library only (NaN, big integers, lone surrogates, UTF-16...)
+            return json.loads(data)
+
+
+def default_codec():
+    """
+        Get the fastest available JSON codec
+        :return JsonCodec
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    return JsonCodec()
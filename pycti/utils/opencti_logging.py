@@ -0,0 +1,20 @@
+# coding: utf-8
+
+import logging
+import threading
+
+LOCK = threading.Lock()
+configured = False
+
+
+def configure_logging(level):
+    """
+        Configure the root logger once per process, clients and helpers built later (possibly in
+        other threads) keep the first configuration, as logging.basicConfig does
+        :param level: numeric level of the root logger
+    """
+    global configured
+    with LOCK:
+        if not configured:
+            logging.basicConfig(level=level)
+            configured = True
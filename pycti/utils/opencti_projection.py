@@ -0,0 +1,92 @@
+# coding: utf-8
+
+import re
+
+PROJECTIONS = ['minimal', 'standard', 'full']
+
+# Fields of the minimal projection, when the entity has them
+MINIMAL_FIELDS = ['id', 'stix_id_key', 'entity_type']
+
+# Lists kept in the standard projection (the other lists of refs are left out)
+STANDARD_LISTS = ['markingDefinitions']
+
+TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|\.\.\.|[{}():@]|[^\s{}():@."]+')
+
+# Tokens continued by the next one in the same field (alias, directive, fragment spread)
+JOINING_TOKENS = ['...', ':', '@']
+
+
+def parse_selection(selection):
+    """
+        Split a GraphQL selection set into its top-level fields
+        :param selection: the selection set (without its surrounding braces)
+        :return list of (name, text of the field with its arguments and sub-selection), the inline fragments
+                and the fragment spreads are named after their text without the sub-selection ('... on Malware')
+    """
+    fields = []
+    depth = 0
+    joined = False
+    previous = None
+    for token in TOKEN.finditer(selection):
+        value = token.group()
+        if value in ('{', '('):
+            depth += 1
+        elif value in ('}', ')'):
+            depth -= 1
+            if depth == 0:
+                fields[-1][2] = token.end()
+        elif depth == 0:
+            if joined or value in (':', '@'):
+                fields[-1][2] = token.end()
+                if fields[-1][3]:
+                    fields[-1][0] += ' ' + value
+            else:
+                # [name, start, end, fragment]
+                fields.append([value, token.start(), token.end(), value == '...'])
+            joined = value in JOINING_TOKENS or (value == 'on' and previous == '...')
+            previous = value
+    return [(name, selection[start:end]) for name, start, end, _ in fields]
+
+
+class Projection:
+    """
+        Fields selected by a list or read call
+        :param properties: the full selection of the entity (`self.properties`)
+        :param projection: 'minimal' (ids and type), 'standard' (no lists of refs but the markings) or 'full'
+        :param custom_attributes: list of the top-level fields to select, or a raw GraphQL selection
+    """
+
+    def __init__(self, properties, projection='full', custom_attributes=None):
+        if custom_attributes is None and projection not in PROJECTIONS:
+            raise ValueError('Unknown projection ' + str(projection) + ', expecting one of ' + ', '.join(PROJECTIONS))
+        self.properties = properties
+        self.projection = projection
+        self.custom_attributes = custom_attributes
+
+    @property
+    def key(self):
+        """
+            Suffix of the registry key of the documents using this projection
+        """
+        if self.custom_attributes is not None:
+            if isinstance(self.custom_attributes, str):
+                return ':custom:' + ' '.join(self.custom_attributes.split())
+            return ':custom:' + ','.join(self.custom_attributes)
+        if self.projection == 'full':
+            return ''
+        return ':' + self.projection
+
+    @property
+    def selection(self):
+        if self.custom_attributes is not None:
+            if isinstance(self.custom_attributes, str):
+                return self.custom_attributes
+            fields = dict(parse_selection(self.properties))
+            # Fields which are not in the properties are selected as is
+            return '\n'.join(fields.get(name, name) for name in self.custom_attributes)
+        if self.projection == 'full':
+            return self.properties
+        fields = parse_selection(self.properties)
+        if self.projection == 'minimal':
+            return '\n'.join(text for name, text in fields if name in MINIMAL_FIELDS)
+        return '\n'.join(text for name, text in fields if 'edges' not in text or name in STANDARD_LISTS)
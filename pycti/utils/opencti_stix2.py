@@ -2,7 +2,7 @@
 
 import time
 import os
-import json
+import threading
 import uuid
 import datetime
 from typing import List
@@ -38,7 +38,22 @@ class OpenCTIStix2:
 
     def __init__(self, opencti):
         self.opencti = opencti
-        self.mapping_cache = {}
+        # The state of an import is local to the thread running it, bundles can be imported in parallel
+        self.context = threading.local()
+
+    @property
+    def mapping_cache(self):
+        """
+            Ids of the objects known by the import running in the current thread
+        """
+        mapping_cache = getattr(self.context, 'mapping_cache', None)
+        if mapping_cache is None:
+            mapping_cache = self.context.mapping_cache = {}
+        return mapping_cache
+
+    @mapping_cache.setter
+    def mapping_cache(self, mapping_cache):
+        self.context.mapping_cache = mapping_cache
 
     def unknown_type(self, stix_object):
         self.opencti.log('error', 'Unknown object type "' + stix_object['type'] + '", doing nothing...')
@@ -100,15 +115,15 @@ class OpenCTIStix2:
             self.opencti.log('error', 'The bundle file does not exists')
             return None
 
-        with open(os.path.join(file_path)) as file:
-            data = json.load(file)
+        with open(os.path.join(file_path), 'rb') as file:
+            data = self.opencti.json_codec.loads(file.read())
 
         return self.import_bundle(data, update, types)
 
     def import_bundle_from_json(self, json_data, update=False, types=None) -> List:
         if types is None:
             types = []
-        data = json.loads(json_data)
+        data = self.opencti.json_codec.loads(json_data)
         return self.import_bundle(data, update, types)
 
     def extract_embedded_relationships(self, stix_object, types=None):
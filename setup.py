@@ -53,8 +53,14 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules'
     ],
     include_package_data=True,
+    # The lazy attributes of the client rely on __set_name__ (PEP 487)
+    python_requires='>=3.6',
     install_requires=['requests', 'PyYAML', 'python-dateutil', 'datefinder', 'stix2', 'stix2-validator', 'pytz',
                       'pika', 'deprecated'],
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+    },
     cmdclass={
         'verify': VerifyVersionCommand,
     }
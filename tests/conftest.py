@@ -0,0 +1,24 @@
+# coding: utf-8
+
+import os
+import sys
+
+import pytest
+
+# The fake platform of the benchmarks answers the operations of the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_platform import FakePlatform  # noqa: E402
+from pycti import FakeTransport, OpenCTIApiClient  # noqa: E402
+
+
+@pytest.fixture
+def platform():
+    return FakePlatform()
+
+
+@pytest.fixture
+def client(platform):
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(platform.answer))
+    yield client
+    client.close()
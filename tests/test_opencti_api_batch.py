@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import threading
+
+import pytest
+
+from pycti import FakeTransport, OpenCTIApiClient, OpenCTIApiError, OpenCTIApiGraphQLError
+
+QUERY = 'query Echo($value: String) { echo(value: $value) }'
+
+
+class Echo:
+    """
+        Platform answering each operation with its value, or with an error when it is 'fail'
+    """
+
+    def __init__(self, batches=True):
+        self.batches = batches
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, payload):
+        with self.lock:
+            self.requests.append(payload)
+        if isinstance(payload, list):
+            if not self.batches:
+                return 400, {'errors': [{'message': 'Batching is not supported'}]}
+            return [self.answer(operation) for operation in payload]
+        return self.answer(payload)
+
+    @staticmethod
+    def answer(operation):
+        value = operation['variables']['value']
+        if value == 'fail':
+            return {'errors': [{'message': 'Failed'}]}
+        return {'data': {'echo': value}}
+
+
+def build_client(echo, **kwargs):
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(echo), perform_health_check=False,
+                            **kwargs)
+
+
+def test_batch_sends_a_single_request():
+    echo = Echo()
+    client = build_client(echo)
+    with client.batch() as batch:
+        futures = [batch.query(QUERY, {'value': str(i)}) for i in range(5)]
+    assert [future.result()['data']['echo'] for future in futures] == ['0', '1', '2', '3', '4']
+    assert len(echo.requests) == 1
+    assert len(echo.requests[0]) == 5
+
+
+def test_single_operation_is_not_batched():
+    echo = Echo()
+    client = build_client(echo)
+    with client.batch() as batch:
+        future = batch.query(QUERY, {'value': 'alone'})
+    assert future.result()['data']['echo'] == 'alone'
+    assert isinstance(echo.requests[0], dict)
+
+
+def test_failed_operation_fails_its_own_result():
+    client = build_client(Echo())
+    with client.batch() as batch:
+        first = batch.query(QUERY, {'value': 'first'})
+        failed = batch.query(QUERY, {'value': 'fail'})
+    assert first.result()['data']['echo'] == 'first'
+    with pytest.raises(OpenCTIApiGraphQLError):
+        failed.result()
+
+
+def test_unsupported_batch_fails_all_the_results():
+    client = build_client(Echo(batches=False), retry_policy=False)
+    with client.batch() as batch:
+        futures = [batch.query(QUERY, {'value': str(i)}) for i in range(3)]
+    for future in futures:
+        with pytest.raises(OpenCTIApiError):
+            future.result()
+
+
+def test_batch_cannot_be_reused():
+    client = build_client(Echo())
+    with client.batch() as batch:
+        batch.query(QUERY, {'value': 'a'})
+    with pytest.raises(ValueError):
+        batch.query(QUERY, {'value': 'b'})
+
+
+def test_batch_window_packs_concurrent_operations():
+    echo = Echo()
+    client = build_client(echo, batch_window=0.5, batch_max_size=8)
+    results = [None] * 8
+    barrier = threading.Barrier(8)
+
+    def query(i):
+        barrier.wait()
+        results[i] = client.query(QUERY, {'value': str(i)})['data']['echo']
+
+    threads = [threading.Thread(target=query, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [str(i) for i in range(8)]
+    # Sent as soon as the window is full
+    assert len(echo.requests) == 1
+    assert len(echo.requests[0]) == 8
@@ -0,0 +1,131 @@
+# coding: utf-8
+
+import time
+
+import pytest
+
+from pycti import FakeTransport, OpenCTIApiCache, OpenCTIApiClient
+
+
+class CountingPlatform:
+    """
+        Transport handler counting the operations answered by the fake platform
+    """
+
+    def __init__(self, platform):
+        self.platform = platform
+        self.operations = []
+        self.before_read = None
+
+    def __call__(self, payload):
+        self.operations.append(payload['query'])
+        if self.before_read is not None and payload['query'].lstrip().startswith('query'):
+            before_read, self.before_read = self.before_read, None
+            # The value read before the callback (a concurrent mutation) is applied
+            answer = self.platform.answer(payload)
+            before_read()
+            return answer
+        return self.platform.answer(payload)
+
+
+@pytest.fixture
+def counting(platform):
+    return CountingPlatform(platform)
+
+
+@pytest.fixture
+def cached(counting):
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(counting), cache=True,
+                              perform_health_check=False)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def intrusion_set(cached):
+    return cached.intrusion_set.create(name='Set', description='Description', alias=['Alias'])
+
+
+def test_read_by_id_is_cached(cached, counting, intrusion_set):
+    first = cached.stix_domain_entity.read(id=intrusion_set['id'])
+    operations = len(counting.operations)
+    second = cached.stix_domain_entity.read(id=intrusion_set['id'])
+    assert second == first
+    assert len(counting.operations) == operations
+    # Each read gets its own copy
+    second['name'] = 'Changed'
+    assert cached.stix_domain_entity.read(id=intrusion_set['id'])['name'] == 'Set'
+    # Cached under its stix_id_key as well
+    assert cached.stix_domain_entity.read(id=intrusion_set['stix_id_key'])['id'] == intrusion_set['id']
+    assert len(counting.operations) == operations
+
+
+def test_mutations_invalidate_the_cache(cached, counting, intrusion_set):
+    cached.stix_domain_entity.read(id=intrusion_set['id'])
+    cached.stix_domain_entity.update_field(id=intrusion_set['id'], key='description', value='Updated')
+    operations = len(counting.operations)
+    assert cached.stix_domain_entity.read(id=intrusion_set['id'])['description'] == 'Updated'
+    assert len(counting.operations) == operations + 1
+
+
+def test_reads_by_name_and_alias_are_cached(cached, counting, intrusion_set):
+    # An alias is read by name first, that miss is not cached
+    for name, misses in [('Set', 0), ('Alias', 1)]:
+        found = cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name=name)
+        assert found['id'] == intrusion_set['id']
+        operations = len(counting.operations)
+        cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name=name)
+        assert len(counting.operations) == operations + misses
+
+
+def test_renaming_invalidates_the_reads_by_name(cached, intrusion_set):
+    assert cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name='Set') is not None
+    cached.stix_domain_entity.update_field(id=intrusion_set['id'], key='name', value='Renamed')
+    assert cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name='Set') is None
+    assert cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name='Renamed')['id'] == \
+        intrusion_set['id']
+
+
+def test_missing_entities_are_not_cached(cached, counting):
+    assert cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name='New') is None
+    created = cached.intrusion_set.create(name='New', description='Description')
+    assert cached.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name='New')['id'] == \
+        created['id']
+
+
+def test_marking_definition_reads_by_filters_are_cached(cached, counting):
+    cached.create_marking_definition(definition_type='TLP', definition='TLP:RED', level=4, color='#c62828')
+    filters = [{'key': 'definition_type', 'values': ['TLP']}, {'key': 'definition', 'values': ['TLP:RED']}]
+    assert cached.marking_definition.read(filters=filters)['definition'] == 'TLP:RED'
+    operations = len(counting.operations)
+    assert cached.marking_definition.read(filters=filters)['definition'] == 'TLP:RED'
+    assert len(counting.operations) == operations
+
+
+def test_read_in_flight_during_a_mutation_is_not_cached(cached, counting, intrusion_set):
+    # The mutation is applied and invalidates the cache while the read is in flight, with the old value
+    counting.before_read = lambda: cached.stix_domain_entity.update_field(
+        id=intrusion_set['id'], key='description', value='Updated'
+    )
+    assert cached.stix_domain_entity.read(id=intrusion_set['id'])['description'] == 'Description'
+    assert cached.stix_domain_entity.read(id=intrusion_set['id'])['description'] == 'Updated'
+    assert cached.cache.stats()['stale'] == 1
+
+
+def test_entries_expire():
+    cache = OpenCTIApiCache(ttl=0.05)
+    cache.put('Read', 'id', {'id': 'id'}, cache.generation)
+    assert cache.get('Read', 'id') == {'id': 'id'}
+    time.sleep(0.06)
+    assert cache.get('Read', 'id') is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = OpenCTIApiCache(max_size=2)
+    for id in ['a', 'b']:
+        cache.put('Read', id, {'id': id}, cache.generation)
+    cache.get('Read', 'a')
+    cache.put('Read', 'c', {'id': 'c'}, cache.generation)
+    assert cache.get('Read', 'b') is None
+    assert cache.get('Read', 'a') is not None
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,111 @@
+# coding: utf-8
+
+import pytest
+from fake_platform import FakePlatform
+
+from pycti import FakeTransport, OpenCTIApiClient, OpenCTIApiDuplicateError, OpenCTIApiGraphQLError
+from pycti.api.opencti_api_exceptions import graphql_error
+
+
+@pytest.fixture
+def unique_platform():
+    return FakePlatform(duplicate_errors=True)
+
+
+@pytest.fixture
+def unique_client(unique_platform):
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(unique_platform.answer),
+                              duplicate_errors=True)
+    yield client
+    client.close()
+
+
+def edges(*ids):
+    return {'edges': [{'node': {'id': id}, 'relation': {'id': 'relation-' + id}} for id in ids]}
+
+
+def test_process_multiple_fields_lists_the_ids(client):
+    node = {
+        'id': 'report',
+        'createdByRef': {'node': {'id': 'author'}, 'relation': {'id': 'relation-author'}},
+        'objectRefs': edges('a', 'b'),
+        'markingDefinitions': {'edges': None}
+    }
+    client.process_multiple_fields(node)
+    assert node['createdByRef'] == {'id': 'author', 'remote_relation_id': 'relation-author'}
+    assert node['objectRefs'] == [{'id': 'a', 'remote_relation_id': 'relation-a'},
+                                  {'id': 'b', 'remote_relation_id': 'relation-b'}]
+    assert node['objectRefsIds'] == ['a', 'b']
+    assert node['markingDefinitions'] == []
+    assert node['markingDefinitionsIds'] == []
+    assert 'tagsIds' not in node
+
+
+def test_processing_a_node_again_keeps_its_lists(client):
+    node = client.process_multiple_fields({'id': 'report', 'objectRefs': edges('a')})
+    assert client.process_multiple_fields(node)['objectRefs'] == [{'id': 'a', 'remote_relation_id': 'relation-a'}]
+    assert node['objectRefsIds'] == ['a']
+
+
+def test_create_first_looks_up_first_without_duplicate_errors(client, platform):
+    # The platform does not report duplicates, creating first would create the entity twice
+    first = client.intrusion_set.create(name='Set', description='Description', strategy='create_first')
+    second = client.intrusion_set.create(name='Set', description='Description', strategy='create_first')
+    assert second['id'] == first['id']
+    assert len(platform.types['intrusion-set']) == 1
+
+
+def test_create_first_looks_up_the_duplicates(unique_client, unique_platform):
+    first = unique_client.intrusion_set.create(name='Set', description='Description', strategy='create_first')
+    operations = unique_platform.operations
+    second = unique_client.intrusion_set.create(name='Set', description='Description', strategy='create_first')
+    assert second['id'] == first['id']
+    assert len(unique_platform.types['intrusion-set']) == 1
+    # The refused creation, then the lookup by name
+    assert unique_platform.operations - operations == 2
+
+
+def test_assume_new_raises_the_duplicates(unique_client):
+    unique_client.intrusion_set.create(name='Set', description='Description', strategy='assume_new')
+    with pytest.raises(OpenCTIApiDuplicateError):
+        unique_client.intrusion_set.create(name='Set', description='Description', strategy='assume_new')
+
+
+def test_duplicates_are_detected_from_the_error_codes():
+    assert isinstance(graphql_error([{'message': 'Exists', 'extensions': {'code': 'DUPLICATE'}}]),
+                      OpenCTIApiDuplicateError)
+    error = graphql_error([{'message': 'Element already exists'}])
+    assert isinstance(error, OpenCTIApiGraphQLError) and not isinstance(error, OpenCTIApiDuplicateError)
+
+
+def test_patch_fields_sends_a_single_request(platform):
+    payloads = []
+
+    def answer(payload):
+        payloads.append(payload)
+        return platform.answer(payload)
+
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(answer))
+    created = client.intrusion_set.create(name='Set', description='Description')
+    del payloads[:]
+    result = client.stix_domain_entity.update_fields(id=created['id'], fields={
+        'description': 'Updated', 'alias': ['First', 'Second'], 'goal': None, 'level': 2
+    })
+    assert result == {'id': created['id']}
+    # One aliased fieldPatch per field, the None values skipped
+    assert len(payloads) == 1
+    assert payloads[0]['query'].count('fieldPatch') == 3
+    assert [payloads[0]['variables']['input' + str(i)] for i in range(3)] == [
+        {'key': 'description', 'value': 'Updated'},
+        {'key': 'alias', 'value': ['First', 'Second']},
+        {'key': 'level', 'value': '2'}
+    ]
+    stored = client.stix_domain_entity.read(id=created['id'])
+    assert (stored['description'], stored['alias']) == ('Updated', ['First', 'Second'])
+    client.close()
+
+
+def test_patch_fields_without_values_sends_nothing(client, platform):
+    operations = platform.operations
+    assert client.patch_fields('stixDomainEntityEdit', 'id', {'description': None}) is None
+    assert platform.operations == operations
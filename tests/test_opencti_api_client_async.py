@@ -0,0 +1,87 @@
+# coding: utf-8
+
+import asyncio
+import time
+
+import pytest
+
+from fake_platform import FakePlatform, FakePlatformServer
+from pycti import OpenCTIApiError
+
+pytest.importorskip('aiohttp')
+
+from pycti import AsyncOpenCTIApiClient  # noqa: E402
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def server(platform):
+    with FakePlatformServer(platform) as server:
+        yield server
+
+
+def test_entity_methods_are_awaitable(client, server):
+    client.create_threat_actor_if_not_exists('APT1', 'First')
+
+    async def main():
+        async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as api:
+            created = await api.intrusion_set.create(name='Set', description='d')
+            return await api.threat_actor.list(first=10), await api.intrusion_set.read(id=created['id'])
+
+    threat_actors, intrusion_set = run(main())
+    assert [threat_actor['name'] for threat_actor in threat_actors] == ['APT1']
+    assert intrusion_set['name'] == 'Set'
+
+
+def test_all_the_pages_are_iterated_asynchronously(client, server):
+    for i in range(25):
+        client.create_threat_actor_if_not_exists('APT' + str(i), 'd')
+
+    async def main():
+        async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as api:
+            pages = await api.threat_actor.list(getAll=True, first=7)
+            return [threat_actor['name'] async for threat_actor in pages]
+
+    assert sorted(run(main())) == sorted('APT' + str(i) for i in range(25))
+
+
+def test_create_many_sends_batches(platform, server):
+    observables = [{'type': 'IPv4-Addr', 'observable_value': '10.0.0.' + str(i)} for i in range(250)]
+
+    async def main():
+        async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as api:
+            return await api.stix_observable.create_many(observables, batch_size=100)
+
+    ids = run(main())
+    assert sorted(ids) == sorted(observable['observable_value'] for observable in observables)
+    assert len(platform.types['ipv4-addr']) == 250
+
+
+def test_requests_do_not_block_the_event_loop():
+    platform = FakePlatform(latency=0.2)
+    with FakePlatformServer(platform) as server:
+        async def main():
+            async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as api:
+                start = time.perf_counter()
+                await asyncio.gather(*[api.threat_actor.list(first=1) for _ in range(20)])
+                return time.perf_counter() - start
+
+        # 4s when sent one after the other
+        assert run(main()) < 2
+
+
+def test_synchronous_api_is_rejected_from_the_event_loop(server):
+    async def main():
+        async with AsyncOpenCTIApiClient(server.url, 'token', 'error') as api:
+            await api.threat_actor.list(first=1)
+            with pytest.raises(OpenCTIApiError):
+                api.sync.threat_actor.list(first=1)
+
+    run(main())
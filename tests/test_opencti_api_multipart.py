@@ -0,0 +1,110 @@
+# coding: utf-8
+
+import email.parser
+import io
+import json
+
+import pytest
+
+from pycti import OpenCTIApiClient
+from pycti.api.opencti_api_client import File
+from pycti.api.opencti_api_multipart import MultipartBody
+from pycti.api.opencti_api_transport import Transport, build_response
+
+UPLOAD = 'mutation Upload($file: Upload!) { upload(file: $file) }'
+
+
+class UploadTransport(Transport):
+    """
+        Transport reading the multipart bodies sent by the client, by chunks as the network would
+    """
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.bodies = []
+        self.chunks = []
+
+    def send(self, url, **kwargs):
+        body = b''
+        for chunk in kwargs['data']:
+            self.chunks.append(len(chunk))
+            body += chunk
+        self.bodies.append((kwargs['headers']['Content-Type'], body))
+        status = self.statuses.pop(0) if len(self.statuses) > 0 else 200
+        return build_response(url, status, b'{"data": {"upload": "ok"}}', **kwargs)
+
+
+def parse(content_type, body):
+    message = email.parser.BytesParser().parsebytes(b'Content-Type: ' + content_type.encode('ascii') + b'\r\n\r\n' + body)
+    return {part.get_param('name', header='content-disposition'): (part.get_filename(), part.get_payload(decode=True))
+            for part in message.get_payload()}
+
+
+def build_client(transport, **kwargs):
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=transport, perform_health_check=False,
+                            **kwargs)
+
+
+@pytest.mark.parametrize('data', ['content', b'content', bytearray(b'content'), memoryview(b'content')])
+def test_upload_of_strings_and_buffers(data):
+    transport = UploadTransport()
+    build_client(transport).query(UPLOAD, {'file': File('file.txt', data)})
+    parts = parse(*transport.bodies[0])
+    assert json.loads(parts['operations'][1]) == {'query': UPLOAD, 'variables': {'file': None}}
+    assert json.loads(parts['map'][1]) == {'0': ['variables.file']}
+    assert parts['0'] == ('file.txt', b'content')
+
+
+def test_upload_of_a_path_is_streamed(tmp_path):
+    path = tmp_path / 'export.json'
+    content = bytes(range(256)) * 1024
+    path.write_bytes(content)
+    transport = UploadTransport()
+    build_client(transport).query(UPLOAD, {'file': File('export.json', path)})
+    assert parse(*transport.bodies[0])['0'] == ('export.json', content)
+    assert max(transport.chunks) <= 65536
+
+
+def test_upload_of_a_file_object_from_its_position():
+    file = io.BytesIO(b'headercontent')
+    file.seek(6)
+    transport = UploadTransport()
+    build_client(transport).query(UPLOAD, {'file': File('file.txt', file)})
+    assert parse(*transport.bodies[0])['0'] == ('file.txt', b'content')
+    # The file object of the caller is left open, back to its position
+    assert not file.closed
+    assert file.tell() == 6
+
+
+def test_upload_of_several_files():
+    transport = UploadTransport()
+    build_client(transport).query(
+        'mutation Upload($files: [Upload]) { upload(files: $files) }',
+        {'files': [File('a.txt', 'a'), File('b.txt', b'b')]}
+    )
+    parts = parse(*transport.bodies[0])
+    assert json.loads(parts['map'][1]) == {'0': ['variables.files.0'], '1': ['variables.files.1']}
+    assert parts['0'] == ('a.txt', b'a')
+    assert parts['1'] == ('b.txt', b'b')
+
+
+def test_retried_upload_sends_the_whole_body_again():
+    transport = UploadTransport(statuses=[503])
+    build_client(transport).query(UPLOAD, {'file': File('file.txt', b'content' * 10000)})
+    assert len(transport.bodies) == 2
+    assert transport.bodies[0][1] == transport.bodies[1][1]
+
+
+def test_body_length_is_known_in_advance():
+    body = MultipartBody({'operations': '{}'}, [('0', ('file.txt', File('file.txt', b'x' * 100000)))])
+    try:
+        assert len(body) == len(body.read())
+        body.seek(0)
+        assert len(body.read(10)) == 10
+    finally:
+        body.close()
+
+
+def test_unsupported_data_is_rejected():
+    with pytest.raises(TypeError):
+        build_client(UploadTransport()).query(UPLOAD, {'file': File('file.txt', 42)})
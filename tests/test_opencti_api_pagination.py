@@ -0,0 +1,117 @@
+# coding: utf-8
+
+import time
+
+import pytest
+
+from pycti import FakeTransport, OpenCTIApiClient
+from pycti.api.opencti_api_pagination import Prefetcher
+
+NAMES = ['APT' + str(i) for i in range(23)]
+
+
+@pytest.fixture
+def threat_actors(client):
+    for name in NAMES:
+        client.create_threat_actor_if_not_exists(name, 'Description')
+    return NAMES
+
+
+@pytest.mark.parametrize('options', [{}, {'prefetch': True}])
+def test_all_the_pages_are_followed(client, platform, threat_actors, options):
+    operations = platform.operations
+    nodes = client.threat_actor.list(getAll=True, first=5, **options)
+    assert [node['name'] for node in nodes] == threat_actors
+    # 5 pages
+    assert platform.operations == operations + 5
+
+
+def test_iter_all_is_lazy(client, platform, threat_actors):
+    operations = platform.operations
+    nodes = client.threat_actor.iter_all(first=5)
+    assert platform.operations == operations
+    assert next(nodes)['name'] == threat_actors[0]
+    # A single page is read before its nodes are consumed
+    assert platform.operations == operations + 1
+
+
+def test_first_page_only_without_get_all(client, threat_actors):
+    assert len(client.threat_actor.list(first=5)) == 5
+
+
+def test_all_the_pages_are_followed_from_a_cursor(client, threat_actors):
+    nodes = client.threat_actor.list(getAll=True, first=5, after='10')
+    assert [node['name'] for node in nodes] == threat_actors[10:]
+
+
+def test_empty_page_ends_the_iteration():
+    requests = []
+
+    def handler(payload):
+        requests.append(payload)
+        # A platform claiming there is always a next page
+        return {'data': {'threatActors': {'edges': [], 'pageInfo': {'endCursor': 'next', 'hasNextPage': True}}}}
+
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(handler),
+                              perform_health_check=False)
+    assert list(client.threat_actor.list(getAll=True)) == []
+    assert len(requests) == 1
+
+
+def test_streamed_pages(client, threat_actors):
+    query = client.query_registry.document('Test.pages', lambda: """
+        query ThreatActors($first: Int, $after: ID) {
+            threatActors(first: $first, after: $after) {
+                edges { node { id name } }
+                pageInfo { endCursor hasNextPage }
+            }
+        }
+    """)
+    nodes = client.process_multiple_pages(query, {'first': 4}, 'threatActors', stream=True)
+    assert [node['name'] for node in nodes] == threat_actors
+
+
+def test_prefetcher_reads_ahead():
+    read = []
+
+    def items():
+        for i in range(3):
+            read.append(i)
+            yield i
+
+    prefetcher = Prefetcher(items())
+    assert next(prefetcher) == 0
+    # The next item is read while the first one is consumed
+    for _ in range(100):
+        if len(read) >= 2:
+            break
+        time.sleep(0.01)
+    assert read[:2] == [0, 1]
+    assert list(prefetcher) == [1, 2]
+
+
+def test_prefetcher_raises_the_errors():
+    def items():
+        yield 1
+        raise ValueError('Failed')
+
+    prefetcher = Prefetcher(items())
+    assert next(prefetcher) == 1
+    with pytest.raises(ValueError):
+        next(prefetcher)
+
+
+def test_prefetcher_stops_when_closed():
+    def items():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    prefetcher = Prefetcher(items())
+    next(prefetcher)
+    prefetcher.close()
+    prefetcher.thread.join(1)
+    assert not prefetcher.thread.is_alive()
+    with pytest.raises(StopIteration):
+        next(prefetcher)
@@ -0,0 +1,70 @@
+# coding: utf-8
+
+from pycti import FakeTransport, OpenCTIApiClient
+
+QUERY = 'query Echo($value: String) { echo(value: $value) }'
+
+
+class PersistingPlatform:
+    """
+        Platform registering the documents sent with their hash, or not supporting the persisted queries
+    """
+
+    def __init__(self, supported=True):
+        self.supported = supported
+        self.documents = {}
+        self.requests = []
+
+    def __call__(self, payload):
+        self.requests.append(payload)
+        persisted = (payload.get('extensions') or {}).get('persistedQuery')
+        if persisted is not None:
+            if not self.supported:
+                return {'errors': [{'message': 'PersistedQueryNotSupported'}]}
+            if 'query' in payload:
+                self.documents[persisted['sha256Hash']] = payload['query']
+            elif persisted['sha256Hash'] not in self.documents:
+                return {'errors': [{'message': 'PersistedQueryNotFound'}]}
+        return {'data': {'echo': payload['variables']['value']}}
+
+
+def build_client(platform, **kwargs):
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(platform),
+                            perform_health_check=False, **kwargs)
+
+
+def test_documents_are_sent_by_default():
+    platform = PersistingPlatform()
+    client = build_client(platform)
+    client.query(QUERY, {'value': 'a'})
+    client.query(QUERY, {'value': 'b'})
+    assert all(request['query'] == QUERY and 'extensions' not in request for request in platform.requests)
+
+
+def test_persisted_queries_send_the_hash_once_registered():
+    platform = PersistingPlatform()
+    client = build_client(platform, persisted_queries=True)
+    assert client.query(QUERY, {'value': 'a'})['data']['echo'] == 'a'
+    assert client.query(QUERY, {'value': 'b'})['data']['echo'] == 'b'
+    assert 'query' in platform.requests[0]
+    assert 'query' not in platform.requests[1]
+
+
+def test_persisted_query_not_found_sends_the_document_again():
+    platform = PersistingPlatform()
+    client = build_client(platform, persisted_queries=True)
+    client.query(QUERY, {'value': 'a'})
+    # The server restarted and forgot the document
+    platform.documents.clear()
+    assert client.query(QUERY, {'value': 'b'})['data']['echo'] == 'b'
+    assert len(platform.requests) == 3
+    assert 'query' in platform.requests[2]
+
+
+def test_persisted_queries_not_supported_are_disabled():
+    platform = PersistingPlatform(supported=False)
+    client = build_client(platform, persisted_queries=True)
+    assert client.query(QUERY, {'value': 'a'})['data']['echo'] == 'a'
+    assert client.persisted_queries is False
+    client.query(QUERY, {'value': 'b'})
+    assert 'extensions' not in platform.requests[-1]
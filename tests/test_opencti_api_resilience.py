@@ -0,0 +1,141 @@
+# coding: utf-8
+
+import time
+
+import pytest
+import requests
+
+from pycti import CircuitBreaker, FakeTransport, OpenCTIApiCircuitOpenError, OpenCTIApiClient, \
+    OpenCTIApiConnectionError, OpenCTIApiGraphQLError, OpenCTIApiHttpError, RetryPolicy
+from pycti.api.opencti_api_transport import Transport, build_response
+
+READ = 'query Read { echo }'
+WRITE = 'mutation Write { echo }'
+
+
+class Flaky:
+    """
+        Platform answering with the given statuses first, then successfully
+    """
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = 0
+
+    def __call__(self, payload):
+        self.requests += 1
+        if len(self.statuses) > 0:
+            return self.statuses.pop(0), {'message': 'Unavailable'}
+        return {'data': {'echo': 'ok'}}
+
+
+class FailingTransport(Transport):
+    """
+        Transport raising the given errors first, then answering successfully
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.requests = 0
+
+    def send(self, url, **kwargs):
+        self.requests += 1
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        return build_response(url, 200, b'{"data": {"echo": "ok"}}', **kwargs)
+
+
+def build_client(transport, **kwargs):
+    kwargs.setdefault('retry_policy', RetryPolicy(max_retries=3, backoff_factor=0))
+    kwargs.setdefault('circuit_breaker', False)
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=transport, perform_health_check=False,
+                            **kwargs)
+
+
+def test_read_is_retried_on_overload():
+    platform = Flaky(503, 502, 429)
+    client = build_client(FakeTransport(platform))
+    assert client.query(READ)['data']['echo'] == 'ok'
+    assert platform.requests == 4
+
+
+def test_retries_are_bounded():
+    platform = Flaky(503, 503, 503, 503, 503)
+    client = build_client(FakeTransport(platform))
+    with pytest.raises(OpenCTIApiHttpError) as error:
+        client.query(READ)
+    assert error.value.status_code == 503
+    assert platform.requests == 4
+
+
+def test_write_is_not_retried_when_it_may_have_been_processed():
+    platform = Flaky(500)
+    client = build_client(FakeTransport(platform))
+    with pytest.raises(OpenCTIApiHttpError):
+        client.query(WRITE)
+    assert platform.requests == 1
+
+
+def test_write_is_retried_when_rejected():
+    platform = Flaky(503)
+    client = build_client(FakeTransport(platform))
+    assert client.query(WRITE)['data']['echo'] == 'ok'
+    assert platform.requests == 2
+
+
+def test_connection_errors():
+    transport = FailingTransport(requests.exceptions.ConnectionError('reset'))
+    assert build_client(transport).query(READ)['data']['echo'] == 'ok'
+    # A write sent on an established connection may have been processed
+    transport = FailingTransport(requests.exceptions.ConnectionError('reset'))
+    with pytest.raises(OpenCTIApiConnectionError):
+        build_client(transport).query(WRITE)
+    assert transport.requests == 1
+    # A write which never reached the platform is sent again
+    transport = FailingTransport(requests.exceptions.ConnectTimeout('timeout'))
+    assert build_client(transport).query(WRITE)['data']['echo'] == 'ok'
+    assert transport.requests == 2
+
+
+def test_graphql_errors_are_raised():
+    client = build_client(FakeTransport(lambda payload: {'errors': [{'message': 'Forbidden'}]}))
+    with pytest.raises(OpenCTIApiGraphQLError) as error:
+        client.query(READ)
+    assert error.value.errors == [{'message': 'Forbidden'}]
+
+
+def test_retry_after_is_honored():
+    policy = RetryPolicy(backoff_factor=0.1, backoff_max=30)
+    assert policy.delay(0, '2') >= 2
+    assert policy.delay(0, 'soon') <= 0.1
+    assert RetryPolicy(backoff_factor=1, backoff_max=4, jitter=False).delay(5) == 4
+
+
+def test_circuit_breaker_fails_fast_then_recovers():
+    platform = Flaky(503, 503)
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2)
+    client = build_client(FakeTransport(platform), retry_policy=False, circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(OpenCTIApiHttpError):
+            client.query(READ)
+    with pytest.raises(OpenCTIApiCircuitOpenError):
+        client.query(READ)
+    assert platform.requests == 2
+    time.sleep(0.2)
+    # A trial query closes the circuit
+    assert client.query(READ)['data']['echo'] == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_opens_the_circuit_again():
+    platform = Flaky(503, 503)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.1)
+    client = build_client(FakeTransport(platform), retry_policy=False, circuit_breaker=breaker)
+    with pytest.raises(OpenCTIApiHttpError):
+        client.query(READ)
+    time.sleep(0.1)
+    with pytest.raises(OpenCTIApiHttpError):
+        client.query(READ)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(OpenCTIApiCircuitOpenError):
+        client.query(READ)
@@ -0,0 +1,81 @@
+# coding: utf-8
+
+import threading
+
+from pycti import FakeTransport, OpenCTIApiClient
+
+READ = 'query Read { value }'
+WRITE = 'mutation Write($value: String) { write(value: $value) }'
+
+
+class Register:
+    """
+        Platform storing a single value, the first read waits for `release` before answering
+    """
+
+    def __init__(self):
+        self.value = 'old'
+        self.reads = 0
+        self.reading = threading.Event()
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, payload):
+        if payload['query'].startswith('mutation'):
+            self.value = payload['variables']['value']
+            return {'data': {'write': self.value}}
+        with self.lock:
+            self.reads += 1
+            first = self.reads == 1
+        value = self.value
+        if first:
+            self.reading.set()
+            self.release.wait(5)
+        return {'data': {'value': value}}
+
+
+def build_client(register, **kwargs):
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(register),
+                            perform_health_check=False, **kwargs)
+
+
+def read_in_thread(client, results):
+    thread = threading.Thread(target=lambda: results.append(client.query(READ)['data']['value']))
+    thread.start()
+    return thread
+
+
+def test_single_flight_is_disabled_by_default():
+    assert build_client(Register()).single_flight is None
+
+
+def test_concurrent_reads_are_sent_once():
+    register = Register()
+    client = build_client(register, single_flight=True)
+    results = []
+    leader = read_in_thread(client, results)
+    assert register.reading.wait(5)
+    follower = read_in_thread(client, results)
+    while client.single_flight.coalesced == 0:
+        follower.join(0.01)
+    register.release.set()
+    leader.join()
+    follower.join()
+    assert results == ['old', 'old']
+    assert register.reads == 1
+
+
+def test_read_after_a_mutation_starts_a_new_flight():
+    register = Register()
+    client = build_client(register, single_flight=True)
+    results = []
+    leader = read_in_thread(client, results)
+    assert register.reading.wait(5)
+    # The read in flight was sent before the write, the read following it sees the new value
+    client.query(WRITE, {'value': 'new'})
+    assert client.query(READ)['data']['value'] == 'new'
+    register.release.set()
+    leader.join()
+    assert results == ['old']
+    assert register.reads == 2
+    assert client.single_flight.coalesced == 0
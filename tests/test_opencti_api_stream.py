@@ -0,0 +1,83 @@
+# coding: utf-8
+
+import pytest
+
+from pycti import FakeTransport, OpenCTIApiClient, OpenCTIApiGraphQLError, QueryHook, RetryPolicy
+
+QUERY = 'query Reports { reports { edges { node { id } } } }'
+PATHS = [('data', 'reports', 'edges')]
+
+
+class Recorder(QueryHook):
+    def __init__(self):
+        self.before = []
+        self.after = []
+
+    def before_query(self, event):
+        self.before.append(event)
+
+    def after_query(self, event):
+        self.after.append(event)
+
+
+def reports(count):
+    return {'data': {'reports': {'edges': [{'node': {'id': str(i)}} for i in range(count)]}}}
+
+
+def build_client(handler, **kwargs):
+    return OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(handler),
+                            perform_health_check=False, **kwargs)
+
+
+def test_stream_yields_the_items_and_keeps_the_rest():
+    client = build_client(lambda payload: reports(3))
+    stream = client.query_stream(QUERY, {}, PATHS)
+    assert [item['node']['id'] for _, item in stream] == ['0', '1', '2']
+    assert stream.document == {'data': {'reports': {'edges': []}}}
+
+
+def test_stream_goes_through_the_hooks():
+    recorder = Recorder()
+    client = build_client(lambda payload: reports(100), hooks=[recorder], metrics=True)
+    stream = client.query_stream(QUERY, {}, PATHS)
+    # The request is sent when the iteration starts
+    assert recorder.before == []
+    assert len(list(stream)) == 100
+    assert len(recorder.before) == 1 and recorder.after == recorder.before
+    event = recorder.after[0]
+    assert event.operation == 'Reports'
+    assert event.error is None and event.attempts == 1 and event.status == 200
+    assert event.bytes_in == len(b'{"data": {"reports": {"edges": [') + sum(
+        len('{"node": {"id": "' + str(i) + '"}}') for i in range(100)) + 2 * 99 + len(']}}}')
+    assert client.metrics.snapshot()['Reports']['count'] == 1
+
+
+def test_stream_errors_are_recorded():
+    recorder = Recorder()
+    client = build_client(lambda payload: {'errors': [{'message': 'Forbidden'}], 'data': None}, hooks=[recorder])
+    with pytest.raises(OpenCTIApiGraphQLError):
+        list(client.query_stream(QUERY, {}, PATHS))
+    assert len(recorder.after) == 1
+    assert isinstance(recorder.after[0].error, OpenCTIApiGraphQLError)
+
+
+def test_abandoned_stream_is_finished():
+    recorder = Recorder()
+    client = build_client(lambda payload: reports(10), hooks=[recorder])
+    iterator = iter(client.query_stream(QUERY, {}, PATHS))
+    next(iterator)
+    iterator.close()
+    assert len(recorder.after) == 1
+    assert recorder.after[0].error is None
+
+
+def test_stream_is_retried():
+    statuses = [503]
+
+    def handler(payload):
+        return (statuses.pop(), {}) if len(statuses) > 0 else reports(2)
+
+    recorder = Recorder()
+    client = build_client(handler, hooks=[recorder], retry_policy=RetryPolicy(backoff_factor=0))
+    assert len(list(client.query_stream(QUERY, {}, PATHS))) == 2
+    assert recorder.after[0].attempts == 2
@@ -0,0 +1,31 @@
+# coding: utf-8
+
+import pytest
+
+from pycti import FakeTransport, OpenCTIApiClient, RecordingTransport, ReplayTransport, Transport
+
+
+class Incomplete(Transport):
+    pass
+
+
+def test_transport_must_implement_send():
+    with pytest.raises(TypeError):
+        Transport()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_replay_of_the_recorded_exchanges(tmp_path, platform):
+    path = str(tmp_path / 'exchanges.jsonl')
+    client = OpenCTIApiClient('http://fake', 'token', 'error',
+                              transport=RecordingTransport(FakeTransport(platform.answer), path))
+    created = client.intrusion_set.create(name='Set', description='Description')
+    read = client.stix_domain_entity.read(id=created['id'])
+    client.close()
+
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=ReplayTransport(path))
+    operations = platform.operations
+    assert client.stix_domain_entity.read(id=created['id']) == read
+    assert platform.operations == operations
+    client.close()
@@ -0,0 +1,47 @@
+# coding: utf-8
+
+import datetime
+
+import pytest
+
+from pycti.utils.opencti_diff import OpenCTIDiff
+
+UTC = datetime.timezone.utc
+
+
+@pytest.mark.parametrize('value', [
+    '2020-01-02T03:04:05Z',
+    '2020-01-02T03:04:05.000Z',
+    '2020-01-02T03:04:05',
+    '2020-01-02T05:04:05+02:00',
+    datetime.datetime(2020, 1, 2, 3, 4, 5),
+    datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=UTC),
+    datetime.datetime(2020, 1, 2, 4, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=1))),
+])
+def test_dates_are_normalized_to_utc(client, value):
+    assert client.diff.normalize('created', value) == '2020-01-02T03:04:05.000Z'
+
+
+def test_plain_dates_are_midnight_utc(client):
+    assert client.diff.normalize('published', datetime.date(2020, 1, 2)) == '2020-01-02T00:00:00.000Z'
+    assert client.diff.normalize('published', datetime.date(2020, 1, 2)) == \
+        client.diff.normalize('published', '2020-01-02T00:00:00Z')
+
+
+@pytest.mark.parametrize('value', ['not a date', 12, '99999-01-01'])
+def test_invalid_dates_are_compared_as_strings(client, value):
+    assert client.diff.normalize('first_seen', value) == str(value)
+
+
+def test_normalize_date_rejects_other_types():
+    with pytest.raises(TypeError):
+        OpenCTIDiff.normalize_date(12)
+
+
+def test_changed_fields(client):
+    stored = {'id': 'id', 'name': 'Set', 'alias': ['A', 'B'], 'created': '2020-01-02T03:04:05.000Z', 'level': '1'}
+    assert client.diff.changed_fields(stored, {
+        'name': 'Set', 'alias': ['B', 'A'], 'created': datetime.datetime(2020, 1, 2, 3, 4, 5), 'level': 1,
+        'description': 'New', 'goal': None
+    }) == {'description': 'New'}
+    assert client.diff.changed_fields(stored, {'name': 'Other'}) == {'name': 'Other'}
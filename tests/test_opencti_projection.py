@@ -0,0 +1,94 @@
+# coding: utf-8
+
+import importlib
+
+import pytest
+
+from pycti.utils.opencti_projection import Projection, parse_selection
+
+ENTITIES = [
+    ('opencti_stix_entity', 'StixEntity'),
+    ('opencti_stix_domain_entity', 'StixDomainEntity'),
+    ('opencti_stix_observable', 'StixObservable'),
+    ('opencti_stix_relation', 'StixRelation'),
+    ('opencti_threat_actor', 'ThreatActor'),
+    ('opencti_report', 'Report'),
+]
+
+
+def properties(module, name):
+    return getattr(importlib.import_module('pycti.entities.' + module), name)(None).properties
+
+
+def compact(text):
+    return ''.join(text.split())
+
+
+def test_parse_plain_fields():
+    assert parse_selection('id\n name\n createdByRef { node { id } }') == [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('createdByRef', 'createdByRef { node { id } }')
+    ]
+
+
+def test_parse_inline_fragment():
+    assert parse_selection('id ... on AttackPattern { killChainPhases { edges { node { id } } } } name') == [
+        ('id', 'id'),
+        ('... on AttackPattern', '... on AttackPattern { killChainPhases { edges { node { id } } } }'),
+        ('name', 'name')
+    ]
+
+
+def test_parse_fragment_spread():
+    assert parse_selection('id ...EntityFields name') == [
+        ('id', 'id'),
+        ('... EntityFields', '...EntityFields'),
+        ('name', 'name')
+    ]
+
+
+def test_parse_arguments():
+    assert parse_selection('objectRefs(first: 10, search: "a {b}") { edges { node { id } } } name') == [
+        ('objectRefs', 'objectRefs(first: 10, search: "a {b}") { edges { node { id } } }'),
+        ('name', 'name')
+    ]
+
+
+def test_parse_alias_and_directive():
+    assert parse_selection('label: name @include(if: $named) id') == [
+        ('label', 'label: name @include(if: $named)'),
+        ('id', 'id')
+    ]
+
+
+@pytest.mark.parametrize('module,name', ENTITIES)
+def test_parse_properties_of_the_entities(module, name):
+    selection = properties(module, name)
+    fields = parse_selection(selection)
+    # The fields cover the whole selection, in order
+    assert compact(''.join(text for _, text in fields)) == compact(selection)
+    for field, text in fields:
+        assert text.count('{') == text.count('}')
+        assert field not in ('...', 'on')
+
+
+def test_standard_projection_keeps_whole_fields():
+    selection = Projection(properties('opencti_stix_entity', 'StixEntity'), 'standard').selection
+    names = [name for name, _ in parse_selection(selection)]
+    assert 'markingDefinitions' in names
+    # The inline fragments only hold lists of refs, they are left out as a whole
+    assert not any(name.startswith('...') for name in names)
+    assert selection.count('{') == selection.count('}')
+    assert '...' not in selection
+
+
+def test_minimal_projection():
+    selection = Projection(properties('opencti_stix_entity', 'StixEntity'), 'minimal').selection
+    assert selection.split() == ['id', 'stix_id_key', 'entity_type']
+
+
+def test_custom_attributes_select_fields_with_arguments():
+    selection = 'id\n objectRefs(first: 10) { edges { node { id } } }\n name'
+    assert Projection(selection, custom_attributes=['objectRefs']).selection == \
+        'objectRefs(first: 10) { edges { node { id } } }'
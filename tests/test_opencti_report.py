@@ -0,0 +1,25 @@
+# coding: utf-8
+
+from bundles import generate_bundle
+
+
+def test_streamed_refs_are_read_lazily(client, platform):
+    client.stix2.import_bundle(generate_bundle(200))
+    report_id = next(iter(platform.types['report']))
+    report = client.report.read(id=report_id)
+    operations = platform.operations
+    streamed = client.report.read(id=report_id, stream=True)
+    # The refs are only requested once iterated
+    assert platform.operations == operations + 1
+    for key in ['objectRefs', 'observableRefs', 'relationRefs']:
+        assert list(streamed[key]) == report[key]
+        assert list(streamed[key + 'Ids']) == report[key + 'Ids']
+        # Each iteration reads the refs again
+        assert list(streamed[key + 'Ids']) == report[key + 'Ids']
+    assert len(report['objectRefs']) > 0
+    assert {key: value for key, value in streamed.items() if 'Refs' not in key} == \
+        {key: value for key, value in report.items() if 'Refs' not in key}
+
+
+def test_streamed_read_of_a_missing_report(client):
+    assert client.report.read(id='missing', stream=True) is None
@@ -0,0 +1,42 @@
+# coding: utf-8
+
+from concurrent.futures import ThreadPoolExecutor
+
+from bundles import generate_bundle
+from fake_platform import FakePlatform
+from stress_import import check
+
+from pycti import FakeTransport, OpenCTIApiClient
+
+
+def relationships(bundle):
+    return [item for item in bundle['objects'] if item['type'] == 'relationship']
+
+
+def test_import_bundle(client, platform):
+    bundle = generate_bundle(60, seed=1)
+    client.stix2.import_bundle(bundle)
+    assert len(platform.relations) == len(relationships(bundle))
+    assert check(platform, [bundle]) == 0
+
+
+def test_concurrent_imports_link_the_right_entities():
+    # The latency interleaves the imports of the threads
+    platform = FakePlatform(latency=0.001)
+    client = OpenCTIApiClient('http://fake', 'token', 'error', transport=FakeTransport(platform.answer))
+    bundles = [generate_bundle(60, seed=seed) for seed in range(6)]
+    with ThreadPoolExecutor(6) as executor:
+        results = list(executor.map(client.stix2.import_bundle, bundles))
+    client.close()
+    assert all(len(result) > 0 for result in results)
+    # The shared entities (marking, identity) are created once, every relationship links its own refs
+    assert check(platform, bundles) == 0
+    assert len(platform.relations) == sum(len(relationships(bundle)) for bundle in bundles)
+
+
+def test_mapping_of_an_import_is_local_to_its_thread(client):
+    bundle = generate_bundle(20, seed=2)
+    with ThreadPoolExecutor(1) as executor:
+        executor.submit(client.stix2.import_bundle, bundle).result()
+        assert len(executor.submit(lambda: client.stix2.mapping_cache).result()) > 0
+    assert client.stix2.mapping_cache == {}
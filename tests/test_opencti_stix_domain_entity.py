@@ -0,0 +1,47 @@
+# coding: utf-8
+
+import pytest
+
+
+@pytest.fixture
+def entities(client):
+    return {
+        'set': client.intrusion_set.create(name='Set', description='Description', alias=['Alias']),
+        'organization': client.identity.create(type='Organization', name='Organization', description='Description')
+    }
+
+
+def test_resolve_many_by_stix_id_name_and_alias(client, entities):
+    items = [
+        (entities['organization']['stix_id_key'], None),
+        (None, 'Set'),
+        (None, 'Alias'),
+        ('unknown--id', 'Organization'),
+        (None, 'Unknown')
+    ]
+    result = client.stix_domain_entity.resolve_many(items)
+    assert {item: entity['id'] if entity is not None else None for item, entity in result.items()} == {
+        items[0]: entities['organization']['id'],
+        items[1]: entities['set']['id'],
+        items[2]: entities['set']['id'],
+        items[3]: entities['organization']['id'],
+        items[4]: None
+    }
+
+
+def test_resolve_many_matches_as_get_by_stix_id_or_name(client, entities):
+    # The platform filters the names and the aliases by exact value
+    for name in ['Set', 'set', 'Alias', 'ALIAS']:
+        expected = client.stix_domain_entity.get_by_stix_id_or_name(types=['Intrusion-Set'], name=name)
+        resolved = client.stix_domain_entity.resolve_many([(None, name)], types=['Intrusion-Set'])[(None, name)]
+        assert (resolved and resolved['id']) == (expected and expected['id'])
+    assert client.stix_domain_entity.resolve_many([(None, 'set')])[(None, 'set')] is None
+
+
+def test_resolve_many_reads_by_chunks(client, platform, entities):
+    operations = platform.operations
+    names = ['Set', 'Organization', 'Missing']
+    result = client.stix_domain_entity.resolve_many([(None, name) for name in names], chunk_size=2)
+    assert [result[(None, name)] is not None for name in names] == [True, True, False]
+    # Two chunks of names, then the one missing name by alias
+    assert platform.operations - operations == 3